@@ -0,0 +1,24 @@
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+
+from .conftest import tolerant
+
+
+def attribute() -> Attribute:
+    attr = Attribute(AttrCM(attribute="sr/ps-0/0/current", unit="A"))
+    tolerant(attr.set_and_wait, 1.0)
+    return attr
+
+
+def test_attribute_readback(benchmark):
+    attr = attribute()
+    benchmark(tolerant, attr.readback)
+
+
+def test_attribute_get(benchmark):
+    attr = attribute()
+    benchmark(tolerant, attr.get)
+
+
+def test_attribute_set_and_wait(benchmark):
+    attr = attribute()
+    benchmark(tolerant, attr.set_and_wait, 2.0)
@@ -0,0 +1,31 @@
+import pytest
+
+from tango.pyaml.attribute_list import AttributeList, ConfigModel as GrpCM
+
+from .conftest import VECTOR_SIZES, lattice, tolerant
+
+
+def attribute_list(size: int, float_values: bool = False) -> AttributeList:
+    attr_list = AttributeList(
+        GrpCM(attributes=lattice(size), name="ps", float_values=float_values)
+    )
+    tolerant(attr_list.set_and_wait, 1.0)
+    return attr_list
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_attribute_list_readback(benchmark, size):
+    attr_list = attribute_list(size)
+    benchmark(tolerant, attr_list.readback)
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_attribute_list_float_readback(benchmark, size):
+    attr_list = attribute_list(size, float_values=True)
+    benchmark(tolerant, attr_list.readback)
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_attribute_list_bulk_readback(benchmark, size):
+    attr_list = attribute_list(size)
+    benchmark(tolerant, attr_list.bulk_readback)
@@ -0,0 +1,25 @@
+import pytest
+
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.initializer import initialize_attributes
+
+from .conftest import lattice
+
+# Number of attributes of a storage ring lattice
+LATTICE_SIZE = 5000
+
+
+def attributes() -> tuple[tuple[list[Attribute]], dict]:
+    # New proxies on each round, the cost of proxy creation is measured
+    DeviceFactory().clear()
+    attrs = [Attribute(AttrCM(attribute=name)) for name in lattice(LATTICE_SIZE)]
+    return (attrs,), {}
+
+
+@pytest.mark.parametrize("max_workers", [1, 16])
+def test_lattice_initialization(benchmark, max_workers):
+    def initialize(attrs):
+        initialize_attributes(attrs, max_workers)
+
+    benchmark.pedantic(initialize, setup=attributes, rounds=3)
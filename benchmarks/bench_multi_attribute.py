@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+
+from .conftest import VECTOR_SIZES, lattice, tolerant
+
+
+def multi_attribute(size: int) -> MultiAttribute:
+    ma = MultiAttribute(MultiAttrCM(attributes=lattice(size)))
+    ma.initialize_all()
+    tolerant(ma.set, np.arange(size, dtype=np.float64))
+    return ma
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_multi_attribute_readback(benchmark, size):
+    ma = multi_attribute(size)
+    benchmark(tolerant, ma.readback)
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_multi_attribute_bulk_readback(benchmark, size):
+    ma = multi_attribute(size)
+    benchmark(tolerant, ma.bulk_readback)
+
+
+@pytest.mark.parametrize("size", VECTOR_SIZES)
+def test_multi_attribute_set(benchmark, size):
+    ma = multi_attribute(size)
+    values = np.linspace(0.0, 1.0, size)
+    benchmark(tolerant, ma.set, values)
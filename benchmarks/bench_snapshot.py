@@ -0,0 +1,27 @@
+import numpy as np
+
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+
+from .conftest import lattice, tolerant
+
+# Number of magnet power supplies of a storage ring
+NB_MAGNETS = 3000
+
+
+def control_system() -> TangoControlSystem:
+    cs = TangoControlSystem(CsCM(name="bench_cs"))
+    cs.attach([Attribute(AttrCM(attribute=name)) for name in lattice(NB_MAGNETS)])
+    return cs
+
+
+def test_snapshot(benchmark):
+    cs = control_system()
+    benchmark(tolerant, cs.snapshot)
+
+
+def test_restore(benchmark):
+    cs = control_system()
+    snapshot = cs.snapshot()
+    snapshot.setpoints = np.arange(NB_MAGNETS, dtype=np.float64)
+    benchmark(tolerant, cs.restore, snapshot)
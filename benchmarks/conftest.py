@@ -0,0 +1,71 @@
+import os
+
+import pyaml
+import pytest
+
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.simulator import (
+    AttributeModel,
+    ConfigModel as SimulatorCM,
+    DeviceModel,
+    Simulator,
+)
+
+# Size of the vectors of the aggregated benchmarks
+VECTOR_SIZES = [10, 100, 1000, 5000]
+
+# Number of devices per device server of the simulated lattice
+DEVICES_PER_SERVER = 50
+
+
+def lattice(size: int, attr_name: str = "current") -> list[str]:
+    """Attribute names of a lattice of power supplies, one attribute per device."""
+    return [
+        f"sr/ps-{index // DEVICES_PER_SERVER}/{index}/{attr_name}"
+        for index in range(size)
+    ]
+
+
+def tolerant(function, *args):
+    """Call a function, ignoring the failures injected by the backend."""
+    try:
+        return function(*args)
+    except pyaml.PyAMLException:
+        return None
+
+
+def simulator_config() -> SimulatorCM:
+    """
+    Build the simulated devices from the PYAML_BENCH_LATENCY_MS,
+    PYAML_BENCH_JITTER_MS, PYAML_BENCH_FAILURE_RATE and PYAML_BENCH_SEED
+    environment variables. Reads and writes of all devices last the latency.
+    """
+    latency_ms = float(os.environ.get("PYAML_BENCH_LATENCY_MS", "0"))
+    return SimulatorCM(
+        seed=int(os.environ.get("PYAML_BENCH_SEED", "0")),
+        devices=[
+            DeviceModel(
+                pattern="*",
+                read_latency_ms=latency_ms,
+                latency_jitter_ms=float(os.environ.get("PYAML_BENCH_JITTER_MS", "0")),
+                failure_rate=float(os.environ.get("PYAML_BENCH_FAILURE_RATE", "0")),
+                attributes=[
+                    AttributeModel(name="current", write_latency_ms=latency_ms)
+                ],
+            )
+        ],
+    )
+
+
+@pytest.fixture(autouse=True)
+def backend():
+    pytest.importorskip("pytest_benchmark")
+    factory = DeviceFactory()
+    factory.reset_stats()
+    TangoControlSystem._instance = None
+    simulator = Simulator(simulator_config())
+    factory.set_backend(simulator)
+    yield simulator
+    simulator.stop()
+    factory.set_backend()
@@ -0,0 +1,339 @@
+import logging
+import time
+from threading import Condition, Event, Thread
+from typing import Iterator
+
+import numpy as np
+import pyaml
+import tango
+from numpy import typing as npt
+
+from .multi_vector_attribute import MultiVectorAttribute
+from .vector_attribute import VectorAttribute
+
+logger = logging.getLogger(__name__)
+
+
+class Acquisition:
+    """
+    Continuous acquisition of SPECTRUM attributes into a ring buffer.
+
+    Frames (one waveform per attribute) are written in a preallocated buffer
+    of shape (number of attributes, n_samples, history), optionally memory
+    mapped, so that memory stays flat whatever the duration of the
+    acquisition. The buffer is fed by Tango events or by polling at a fixed
+    rate and frames are consumed with frames() or by iterating the
+    acquisition.
+
+    With events, a frame is complete when all attributes sent their
+    waveform. A second waveform of an attribute closes the frame being
+    assembled, missing waveforms are filled with NaN (0 for integer types),
+    so that all attributes always advance together.
+
+    With back-pressure (blocking=True), frames not yet consumed are never
+    overwritten: polling waits for the consumer and events received while the
+    buffer is full are dropped. Otherwise the oldest frames are overwritten
+    and skipped by the consumer (overruns).
+
+    Parameters
+    ----------
+    attributes : MultiVectorAttribute or list[VectorAttribute]
+        Acquired attributes.
+    n_samples : int
+        Number of samples per waveform.
+    history : int
+        Number of frames kept by the ring buffer.
+    period_ms : float, optional
+        Polling period in milli seconds. If not specified, the buffer is
+        fed by events.
+    event_type : str
+        Tango event type used when the buffer is fed by events.
+    dtype : numpy.dtype
+        Type of the samples.
+    filename : str, optional
+        If specified, the ring buffer is a numpy memory map of this file.
+    blocking : bool
+        Apply back-pressure instead of overwriting frames not yet consumed.
+    """
+
+    def __init__(
+        self,
+        attributes: MultiVectorAttribute | list[VectorAttribute],
+        n_samples: int,
+        history: int,
+        period_ms: float | None = None,
+        event_type: str = "CHANGE_EVENT",
+        dtype: npt.DTypeLike = np.float64,
+        filename: str | None = None,
+        blocking: bool = True,
+    ):
+        if not isinstance(attributes, MultiVectorAttribute):
+            aggregator = MultiVectorAttribute()
+            aggregator.add_devices(list(attributes))
+            attributes = aggregator
+        if history < 2:
+            raise pyaml.PyAMLException("The acquisition history must be at least 2")
+        self._attributes = attributes
+        self._n_samples = n_samples
+        self._history = history
+        self._period_ms = period_ms
+        self._event_type = event_type
+        self._blocking = blocking
+        shape = (len(attributes), n_samples, history)
+        if filename is not None:
+            self._buffer = np.memmap(filename, dtype=dtype, mode="w+", shape=shape)
+        else:
+            self._buffer = np.zeros(shape, dtype=dtype)
+        self._missing = np.nan if np.issubdtype(dtype, np.inexact) else 0
+
+        self._cond = Condition()
+        # Number of frames written and consumed
+        self._written = 0
+        self._read = 0
+        # Attributes having sent their waveform in the frame being assembled
+        self._filled = np.zeros(len(attributes), dtype=bool)
+        self._running = False
+        self._stop = Event()
+        self._thread: Thread = None
+        self._subscriptions: list[tuple[tango.DeviceProxy, int]] = []
+        self._dropped = 0
+        self._overruns = 0
+        self._errors = 0
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """Ring buffer of shape (number of attributes, n_samples, history)."""
+        return self._buffer
+
+    def start(self):
+        """
+        Start the acquisition.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the event subscription fails.
+        """
+        if self._running:
+            return
+        self._stop.clear()
+        self._running = True
+        if self._period_ms is not None:
+            self._thread = Thread(target=self._poll_loop, daemon=True)
+            self._thread.start()
+        else:
+            try:
+                self._subscribe()
+            except tango.DevFailed as df:
+                self.stop()
+                raise pyaml.PyAMLException(
+                    f"Cannot subscribe to {self._event_type}: {df.args[0].desc}"
+                )
+
+    def stop(self):
+        """
+        Stop the acquisition, consumers get the remaining frames then stop.
+        """
+        self._stop.set()
+        for device, event_id in self._subscriptions:
+            try:
+                device.unsubscribe_event(event_id)
+            except tango.DevFailed:
+                logger.warning("Cannot unsubscribe event %s", event_id)
+        self._subscriptions = []
+        with self._cond:
+            if self._filled.any():
+                self._close_frame()
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if isinstance(self._buffer, np.memmap):
+            self._buffer.flush()
+
+    def __enter__(self) -> "Acquisition":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _subscribe(self):
+        event_type = tango.EventType.names[self._event_type]
+        for index, attribute in enumerate(self._attributes):
+            attribute._ensure_initialized()
+            device = attribute._attribute_dev
+            event_id = device.subscribe_event(
+                attribute._attr_name, event_type, self._event_callback(index)
+            )
+            self._subscriptions.append((device, event_id))
+
+    def _event_callback(self, index: int):
+        def push_event(event: tango.EventData):
+            if event.err or event.attr_value is None:
+                with self._cond:
+                    self._errors += 1
+                return
+            self._push(index, event.attr_value.value)
+
+        return push_event
+
+    def _push(self, index: int, value: npt.ArrayLike):
+        with self._cond:
+            if self._filled[index]:
+                self._close_frame()
+            if not self._filled.any() and self._full():
+                # Tango event threads must not be blocked
+                self._dropped += 1
+                return
+            try:
+                np.copyto(self._buffer[index, :, self._written % self._history], value)
+            except ValueError as ex:
+                logger.log(
+                    logging.WARNING,
+                    "Bad waveform from %s: %s",
+                    self._attributes[index].name(),
+                    ex,
+                )
+                self._errors += 1
+                return
+            self._filled[index] = True
+            if self._filled.all():
+                self._close_frame()
+
+    def _close_frame(self):
+        # Called with the lock held, waveforms not received are filled
+        missing = ~self._filled
+        if missing.any():
+            self._buffer[missing, :, self._written % self._history] = self._missing
+        self._filled[:] = False
+        self._commit()
+
+    def _poll_loop(self):
+        try:
+            self._poll()
+        finally:
+            # Consumers must not wait for a dead acquisition
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def _poll(self):
+        period = self._period_ms / 1000.0
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            slot = self._reserve()
+            if slot is not None:
+                try:
+                    self._attributes.readback(out=self._buffer[:, :, slot])
+                    with self._cond:
+                        self._commit()
+                except pyaml.PyAMLException as ex:
+                    logger.log(logging.WARNING, "Acquisition poll failed: %s", ex)
+                    with self._cond:
+                        self._errors += 1
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay < 0:
+                # Late, keep the rate without bursts
+                next_time = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _full(self) -> bool:
+        # Called with the lock held
+        return self._blocking and self._written - self._read >= self._history
+
+    def _reserve(self) -> int | None:
+        """
+        Return the slot to write the next polled frame, None if the frame must
+        be dropped.
+        """
+        with self._cond:
+            while self._full():
+                if self._stop.is_set():
+                    self._dropped += 1
+                    return None
+                # Back-pressure on polling
+                self._cond.wait(0.1)
+            return self._written % self._history
+
+    def _commit(self):
+        # Called with the lock held
+        self._written += 1
+        self._cond.notify_all()
+
+    def frames(self, timeout_s: float | None = None) -> Iterator[np.ndarray]:
+        """
+        Generate the acquired frames in order.
+
+        Frames are views of the ring buffer of shape (number of attributes,
+        n_samples). With back-pressure, a frame is released when the next
+        one is requested, copy it to keep it longer.
+
+        Parameters
+        ----------
+        timeout_s : float, optional
+            Stop if no frame is received for this time, in seconds.
+
+        Yields
+        ------
+        numpy.ndarray
+            Frame of shape (number of attributes, n_samples).
+        """
+        holding = False
+        while True:
+            with self._cond:
+                if holding:
+                    self._read += 1
+                    holding = False
+                    self._cond.notify_all()
+                if not self._cond.wait_for(
+                    lambda: self._written > self._read or not self._running,
+                    timeout_s,
+                ):
+                    return
+                completed = self._written
+                if completed <= self._read:
+                    return
+                if completed - self._read > self._history:
+                    self._overruns += completed - self._read - self._history
+                    self._read = completed - self._history
+                slot = self._read % self._history
+                holding = True
+            yield self._buffer[:, :, slot]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return self.frames()
+
+    def latest(self) -> np.ndarray | None:
+        """
+        Return a copy of the last complete frame, None if no frame was acquired.
+        """
+        with self._cond:
+            completed = self._written
+            if completed == 0:
+                return None
+            return self._buffer[:, :, (completed - 1) % self._history].copy()
+
+    def stats(self) -> dict:
+        """
+        Return the acquisition counters.
+
+        Returns
+        -------
+        dict
+            frames: complete frames, consumed: frames consumed, dropped:
+            samples dropped because the buffer was full, overruns: frames
+            overwritten before being consumed, errors: failed polls, error
+            events and bad waveforms.
+        """
+        with self._cond:
+            return {
+                "frames": self._written,
+                "consumed": self._read,
+                "dropped": self._dropped,
+                "overruns": self._overruns,
+                "errors": self._errors,
+            }
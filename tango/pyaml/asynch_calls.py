@@ -0,0 +1,474 @@
+import logging
+import math
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Any, Callable
+
+import pyaml
+import tango
+
+from .circuit_breaker import CircuitBreaker
+from .device_policy import DevicePolicy
+from .instrumentation import Instrumentation, payload_size
+from .recording import Recorder
+from .tango_pyaml_utils import tango_to_PyAMLException
+
+logger = logging.getLogger(__name__)
+
+# Period used to poll replies of pending asynchronous calls (in s), doubled
+# after each poll collecting nothing up to MAX_POLL_PERIOD
+POLL_PERIOD: float = 0.0005
+MAX_POLL_PERIOD: float = 0.002
+
+
+class AsynchCall:
+    """
+    Asynchronous request sent to a device (polling model).
+
+    Parameters
+    ----------
+    device_name : str
+        Name of the device targeted by the request.
+    send : Callable[[], int]
+        Sends the request and returns the asynchronous call id.
+    reply : Callable[[int], Any]
+        Returns the reply of the call if it has arrived, raises
+        tango.AsynReplyNotArrived otherwise.
+    operation : str
+        Name of the operation, used by the instrumentation.
+    args : tuple
+        Arguments of the operation, used by the recorder.
+    cancel : Callable[[int], None], optional
+        Cancels the call from its id, used when the call is abandoned
+        (timeout or deadline) so that the late reply is discarded by the proxy.
+    idempotent : bool, optional
+        True if the call can be sent again when it fails (reads), see
+        DevicePolicy.retries. Writes are never sent twice.
+    """
+
+    def __init__(
+        self,
+        device_name: str,
+        send: Callable[[], int],
+        reply: Callable[[int], Any],
+        operation: str = "asynch_call",
+        args: tuple = (),
+        cancel: Callable[[int], None] | None = None,
+        idempotent: bool = False,
+    ):
+        self.device_name = device_name
+        self.send = send
+        self.reply = reply
+        self.operation = operation
+        self.args = args
+        self.cancel = cancel
+        self.idempotent = idempotent
+        self.call_id: int = None
+        self.result: Any = None
+        self.error: pyaml.PyAMLException = None
+        # Original Tango error of a failed call, None for a timeout
+        self.dev_failed: tango.DevFailed = None
+        self.expired = False
+        self.attempts = 0
+        self.in_flight = False
+
+    def has_failed(self) -> bool:
+        return self.error is not None
+
+    def has_expired(self) -> bool:
+        """
+        Return True if the call got no reply in time (timeout, deadline or
+        unavailable device).
+        """
+        return self.expired
+
+
+class AsynchScheduler:
+    """
+    Send asynchronous calls while bounding the number of requests in flight,
+    globally and per device server. Calls over the limits are queued and sent
+    as soon as replies arrive.
+
+    Parameters
+    ----------
+    server_of : Callable[[str], str]
+        Returns the device server name of a device.
+    policy_of : Callable[[str], DevicePolicy]
+        Returns the timeout and retry policy of a device.
+    breaker : CircuitBreaker, optional
+        Circuit breaker failing calls to unavailable devices immediately.
+    instrumentation : Instrumentation, optional
+        Records the latency of the calls, from send to reply.
+    recorder : Recorder, optional
+        Records the values read and written by the calls.
+    """
+
+    def __init__(
+        self,
+        server_of: Callable[[str], str],
+        policy_of: Callable[[str], DevicePolicy],
+        breaker: CircuitBreaker | None = None,
+        instrumentation: Instrumentation | None = None,
+        recorder: Recorder | None = None,
+    ):
+        self._server_of = server_of
+        self._policy_of = policy_of
+        self._breaker = breaker
+        self._instrumentation = instrumentation or Instrumentation()
+        self._recorder = recorder or Recorder()
+        self._lock = Lock()
+        self._max_in_flight: int = None
+        self._max_in_flight_per_server: int = None
+        self._in_flight = 0
+        self._server_in_flight: dict[str, int] = defaultdict(int)
+        self._queued = 0
+        self._max_queued = 0
+        self._nb_calls = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def set_limits(
+        self,
+        max_in_flight: int | None = None,
+        max_in_flight_per_server: int | None = None,
+    ):
+        """
+        Set the maximum number of requests in flight, None for no limit.
+
+        Parameters
+        ----------
+        max_in_flight : int, optional
+            Global limit.
+        max_in_flight_per_server : int, optional
+            Limit per device server.
+        """
+        for limit in [max_in_flight, max_in_flight_per_server]:
+            if limit is not None and limit < 1:
+                raise pyaml.PyAMLException(
+                    f"Invalid limit of requests in flight: {limit}"
+                )
+        with self._lock:
+            self._max_in_flight = max_in_flight
+            self._max_in_flight_per_server = max_in_flight_per_server
+
+    def _acquire(self, server: str) -> bool:
+        with self._lock:
+            if (
+                self._max_in_flight is not None
+                and self._in_flight >= self._max_in_flight
+            ):
+                return False
+            if (
+                self._max_in_flight_per_server is not None
+                and self._server_in_flight[server] >= self._max_in_flight_per_server
+            ):
+                return False
+            self._in_flight += 1
+            self._server_in_flight[server] += 1
+            return True
+
+    def _release(self, server: str):
+        with self._lock:
+            self._in_flight -= 1
+            self._server_in_flight[server] -= 1
+
+    def _dequeued(self, wait: float):
+        with self._lock:
+            self._queued -= 1
+            self._nb_calls += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+    def run(
+        self,
+        calls: list[AsynchCall],
+        timeout_ms: int | None = None,
+        deadline: float | None = None,
+    ):
+        """
+        Send asynchronous calls and collect their replies as they arrive.
+
+        The result (or the error) of each call is stored in the call itself.
+        Failed or timed out idempotent calls are sent again according to the
+        policy of their device. Calls abandoned without reply are cancelled.
+
+        Parameters
+        ----------
+        calls : list[AsynchCall]
+            Calls to run.
+        timeout_ms : int, optional
+            Timeout of each call from the time it is sent, in milli seconds.
+            Default is the timeout of the device policy, the smallest of both
+            is used otherwise.
+        deadline : float, optional
+            Time (time.monotonic()) after which calls that are not completed
+            or not yet sent fail.
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._queued += len(calls)
+            self._max_queued = max(self._max_queued, self._queued)
+
+        # Calls to send, with the time before which they must not be sent
+        queue: list[tuple[AsynchCall, float]] = [(call, start) for call in calls]
+        pending: list[tuple[AsynchCall, str, float, int]] = []
+        try:
+            self._run(queue, pending, timeout_ms, deadline, start)
+        finally:
+            # Only left on error (i.e. interrupted), nobody will collect them
+            for call, server, _, _ in pending:
+                if call.in_flight:
+                    self._cancel(call)
+                    self._release(server)
+
+    def _run(
+        self,
+        queue: list[tuple[AsynchCall, float]],
+        pending: list[tuple[AsynchCall, str, float, int]],
+        timeout_ms: int | None,
+        deadline: float | None,
+        start: float,
+    ):
+        per_server = self._max_in_flight_per_server is not None
+        servers = {}
+        policies = {}
+        period = POLL_PERIOD
+        while len(queue) > 0 or len(pending) > 0:
+            now = time.monotonic()
+            nb_sent = 0
+
+            # Send queued calls while the limits allow it
+            still_queued = []
+            for call, not_before in queue:
+                if deadline is not None and now > deadline:
+                    if call.attempts == 0:
+                        self._dequeued(now - start)
+                    call.expired = True
+                    call.error = pyaml.PyAMLException(
+                        f"Deadline exceeded before sending request to {call.device_name}"
+                    )
+                    continue
+                if now < not_before:
+                    still_queued.append((call, not_before))
+                    continue
+                if self._breaker is not None and self._breaker.is_open(
+                    call.device_name
+                ):
+                    if call.attempts == 0:
+                        self._dequeued(now - start)
+                    call.expired = True
+                    call.error = self._breaker.rejected(call.device_name)
+                    continue
+                if call.device_name not in servers:
+                    servers[call.device_name] = (
+                        self._server_of(call.device_name)
+                        if per_server
+                        else call.device_name
+                    )
+                    policies[call.device_name] = self._policy_of(call.device_name)
+                server = servers[call.device_name]
+                if not self._acquire(server):
+                    still_queued.append((call, not_before))
+                    continue
+                if call.attempts == 0:
+                    self._dequeued(now - start)
+                call.attempts += 1
+                policy = policies[call.device_name]
+                call_timeout = (
+                    policy.timeout_ms
+                    if timeout_ms is None
+                    else min(timeout_ms, policy.timeout_ms)
+                )
+                try:
+                    call.call_id = call.send()
+                    call.in_flight = True
+                    nb_sent += 1
+                    pending.append((call, server, time.monotonic(), call_timeout))
+                except tango.DevFailed as df:
+                    self._release(server)
+                    self._failed(call, 0.0, df)
+                    retry = self._retry_time(call, policy, now, deadline)
+                    if retry is None:
+                        call.error = tango_to_PyAMLException(df)
+                        call.dev_failed = df
+                    else:
+                        still_queued.append((call, retry))
+            queue[:] = still_queued
+
+            # Collect arrived replies. Each poll of a call that has not arrived
+            # costs an exception, only the oldest call is polled until it
+            # completes, unless queued calls wait for slots. Younger calls are
+            # still polled once their timeout or the deadline is reached.
+            not_arrived = []
+            waiting = False
+            now = time.monotonic()
+            for call, server, sent, call_timeout in pending:
+                if (
+                    waiting
+                    and (now - sent) * 1000.0 <= call_timeout
+                    and (deadline is None or now <= deadline)
+                ):
+                    not_arrived.append((call, server, sent, call_timeout))
+                    continue
+                error = None
+                dev_failed = None
+                expired = False
+                try:
+                    call.result = call.reply(call.call_id)
+                    self._succeeded(call, time.monotonic() - sent)
+                except tango.AsynReplyNotArrived:
+                    now = time.monotonic()
+                    timed_out = (now - sent) * 1000.0 > call_timeout
+                    if timed_out or (deadline is not None and now > deadline):
+                        self._cancel(call)
+                        if timed_out:
+                            self._failed(call, now - sent)
+                        expired = True
+                        error = pyaml.PyAMLException(
+                            f"Timeout ({call_timeout} ms) waiting reply from {call.device_name}"
+                        )
+                    else:
+                        not_arrived.append((call, server, sent, call_timeout))
+                        waiting = len(queue) == 0
+                        continue
+                except tango.DevFailed as df:
+                    self._failed(call, time.monotonic() - sent, df)
+                    error = tango_to_PyAMLException(df)
+                    dev_failed = df
+                call.in_flight = False
+                self._release(server)
+                if error is not None:
+                    now = time.monotonic()
+                    retry = self._retry_time(
+                        call, policies[call.device_name], now, deadline
+                    )
+                    if retry is None:
+                        call.expired = expired
+                        call.error = error
+                        call.dev_failed = dev_failed
+                    else:
+                        logger.log(
+                            logging.DEBUG,
+                            "Retrying request to %s (attempt %d): %s",
+                            call.device_name,
+                            call.attempts + 1,
+                            error,
+                        )
+                        queue.append((call, retry))
+            nb_collected = len(pending) - len(not_arrived)
+            pending[:] = not_arrived
+
+            if len(queue) > 0 or len(pending) > 0:
+                # Back off while nothing happens
+                if nb_sent > 0 or nb_collected > 0:
+                    period = POLL_PERIOD
+                else:
+                    period = min(2.0 * period, MAX_POLL_PERIOD)
+                time.sleep(self._sleep_time(queue, pending, deadline, period))
+
+    @staticmethod
+    def _sleep_time(
+        queue: list[tuple[AsynchCall, float]],
+        pending: list[tuple[AsynchCall, str, float, int]],
+        deadline: float | None,
+        period: float,
+    ) -> float:
+        # Poll period, shortened to wake up for the next retry, timeout or
+        # deadline
+        now = time.monotonic()
+        # Calls not sent for lack of slots wait for replies
+        wake = min(
+            (not_before for _, not_before in queue if not_before > now),
+            default=math.inf,
+        )
+        wake = min(
+            wake,
+            min(
+                (sent + call_timeout / 1000.0 for _, _, sent, call_timeout in pending),
+                default=math.inf,
+            ),
+        )
+        if deadline is not None:
+            wake = min(wake, deadline)
+        return min(period, max(wake - now, 0.0))
+
+    def _cancel(self, call: AsynchCall):
+        # Discard the reply of an abandoned call, it would stay in the table
+        # of pending requests of the proxy otherwise
+        if call.cancel is None:
+            return
+        try:
+            call.cancel(call.call_id)
+        except tango.DevFailed as df:
+            logger.log(
+                logging.DEBUG,
+                "Cannot cancel request %d to %s: %s",
+                call.call_id,
+                call.device_name,
+                df,
+            )
+
+    def _succeeded(self, call: AsynchCall, duration: float):
+        if self._breaker is not None:
+            self._breaker.record_success(call.device_name)
+        if self._instrumentation.enabled:
+            self._instrumentation.record(
+                call.device_name,
+                call.operation,
+                duration,
+                nbytes=payload_size(call.result),
+            )
+        self._recorder.record_call(
+            call.device_name, call.operation, call.args, call.result, duration
+        )
+
+    def _failed(
+        self, call: AsynchCall, duration: float, df: tango.DevFailed | None = None
+    ):
+        # df is None for a timeout
+        if self._breaker is not None:
+            self._breaker.record_failure(call.device_name, df)
+        self._instrumentation.record(call.device_name, call.operation, duration, True)
+
+    @staticmethod
+    def _retry_time(
+        call: AsynchCall, policy: DevicePolicy, now: float, deadline: float | None
+    ) -> float | None:
+        # Time at which a failed call is sent again, None if not retried
+        if not call.idempotent or call.attempts > policy.retries:
+            return None
+        retry = now + policy.retry_delay(call.attempts)
+        if deadline is not None and retry > deadline:
+            return None
+        return retry
+
+    def stats(self) -> dict:
+        """
+        Return scheduler metrics.
+
+        Returns
+        -------
+        dict
+            in_flight: requests currently in flight, queued: requests waiting
+            for a slot, max_queued: maximum queue depth, nb_calls: number of
+            sent requests, mean_wait_s and max_wait_s: time spent in queue.
+        """
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "nb_calls": self._nb_calls,
+                "mean_wait_s": self._total_wait / self._nb_calls
+                if self._nb_calls > 0
+                else 0.0,
+                "max_wait_s": self._max_wait,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._max_queued = self._queued
+            self._nb_calls = 0
+            self._total_wait = 0.0
+            self._max_wait = 0.0
@@ -1,13 +1,16 @@
 import logging
+import time
 from typing import Optional, Tuple
 
 from pydantic import BaseModel
 
 from pyaml.control.deviceaccess import DeviceAccess
-from pyaml.control.readback_value import Value, Quality
+from pyaml.control.readback_value import Value
 
 from .initializable_element import InitializableElement
 from .device_factory import DeviceFactory
+from .event_cache import EventCache
+from .write_guard import WriteGuardMode, guard, guard_modes
 from .tango_pyaml_utils import *
 
 PYAMLCLASS: str = "Attribute"
@@ -27,11 +30,35 @@ class ConfigModel(BaseModel):
         The unit of the attribute.
     range : tuple(min, max), optional
         Range of valid values. Use null for -∞ or +∞.
+    events : bool, optional
+        Serve get() and readback() from a value cache fed by Tango events.
+        If not specified, the control system setting is used.
+    event_type : str, optional
+        Tango event type used for the subscription (CHANGE_EVENT or PERIODIC_EVENT).
+        Default is CHANGE_EVENT.
+    event_max_age_ms : int, optional
+        Maximum age of a cached value in milli seconds. Older values are read
+        synchronously. Default is 1000 ms.
+    write_guard : str, optional
+        Check written values against the range before sending them: reject
+        (raise OutOfRangeException), clip (write the nearest limit) or warn
+        (log and write). If not specified, the control system setting is used.
+    write_deadband : float, optional
+        Writes differing by less than this value from the last commanded
+        setpoint are not sent (scalar attributes). The last setpoint is
+        forgotten on write failure or when a read or an event shows that it
+        was changed elsewhere. If not specified, the control system setting
+        is used, no dead-band by default.
     """
 
     attribute: str
     unit: str = ""
     range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    events: Optional[bool] = None
+    event_type: Optional[str] = None
+    event_max_age_ms: Optional[int] = None
+    write_guard: Optional[WriteGuardMode] = None
+    write_deadband: Optional[float] = None
 
 
 class Attribute(DeviceAccess, InitializableElement):
@@ -54,23 +81,53 @@ class Attribute(DeviceAccess, InitializableElement):
         self._cfg = cfg
         self._writable = writable
         self._attribute_dev: tango.DeviceProxy = None
+        self._attribute_adev: tango.DeviceProxy = None  # Asyncio green mode
         self._attr_config: tango.AttributeConfig = None
         self._attribute_dev_name: str = None
         self._attr_name: str = None
+        self._event_cache: EventCache = None
+        self._conf_event_id: int = None
+        # Resolved [min, max], see get_range_array()
+        self._range: np.ndarray = None
+        # Slot in the setpoint cache of the device factory
+        self._setpoint_slot: int = None
+        # Asynchronous write whose reply is not read yet, see set()
+        self._pending_write: tuple[int, float] = None
+
+    # Number of range invalidations and generation of the range of each
+    # attribute (by name), incremented each time it is invalidated.
+    # Aggregators rebuild their cached ranges when the generation of one of
+    # their attributes changes, see range_changed()
+    _range_invalidations: int = 0
+    _range_generations: dict[str, int] = {}
+
+    # Last setpoints are cached for the write dead-band (scalar values only)
+    _scalar_setpoints: bool = True
 
     def initialize(self):
-        super().initialize()
         try:
-            self._attribute_dev_name, self._attr_name = self._cfg.attribute.rsplit(
-                "/", 1
-            )
-            self._attribute_dev = DeviceFactory().get_device(self._attribute_dev_name)
+            device_name, attr_name = self._cfg.attribute.rsplit("/", 1)
+            device = DeviceFactory().get_device(device_name)
         except tango.DevFailed as df:
             raise tango_to_PyAMLException(df)
 
-        self._attr_config: tango.AttributeConfig = (
-            self._attribute_dev.get_attribute_config(self._attr_name, wait=True)
-        )
+        config = DeviceFactory().get_attribute_configs(
+            device_name, [attr_name], device
+        )[attr_name]
+        if isinstance(config, pyaml.PyAMLException):
+            raise config
+        self._initialize_from(device, config)
+
+    def _initialize_from(
+        self, device: tango.DeviceProxy, attr_config: tango.AttributeConfig
+    ):
+        """
+        Initialize the attribute from an already built device proxy and attribute
+        configuration (used by bulk initialization).
+        """
+        self._attribute_dev_name, self._attr_name = self._cfg.attribute.rsplit("/", 1)
+        self._attribute_dev = device
+        self._attr_config = attr_config
 
         if self._writable:
             if self._attr_config.writable not in [
@@ -82,9 +139,213 @@ class Attribute(DeviceAccess, InitializableElement):
                     f"Tango attribute {self._cfg.attribute} is not writable."
                 )
 
+        if self._cfg.events:
+            self._subscribe_events()
+        # Only once all checks passed, failed attributes are retried
+        super().initialize()
+
+    def _subscribe_events(self):
+        event_type = self._cfg.event_type or "CHANGE_EVENT"
+        max_age_ms = self._cfg.event_max_age_ms
+        cache = EventCache(max_age_ms if max_age_ms is not None else 1000)
+        try:
+            cache.subscribe(
+                self._attribute_dev, self._attr_name, tango.EventType.names[event_type]
+            )
+            self._event_cache = cache
+        except (tango.DevFailed, KeyError) as ex:
+            # Events are an optimization, keep on with synchronous reads
+            logger.log(
+                logging.WARNING,
+                "Cannot subscribe to %s of %s, using synchronous reads: %s",
+                event_type,
+                self._cfg.attribute,
+                ex,
+            )
+        try:
+            self._conf_event_id = self._attribute_dev.subscribe_event(
+                self._attr_name, tango.EventType.ATTR_CONF_EVENT, self._push_conf_event
+            )
+        except tango.DevFailed as df:
+            logger.log(
+                logging.WARNING,
+                "Cannot subscribe to the configuration changes of %s: %s",
+                self._cfg.attribute,
+                df,
+            )
+
+    def _push_conf_event(self, event: tango.AttrConfEventData):
+        attr_conf = getattr(event, "attr_conf", None)
+        if attr_conf is not None and not event.err:
+            self._attr_config = attr_conf
+            DeviceFactory().get_config_cache().store(
+                self._attribute_dev_name, {self._attr_name: attr_conf}
+            )
+            self.invalidate_range()
+
+    def unsubscribe_events(self):
+        """
+        Cancel the event subscription, next reads are synchronous.
+        """
+        if self._event_cache is not None:
+            self._event_cache.unsubscribe()
+            self._event_cache = None
+        if self._conf_event_id is not None:
+            try:
+                self._attribute_dev.unsubscribe_event(self._conf_event_id)
+            except tango.DevFailed:
+                logger.warning("Cannot unsubscribe event %s", self._conf_event_id)
+            self._conf_event_id = None
+
+    def _read_attribute(self) -> tango.DeviceAttribute:
+        # Serve the value from the event cache when it is fresh enough
+        if self._event_cache is not None:
+            attr_value = self._event_cache.last_value()
+            if attr_value is not None:
+                return self._observe_setpoint(self._cached_read(attr_value))
+        return self._observe_setpoint(
+            self._device_call(self._attribute_dev.read_attribute, self._attr_name)
+        )
+
+    def _cached_read(self, attr_value: tango.DeviceAttribute) -> tango.DeviceAttribute:
+        # Recorded as a read without latency, so that a replay serves the same
+        # values as the live session
+        DeviceFactory().get_recorder().record_call(
+            self._attribute_dev_name,
+            "read_attribute",
+            (self._attr_name,),
+            attr_value,
+            0.0,
+        )
+        return attr_value
+
+    def _slot(self) -> int:
+        if self._setpoint_slot is None:
+            self._setpoint_slot = (
+                DeviceFactory().get_setpoint_cache().slot(self._cfg.attribute)
+            )
+        return self._setpoint_slot
+
+    def _observe_setpoint(
+        self, attr_value: tango.DeviceAttribute
+    ) -> tango.DeviceAttribute:
+        # A setpoint changed elsewhere invalidates the dead-band
+        if self._cfg.write_deadband is not None and self._writable:
+            self._settle_write()
+            DeviceFactory().get_setpoint_cache().observe(
+                self._slot(), attr_value.w_value, self._cfg.write_deadband
+            )
+        return attr_value
+
+    def _unchanged(self, value) -> bool:
+        # Dead-band check, see ConfigModel.write_deadband
+        if self._cfg.write_deadband is None or not self._scalar_setpoints:
+            return False
+        if self._event_cache is not None:
+            attr_value = self._event_cache.last_value()
+            if attr_value is not None:
+                self._observe_setpoint(attr_value)
+        self._settle_write()
+        changed = (
+            DeviceFactory()
+            .get_setpoint_cache()
+            .changed(self._slot(), value, self._cfg.write_deadband)
+        )
+        if not changed:
+            logger.log(
+                logging.DEBUG,
+                "Skipping write of %s to %s (dead-band)",
+                self._cfg.attribute,
+                value,
+            )
+        return not changed
+
+    def _settle_write(self):
+        # The setpoint of an asynchronous write is known once its reply arrived
+        if self._pending_write is None:
+            return
+        call_id, value = self._pending_write
+        try:
+            self._attribute_dev.write_attribute_reply(call_id)
+        except tango.AsynReplyNotArrived:
+            return
+        except tango.DevFailed:
+            self._written(None)
+            return
+        self._written(value)
+
+    def _written(self, value):
+        # Shared with all elements writing the attribute, None when the write
+        # failed, NaN while its reply is pending
+        self._pending_write = None
+        if self._scalar_setpoints:
+            cache = DeviceFactory().get_setpoint_cache()
+            if value is None:
+                cache.invalidate(self._slot())
+            else:
+                cache.update(self._slot(), value)
+
+    def _device_call(self, method, *args):
+        # Requests to unavailable devices fail immediately
+        factory = DeviceFactory()
+        breaker = factory.get_breaker()
+        breaker.check(self._attribute_dev_name)
+        start = time.perf_counter()
+        try:
+            result = factory.get_instrumentation().call(
+                self._attribute_dev_name, method, *args
+            )
+        except tango.DevFailed as df:
+            breaker.record_failure(self._attribute_dev_name, df)
+            raise
+        breaker.record_success(self._attribute_dev_name)
+        factory.get_recorder().record_call(
+            self._attribute_dev_name,
+            method.__name__,
+            args,
+            result,
+            time.perf_counter() - start,
+        )
+        return result
+
+    async def _adevice_call(self, method, *args):
+        factory = DeviceFactory()
+        breaker = factory.get_breaker()
+        breaker.check(self._attribute_dev_name)
+        start = time.perf_counter()
+        try:
+            result = await factory.get_instrumentation().acall(
+                self._attribute_dev_name, method, *args
+            )
+        except tango.DevFailed as df:
+            breaker.record_failure(self._attribute_dev_name, df)
+            raise
+        breaker.record_success(self._attribute_dev_name)
+        factory.get_recorder().record_call(
+            self._attribute_dev_name,
+            method.__name__,
+            args,
+            result,
+            time.perf_counter() - start,
+        )
+        return result
+
     def is_writable(self):
         return self._writable
 
+    def _guard(self, value):
+        # Range check before anything is sent, see ConfigModel.write_guard
+        if self._cfg.write_guard is None:
+            return value
+        array = np.asarray(value)[np.newaxis]
+        guarded = guard(
+            array,
+            self.get_range_array()[np.newaxis],
+            guard_modes([self._cfg.write_guard]),
+            [self._cfg.attribute],
+        )
+        return value if guarded is array else guarded[0]
+
     def set(self, value: float):
         """
         Write a value asynchronously to the Tango attribute.
@@ -97,16 +358,25 @@ class Attribute(DeviceAccess, InitializableElement):
         Raises
         ------
         pyaml.PyAMLException
-            If the Tango write fails.
+            If the Tango write fails or the write guard rejects the value.
         """
         self._ensure_initialized()
+        value = self._guard(value)
+        if self._unchanged(value):
+            return
         logger.log(
-            logging.DEBUG, f"Setting asynchronously {self._cfg.attribute} to {value}"
+            logging.DEBUG, "Setting asynchronously %s to %s", self._cfg.attribute, value
         )
         try:
-            self._attribute_dev.write_attribute_asynch(self._attr_name, value)
+            call_id = self._device_call(
+                self._attribute_dev.write_attribute_asynch, self._attr_name, value
+            )
         except tango.DevFailed as df:
+            self._written(None)
             raise tango_to_PyAMLException(df)
+        self._written(np.nan)
+        if self._scalar_setpoints:
+            self._pending_write = (call_id, value)
 
     def set_and_wait(self, value: float):
         """
@@ -120,14 +390,21 @@ class Attribute(DeviceAccess, InitializableElement):
         Raises
         ------
         pyaml.PyAMLException
-            If the Tango write fails.
+            If the Tango write fails or the write guard rejects the value.
         """
         self._ensure_initialized()
-        logger.log(logging.DEBUG, f"Setting {self._cfg.attribute} to {value}")
+        value = self._guard(value)
+        if self._unchanged(value):
+            return
+        logger.log(logging.DEBUG, "Setting %s to %s", self._cfg.attribute, value)
         try:
-            self._attribute_dev.write_attribute(self._attr_name, value)
+            self._device_call(
+                self._attribute_dev.write_attribute, self._attr_name, value
+            )
         except tango.DevFailed as df:
+            self._written(None)
             raise tango_to_PyAMLException(df)
+        self._written(value)
 
     def readback(self) -> Value:
         """
@@ -144,16 +421,103 @@ class Attribute(DeviceAccess, InitializableElement):
             If the Tango read fails.
         """
         self._ensure_initialized()
-        logger.log(logging.DEBUG, f"Reading {self._cfg.attribute}")
+        logger.log(logging.DEBUG, "Reading %s", self._cfg.attribute)
+        try:
+            return self._to_value(self._read_attribute())
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+
+    @staticmethod
+    def _to_value(attr_value: tango.DeviceAttribute) -> Value:
+        return Value(
+            attr_value.value,
+            QUALITIES[int(attr_value.quality)],
+            attr_value.time.todatetime(),
+        )
+
+    def _asyncio_device(self) -> tango.DeviceProxy:
+        # Initialization is synchronous, use bulk initialization to avoid
+        # blocking the event loop on first access
+        self._ensure_initialized()
+        if self._attribute_adev is None:
+            try:
+                self._attribute_adev = DeviceFactory().get_device(
+                    self._attribute_dev_name, tango.GreenMode.Asyncio
+                )
+            except tango.DevFailed as df:
+                raise tango_to_PyAMLException(df)
+        return self._attribute_adev
+
+    async def _aread_attribute(self) -> tango.DeviceAttribute:
+        device = self._asyncio_device()
+        if self._event_cache is not None:
+            attr_value = self._event_cache.last_value()
+            if attr_value is not None:
+                return self._observe_setpoint(self._cached_read(attr_value))
+        return self._observe_setpoint(
+            await self._adevice_call(device.read_attribute, self._attr_name)
+        )
+
+    async def aset(self, value: float):
+        """
+        Write a value to the Tango attribute (asyncio).
+
+        Parameters
+        ----------
+        value : float
+            Value to write to the attribute.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the Tango write fails or the write guard rejects the value.
+        """
+        device = self._asyncio_device()
+        value = self._guard(value)
+        if self._unchanged(value):
+            return
+        logger.log(logging.DEBUG, "Setting %s to %s", self._cfg.attribute, value)
+        try:
+            await self._adevice_call(device.write_attribute, self._attr_name, value)
+        except tango.DevFailed as df:
+            self._written(None)
+            raise tango_to_PyAMLException(df)
+        self._written(value)
+
+    async def aset_and_wait(self, value: float):
+        """
+        Write a value to the Tango attribute and wait for the reply (asyncio).
+        """
+        await self.aset(value)
+
+    async def areadback(self) -> Value:
+        """
+        Return the readback value with metadata (asyncio).
+
+        Returns
+        -------
+        Value
+            The readback value including quality and timestamp.
+        """
+        logger.log(logging.DEBUG, "Reading %s", self._cfg.attribute)
+        try:
+            return self._to_value(await self._aread_attribute())
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+
+    async def aget(self) -> float:
+        """
+        Get the last written value of the attribute (asyncio).
+
+        Returns
+        -------
+        float
+            The last written value.
+        """
         try:
-            attr_value = self._attribute_dev.read_attribute(self._attr_name)
-            quality = Quality[
-                attr_value.quality.name.rsplit("_", 1)[1]
-            ]  # AttrQuality.ATTR_VALID gives Quality.VALID
-            value = Value(attr_value.value, quality, attr_value.time.todatetime())
+            return (await self._aread_attribute()).w_value
         except tango.DevFailed as df:
             raise tango_to_PyAMLException(df)
-        return value
 
     def unit(self) -> str:
         """
@@ -204,36 +568,87 @@ class Attribute(DeviceAccess, InitializableElement):
         """
         self._ensure_initialized()
         try:
-            return self._attribute_dev.read_attribute(self._attr_name).w_value
+            return self._read_attribute().w_value
         except tango.DevFailed as df:
             raise tango_to_PyAMLException(df)
 
     def get_range(self) -> list[float]:
-        attr_range: list[float] = [None, None]
-        if self._cfg.range is not None:
-            attr_range[0] = (
-                self._cfg.range[0] if self._cfg.range[0] is not None else None
-            )
-            attr_range[1] = (
-                self._cfg.range[1] if self._cfg.range[1] is not None else None
-            )
-        else:
-            self._ensure_initialized()
-            min_value = self._attr_config.min_value
-            max_value = self._attr_config.max_value
-            attr_range[0] = to_float_or_none(min_value)
-            attr_range[1] = to_float_or_none(max_value)
+        return to_range_list(self.get_range_array())
+
+    def get_range_array(self) -> np.ndarray:
+        """
+        Return the range of valid values, resolved once from the
+        configuration or from the Tango attribute configuration. With events
+        enabled, Tango configuration changes invalidate it.
 
+        Returns
+        -------
+        numpy.array
+            Read-only float64 array [min, max], -inf or +inf when unbounded.
+        """
+        attr_range = self._range
+        if attr_range is None:
+            if self._cfg.range is not None:
+                limits = self._cfg.range
+            else:
+                self._ensure_initialized()
+                limits = (
+                    to_float_or_none(self._attr_config.min_value),
+                    to_float_or_none(self._attr_config.max_value),
+                )
+            attr_range = to_range_array([limits])[0]
+            self._range = attr_range
         return attr_range
 
+    def invalidate_range(self):
+        """
+        Drop the resolved range, it is resolved again on next access.
+        """
+        self._range = None
+        generations = Attribute._range_generations
+        generations[self._cfg.attribute] = generations.get(self._cfg.attribute, 0) + 1
+        Attribute._range_invalidations += 1
+
     def check_device_availability(self) -> bool:
         available = True
         try:
             self._ensure_initialized()
             self._attribute_dev.ping()
-        except tango.DevFailed | pyaml.PyAMLException:
+            DeviceFactory().get_breaker().record_success(self._attribute_dev_name)
+        except (tango.DevFailed, pyaml.PyAMLException):
             available = False
         return available
 
     def __repr__(self):
         return repr(self._cfg).replace("ConfigModel", self.__class__.__name__)
+
+
+def range_state(names: list[str]) -> tuple[int, list[int]]:
+    """
+    Return the range generations of attributes, see range_changed().
+
+    Parameters
+    ----------
+    names : list[str]
+        Attribute names.
+    """
+    generations = Attribute._range_generations
+    return Attribute._range_invalidations, [generations.get(name, 0) for name in names]
+
+
+def range_changed(state: tuple[int, list[int]], names: list[str]) -> bool:
+    """
+    Return True if the range of one of the attributes was invalidated since
+    range_state() returned state. Generations are only compared once a
+    range was invalidated anywhere.
+
+    Parameters
+    ----------
+    state : tuple
+        Value returned by range_state().
+    names : list[str]
+        Attribute names given to range_state().
+    """
+    if state[0] == Attribute._range_invalidations:
+        return False
+    return range_state(names)[1] != state[1]
@@ -1,14 +1,32 @@
+import asyncio
 import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional, Tuple
 
+import numpy as np
 import pyaml
 from numpy import array
 from pydantic import BaseModel
 from pyaml.control.deviceaccess import DeviceAccess
-from pyaml.control.readback_value import Value, Quality
+from pyaml.control.readback_value import Value
 import tango
 
+from .device_factory import DeviceFactory
+from .attribute import range_changed, range_state
 from .initializable_element import InitializableElement
-from .tango_pyaml_utils import to_float_or_none
+from .write_guard import CLIP, WriteGuardMode, guard, guard_modes
+from .tango_pyaml_utils import (
+    to_float_or_none,
+    to_range_array,
+    to_range_list,
+    tango_to_PyAMLException,
+    QUALITIES,
+    INVALID_QUALITY,
+    READBACK_DTYPE,
+    WriteFailedException,
+)
 
 PYAMLCLASS: str = "AttributeList"
 
@@ -27,11 +45,24 @@ class ConfigModel(BaseModel):
         Group name.
     unit : str, optional
         Unit of the attributes.
+    range : tuple(min, max), optional
+        Range of valid values of all attributes. Use null for -∞ or +∞.
+        If not specified, ranges come from the Tango attribute configurations.
+    write_guard : str, optional
+        Range check of written values: reject (raise OutOfRangeException),
+        clip (write the value nearest to the common range of all attributes)
+        or warn (log and write).
+    float_values : bool, optional
+        If true, readback() returns an array of float (NaN for failed reads)
+        instead of an array of Value objects.
     """
 
     attributes: list[str]
     name: str = ""
     unit: str = ""
+    range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    write_guard: Optional[WriteGuardMode] = None
+    float_values: bool = False
 
 
 class AttributeList(DeviceAccess, InitializableElement):
@@ -49,6 +80,25 @@ class AttributeList(DeviceAccess, InitializableElement):
         self._cfg = cfg
         self._tango_groups: dict[str, tango.Group] = {}
         self._attr_dev: dict[str, list[str]] = {}
+        # Devices disabled in each group (circuit breaker open), see
+        # _enable_available()
+        self._disabled: dict[str, set[str]] = {}
+        self._groups_lock = threading.Lock()
+        # Position in the group replies of each configured attribute
+        self._reply_index: np.ndarray = None
+        # Attribute names, in reply order
+        self._reply_names: list[str] = []
+        # Group replies, in reply order. Reused by all reads, filled and
+        # copied to the returned arrays under _replies_lock
+        self._values: np.ndarray = None
+        self._qualities: np.ndarray = None
+        self._timestamps: np.ndarray = None
+        self._replies_lock = threading.Lock()
+        # Resolved ranges, see get_range_array()
+        self._ranges: np.ndarray = None
+        self._ranges_state: tuple = None
+        # Setpoint cache slots of the attributes
+        self._setpoint_slots: np.ndarray = None
 
         for attribute in self._cfg.attributes:
             attribute_dev_name, attr_name = attribute.rsplit("/", 1)
@@ -59,9 +109,21 @@ class AttributeList(DeviceAccess, InitializableElement):
 
     def initialize(self):
         super().initialize()
+        reply_positions = {}
         for attr_name, dev_list in self._attr_dev.items():
-            self._tango_groups[attr_name] = tango.Group(self._cfg.name)
+            self._tango_groups[attr_name] = DeviceFactory().create_group(self._cfg.name)
             [self._tango_groups[attr_name].add(dev) for dev in dev_list]
+            self._disabled[attr_name] = set()
+            for dev in dev_list:
+                reply_positions[dev + "/" + attr_name] = len(reply_positions)
+        self._reply_index = np.array(
+            [reply_positions[attribute] for attribute in self._cfg.attributes],
+            dtype=np.intp,
+        )
+        self._reply_names = list(reply_positions.keys())
+        self._values = np.empty(len(reply_positions), dtype=np.float64)
+        self._qualities = np.empty(len(reply_positions), dtype=np.int8)
+        self._timestamps = np.empty(len(reply_positions), dtype=np.float64)
 
     def name(self) -> str:
         """
@@ -85,6 +147,30 @@ class AttributeList(DeviceAccess, InitializableElement):
         """
         return self._cfg.name
 
+    def _guard(self, value: float) -> float:
+        # The same value is written to all attributes, it is checked against
+        # all ranges before anything is sent
+        if self._cfg.write_guard is None:
+            return value
+        ranges = self.get_range_array()
+        modes = guard_modes([self._cfg.write_guard])
+        if modes[0] == CLIP:
+            # Nearest value within the intersection of the ranges
+            low = ranges[:, 0].max()
+            high = ranges[:, 1].min()
+            if low > high:
+                raise pyaml.PyAMLException(
+                    f"Ranges of {self.name()} have no common value, cannot clip {value}"
+                )
+            return min(max(value, low), high)
+        guard(
+            np.full(len(ranges), value, dtype=np.float64),
+            ranges,
+            modes.repeat(len(ranges)),
+            self._cfg.attributes,
+        )
+        return value
+
     def set(self, value: float):
         """
         Write a value asynchronously to all Tango attributes.
@@ -93,15 +179,33 @@ class AttributeList(DeviceAccess, InitializableElement):
         ----------
         value : float
             Value to write.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the write guard rejects the value, nothing is written.
+        WriteFailedException
+            If devices are unavailable (circuit breaker open), the other ones
+            are written.
         """
         self._ensure_initialized()
+        value = self._guard(value)
         logger.log(
-            logging.DEBUG, f"Setting asynchronously list {self.name()} to {value}"
+            logging.DEBUG, "Setting asynchronously list %s to %s", self.name(), value
         )
+        instrumentation = DeviceFactory().get_instrumentation()
+        errors = self._enable_available()
+        start = time.perf_counter()
         [
-            group.write_attribute_asynch(attr_name, value)
+            instrumentation.call(
+                self.name(), group.write_attribute_asynch, attr_name, value
+            )
             for attr_name, group in self._tango_groups.items()
         ]
+        self._forget_setpoints()
+        self._record_write(value, start)
+        if len(errors) > 0:
+            raise WriteFailedException(errors)
 
     def set_and_wait(self, value: float):
         """
@@ -111,13 +215,206 @@ class AttributeList(DeviceAccess, InitializableElement):
         ----------
         value : float
             Value to write.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the write guard rejects the value, nothing is written.
+        WriteFailedException
+            If devices are unavailable (circuit breaker open) or their writes
+            failed, the other ones are written.
         """
         self._ensure_initialized()
-        logger.log(logging.DEBUG, f"Setting list {self.name()} to {value}")
-        [
-            group.write_attribute(attr_name, value)
+        value = self._guard(value)
+        logger.log(logging.DEBUG, "Setting list %s to %s", self.name(), value)
+        instrumentation = DeviceFactory().get_instrumentation()
+        breaker = DeviceFactory().get_breaker()
+        errors = self._enable_available()
+        start = time.perf_counter()
+        for attr_name, group in self._tango_groups.items():
+            for reply in instrumentation.call(
+                self.name(), group.write_attribute, attr_name, value
+            ):
+                if reply.has_failed():
+                    df = tango.DevFailed(*reply.get_err_stack())
+                    breaker.record_failure(reply.dev_name, df)
+                    errors[reply.dev_name + "/" + attr_name] = tango_to_PyAMLException(
+                        df
+                    )
+                else:
+                    breaker.record_success(reply.dev_name)
+        self._forget_setpoints()
+        self._record_write(value, start)
+        if len(errors) > 0:
+            raise WriteFailedException(errors)
+
+    def _enable_available(self) -> dict[str, pyaml.PyAMLException]:
+        """
+        Disable in the groups the devices whose circuit breaker is open, group
+        calls skip them instead of waiting for their timeout, and enable the
+        others again. Return the errors of the skipped attributes.
+        """
+        breaker = DeviceFactory().get_breaker()
+        errors = {}
+        with self._groups_lock:
+            for attr_name, dev_list in self._attr_dev.items():
+                group = self._tango_groups[attr_name]
+                disabled = self._disabled[attr_name]
+                for dev in dev_list:
+                    if breaker.is_open(dev):
+                        errors[dev + "/" + attr_name] = breaker.rejected(dev)
+                        if dev not in disabled:
+                            group.disable(dev)
+                            disabled.add(dev)
+                    elif dev in disabled:
+                        group.enable(dev)
+                        disabled.discard(dev)
+        return errors
+
+    def _device_replies(self, attr_name: str, group_replies: list) -> list:
+        """
+        Return the data of the group replies in device order, None for failed
+        devices and devices skipped by the group. Failures and successes are
+        counted by the circuit breaker.
+        """
+        breaker = DeviceFactory().get_breaker()
+        dev_list = self._attr_dev[attr_name]
+        if len(group_replies) != len(dev_list):
+            by_device = {reply.dev_name: reply for reply in group_replies}
+            group_replies = [by_device.get(dev) for dev in dev_list]
+        data = []
+        for dev, reply in zip(dev_list, group_replies):
+            if reply is None:
+                data.append(None)
+            elif reply.has_failed():
+                breaker.record_failure(dev, tango.DevFailed(*reply.get_err_stack()))
+                data.append(None)
+            else:
+                breaker.record_success(dev)
+                data.append(reply.get_data())
+        return data
+
+    def _forget_setpoints(self):
+        # Group replies are not checked, the write dead-band of the attributes
+        # must not rely on these setpoints
+        cache = DeviceFactory().get_setpoint_cache()
+        if not cache.deadband_used:
+            return
+        if self._setpoint_slots is None:
+            self._setpoint_slots = cache.slots(self._cfg.attributes)
+        cache.update(self._setpoint_slots, np.nan)
+
+    def _record_write(self, value: float, start: float):
+        DeviceFactory().get_recorder().record_values(
+            self._reply_names,
+            np.full(len(self._reply_names), value),
+            None,
+            time.perf_counter() - start,
+            write=True,
+        )
+
+    def _record_read(self, setpoint: bool, start: float):
+        # Setpoints are recorded as written values
+        DeviceFactory().get_recorder().record_values(
+            self._reply_names,
+            self._values,
+            self._qualities,
+            time.perf_counter() - start,
+            write=setpoint,
+        )
+
+    def _store(
+        self, position: int, attr_value: tango.DeviceAttribute | None, setpoint: bool
+    ):
+        # Store a reply in the reply arrays, None for a failed read
+        if attr_value is None:
+            self._values[position] = np.nan
+            self._qualities[position] = INVALID_QUALITY
+            self._timestamps[position] = np.nan
+        else:
+            value = attr_value.w_value if setpoint else attr_value.value
+            self._values[position] = np.nan if value is None else value
+            self._qualities[position] = int(attr_value.quality)
+            self._timestamps[position] = attr_value.time.totime()
+
+    def _read_groups(self, setpoint: bool, result: Callable[[], array]) -> array:
+        """
+        Read all groups, fill the reply arrays (values, qualities and
+        timestamps, in group reply order) and return result() built from them.
+        """
+        instrumentation = DeviceFactory().get_instrumentation()
+        self._enable_available()
+        start = time.perf_counter()
+        replies = [
+            data
             for attr_name, group in self._tango_groups.items()
+            for data in self._device_replies(
+                attr_name,
+                instrumentation.call(self.name(), group.read_attribute, attr_name),
+            )
         ]
+        if len(replies) != len(self._values):
+            raise pyaml.PyAMLException(
+                f"Unexpected number of replies ({len(replies)}) for list {self.name()}"
+            )
+        return self._store_replies(replies, setpoint, start, result)
+
+    def _store_replies(
+        self,
+        replies: list,
+        setpoint: bool,
+        start: float,
+        result: Callable[[], array],
+    ) -> array:
+        # Concurrent reads must not mix their replies
+        with self._replies_lock:
+            for position, reply in enumerate(replies):
+                self._store(position, reply, setpoint)
+            self._record_read(setpoint, start)
+            return result()
+
+    def _asyncio_devices(self) -> list[tuple[str, tango.DeviceProxy, str]]:
+        # Device names, asyncio proxies and attribute names, in group reply order
+        return [
+            (dev, DeviceFactory().get_device(dev, tango.GreenMode.Asyncio), attr_name)
+            for attr_name, dev_list in self._attr_dev.items()
+            for dev in dev_list
+        ]
+
+    async def _adevice_call(self, dev_name: str, method, *args):
+        # Requests to unavailable devices fail immediately
+        factory = DeviceFactory()
+        breaker = factory.get_breaker()
+        breaker.check(dev_name)
+        try:
+            result = await factory.get_instrumentation().acall(dev_name, method, *args)
+        except tango.DevFailed as df:
+            breaker.record_failure(dev_name, df)
+            raise
+        breaker.record_success(dev_name)
+        return result
+
+    async def _aread_devices(
+        self, setpoint: bool, result: Callable[[], array]
+    ) -> array:
+        """
+        Asyncio version of _read_groups(), all devices are read concurrently.
+        """
+        self._ensure_initialized()
+        start = time.perf_counter()
+        replies = await asyncio.gather(
+            *[
+                self._adevice_call(dev_name, dev.read_attribute, attr_name)
+                for dev_name, dev, attr_name in self._asyncio_devices()
+            ],
+            return_exceptions=True,
+        )
+        for position, reply in enumerate(replies):
+            if isinstance(reply, (tango.DevFailed, pyaml.PyAMLException)):
+                replies[position] = None
+            elif isinstance(reply, BaseException):
+                raise reply
+        return self._store_replies(replies, setpoint, start, result)
 
     def get(self) -> array:
         """
@@ -129,51 +426,104 @@ class AttributeList(DeviceAccess, InitializableElement):
             Array of last written values ordered as in configuration.
         """
         self._ensure_initialized()
-        result = {}
-        grp_vals = [
-            group.read_attribute(attr_name)
-            for attr_name, group in self._tango_groups.items()
-        ]
-        for vals in grp_vals:
-            for val in vals:
-                attr_value = val.data
-                if attr_value is not None:
-                    result[val.dev_name + "/" + val.obj_name] = attr_value.w_value
-                else:
-                    result[val.dev_name + "/" + val.obj_name] = None
-        return array([result[attribute] for attribute in self._cfg.attributes])
+        return self._read_groups(True, self._setpoints_result)
 
     def readback(self) -> array:
         """
-        Return readback values with metadata for all attributes.
+        Return readback values for all attributes.
 
         Returns
         -------
         numpy.array
-            Array of Value objects ordered as in configuration.
+            Array of Value objects (including quality and timestamp) ordered
+            as in configuration, or array of float if float_values is set.
+            Failed reads give None (NaN for float values). Each call returns
+            a new array, concurrent calls are safe.
         """
         self._ensure_initialized()
-        logger.log(logging.DEBUG, f"Reading list {self.name()}")
-        result = {}
-        grp_vals = [
-            group.read_attribute(attr_name)
-            for attr_name, group in self._tango_groups.items()
-        ]
-        for vals in grp_vals:
-            for val in vals:
-                attr_value = val.data
-                if attr_value is not None:
-                    quality = Quality[
-                        attr_value.quality.name.rsplit("_", 1)[1]
-                    ]  # AttrQuality.ATTR_VALID gives Quality.VALID
-                    value = Value(
-                        attr_value.value, quality, attr_value.time.todatetime()
-                    )
-                    result[val.dev_name + "/" + val.obj_name] = value
-                else:
-                    result[val.dev_name + "/" + val.obj_name] = None
-        list_res = [result[attribute] for attribute in self._cfg.attributes]
-        return array(list_res)
+        logger.log(logging.DEBUG, "Reading list %s", self.name())
+        return self._read_groups(False, self._readback_result)
+
+    def _setpoints_result(self) -> array:
+        return self._values[self._reply_index]
+
+    def _readback_result(self) -> array:
+        if self._cfg.float_values:
+            return self._values[self._reply_index]
+
+        values = np.empty(len(self._reply_index), dtype=object)
+        for index, position in enumerate(self._reply_index):
+            if not np.isnan(self._timestamps[position]):
+                values[index] = Value(
+                    self._values[position],
+                    QUALITIES[self._qualities[position]],
+                    datetime.fromtimestamp(self._timestamps[position]),
+                )
+        return values
+
+    async def aget(self) -> array:
+        """Asyncio version of get()."""
+        return await self._aread_devices(True, self._setpoints_result)
+
+    async def areadback(self) -> array:
+        """Asyncio version of readback()."""
+        logger.log(logging.DEBUG, "Reading list %s", self.name())
+        return await self._aread_devices(False, self._readback_result)
+
+    async def aset(self, value: float):
+        """
+        Write a value to all Tango attributes (asyncio), the call returns
+        when all writes are done.
+        """
+        self._ensure_initialized()
+        value = self._guard(value)
+        logger.log(logging.DEBUG, "Setting list %s to %s", self.name(), value)
+        devices = self._asyncio_devices()
+        start = time.perf_counter()
+        replies = await asyncio.gather(
+            *[
+                self._adevice_call(dev_name, dev.write_attribute, attr_name, value)
+                for dev_name, dev, attr_name in devices
+            ],
+            return_exceptions=True,
+        )
+        errors = {}
+        for (dev_name, _, attr_name), reply in zip(devices, replies):
+            if isinstance(reply, tango.DevFailed):
+                errors[dev_name + "/" + attr_name] = tango_to_PyAMLException(reply)
+            elif isinstance(reply, pyaml.PyAMLException):
+                errors[dev_name + "/" + attr_name] = reply
+            elif isinstance(reply, BaseException):
+                raise reply
+        self._forget_setpoints()
+        self._record_write(value, start)
+        if len(errors) > 0:
+            raise WriteFailedException(errors)
+
+    async def aset_and_wait(self, value: float):
+        """Asyncio version of set_and_wait()."""
+        await self.aset(value)
+
+    def bulk_readback(self) -> np.ndarray:
+        """
+        Return readback values, qualities and timestamps of all attributes.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of READBACK_DTYPE ordered as in configuration,
+            with value (float64), quality (int8 tango.AttrQuality value) and
+            timestamp (float64 epoch seconds) fields.
+        """
+        self._ensure_initialized()
+        return self._read_groups(False, self._bulk_result)
+
+    def _bulk_result(self) -> np.ndarray:
+        result = np.empty(len(self._reply_index), dtype=READBACK_DTYPE)
+        result["value"] = self._values[self._reply_index]
+        result["quality"] = self._qualities[self._reply_index]
+        result["timestamp"] = self._timestamps[self._reply_index]
+        return result
 
     def unit(self) -> str:
         """
@@ -187,35 +537,69 @@ class AttributeList(DeviceAccess, InitializableElement):
         return self._cfg.unit
 
     def get_range(self) -> list[float]:
-        attr_range: list[float] = [None, None]
+        return to_range_list(self.get_range_array())
+
+    def get_range_array(self) -> np.ndarray:
+        """
+        Return the ranges of the attributes, resolved once from the
+        configuration or from the Tango attribute configurations (one call
+        per device, served by the configuration cache when enabled).
+
+        Returns
+        -------
+        numpy.array
+            Read-only (n, 2) float64 array of [min, max] rows in configuration
+            order, -inf or +inf when unbounded.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If an attribute configuration cannot be read.
+        """
+        if self._ranges is not None and not range_changed(
+            self._ranges_state, self._cfg.attributes
+        ):
+            return self._ranges
+        state = range_state(self._cfg.attributes)
         if self._cfg.range is not None:
-            attr_range[0] = (
-                self._cfg.range[0] if self._cfg.range[0] is not None else None
-            )
-            attr_range[1] = (
-                self._cfg.range[1] if self._cfg.range[1] is not None else None
-            )
+            limits = [self._cfg.range] * len(self._cfg.attributes)
         else:
-            self._ensure_initialized()
-            devices: list[tango.DeviceProxy] = []
-            [
-                devices.extend(group.get_device_list())
-                for group in self._tango_groups.values()
+            devices: dict[str, list[str]] = {}
+            for attribute in self._cfg.attributes:
+                device_name, attr_name = attribute.rsplit("/", 1)
+                devices.setdefault(device_name, []).append(attr_name)
+            configs = {}
+            for device_name, attr_names in devices.items():
+                dev_configs = DeviceFactory().get_attribute_configs(
+                    device_name, list(dict.fromkeys(attr_names))
+                )
+                for attr_name, config in dev_configs.items():
+                    if isinstance(config, pyaml.PyAMLException):
+                        raise config
+                    configs[device_name + "/" + attr_name] = config
+            limits = [
+                (
+                    to_float_or_none(configs[attribute].min_value),
+                    to_float_or_none(configs[attribute].max_value),
+                )
+                for attribute in self._cfg.attributes
             ]
-            attr_confs = [dev.get_attribute_config() for dev in devices]
-            attr_range: list[float] = []
-            for conf in attr_confs:
-                attr_range.append(to_float_or_none(conf.min_value))
-                attr_range.append(to_float_or_none(conf.max_value))
+        self._ranges = to_range_array(limits)
+        self._ranges_state = state
+        return self._ranges
 
-        return attr_range
+    def invalidate_range(self):
+        """
+        Drop the resolved ranges, they are resolved again on next access.
+        """
+        self._ranges = None
 
     def check_device_availability(self) -> bool:
         available = True
         try:
             self._ensure_initialized()
             [group.ping() for group in self._tango_groups.values()]
-        except tango.DevFailed | pyaml.PyAMLException:
+        except (tango.DevFailed, pyaml.PyAMLException):
             available = False
         return available
 
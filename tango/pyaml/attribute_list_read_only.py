@@ -34,6 +34,9 @@ class AttributeListReadOnly(AttributeList):
             f"Tango attribute list {self.name()} is not writable."
         )
 
+    async def aset(self, value: float):
+        self.set(value)
+
     def set_and_wait(self, value: float):
         """
         Write a value synchronously to all Tango attributes.
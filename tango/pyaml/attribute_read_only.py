@@ -49,3 +49,12 @@ class AttributeReadOnly(Attribute):
 
     def get(self) -> float:
         return self.readback().value
+
+    async def aset(self, value: float):
+        self.set(value)
+
+    async def aset_and_wait(self, value: float):
+        self.set_and_wait(value)
+
+    async def aget(self) -> float:
+        return (await self.areadback()).value
@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+import pyaml
+import tango
+
+logger = logging.getLogger(__name__)
+
+# Error reasons showing that a device cannot be reached
+CONNECTION_ERRORS = {
+    "API_CantConnectToDevice",
+    "API_CommunicationFailed",
+    "API_CorbaException",
+    "API_DeviceNotExported",
+    "API_DeviceTimedOut",
+    "API_ServerNotRunning",
+}
+
+
+def is_connection_error(df: tango.DevFailed) -> bool:
+    """Return True if a Tango error means that the device cannot be reached."""
+    return any(err.reason in CONNECTION_ERRORS for err in df.args)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker on device availability.
+
+    After a number of consecutive connection errors (or timeouts), the breaker
+    of a device opens: requests to the device fail immediately instead of
+    waiting for the device timeout. A background thread pings open devices
+    and closes their breaker as soon as they answer.
+
+    Parameters
+    ----------
+    ping : Callable[[str], None]
+        Pings a device, raises tango.DevFailed if it does not answer.
+    """
+
+    def __init__(self, ping: Callable[[str], None]):
+        self._ping = ping
+        self._lock = threading.Lock()
+        self._threshold: int = None
+        self._ping_period = 1.0
+        self._failures: dict[str, int] = {}
+        self._open: dict[str, float] = {}  # Opening time of open breakers
+        # Ping thread and its stop event, see stop()
+        self._thread: threading.Thread = None
+        self._stop = threading.Event()
+        self._nb_opened = 0
+        self._nb_closed = 0
+        self._nb_rejected = 0
+
+    def configure(self, threshold: int | None = None, ping_period_s: float = 1.0):
+        """
+        Set the breaker parameters.
+
+        Parameters
+        ----------
+        threshold : int, optional
+            Number of consecutive failures opening the breaker of a device.
+            The breaker is disabled if not specified.
+        ping_period_s : float
+            Period at which devices with an open breaker are pinged (in s).
+        """
+        if threshold is not None and threshold < 1:
+            raise pyaml.PyAMLException(
+                f"Invalid circuit breaker threshold: {threshold}"
+            )
+        with self._lock:
+            self._threshold = threshold
+            self._ping_period = ping_period_s
+            if threshold is None:
+                self._failures.clear()
+                self._open.clear()
+
+    def is_open(self, device_name: str) -> bool:
+        """Return True if requests to a device must fail immediately."""
+        return device_name in self._open
+
+    def check(self, device_name: str):
+        """
+        Raise if the breaker of a device is open.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the device is unavailable.
+        """
+        if device_name in self._open:
+            raise self.rejected(device_name)
+
+    def rejected(self, device_name: str) -> pyaml.PyAMLException:
+        """Count a request rejected by an open breaker and return its error."""
+        with self._lock:
+            self._nb_rejected += 1
+        return pyaml.PyAMLException(
+            f"Device {device_name} unavailable (circuit breaker open)"
+        )
+
+    def record_success(self, device_name: str):
+        """Reset the failure count of a device and close its breaker."""
+        if device_name in self._failures or device_name in self._open:
+            with self._lock:
+                self._failures.pop(device_name, None)
+                if self._open.pop(device_name, None) is not None:
+                    self._nb_closed += 1
+                    logger.log(
+                        logging.WARNING,
+                        "Device %s available again, circuit breaker closed",
+                        device_name,
+                    )
+
+    def record_failure(self, device_name: str, df: tango.DevFailed | None = None):
+        """
+        Count a failed request.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        df : tango.DevFailed, optional
+            Error of the request, None for a timeout. Errors which are not
+            connection errors (i.e. a rejected value) are not counted.
+        """
+        if self._threshold is None:
+            return
+        if df is not None and not is_connection_error(df):
+            return
+        with self._lock:
+            if device_name in self._open:
+                return
+            nb_failures = self._failures.get(device_name, 0) + 1
+            self._failures[device_name] = nb_failures
+            if nb_failures < self._threshold:
+                return
+            self._open[device_name] = time.monotonic()
+            self._nb_opened += 1
+            logger.log(
+                logging.WARNING,
+                "Device %s unavailable after %d failures, circuit breaker open",
+                device_name,
+                nb_failures,
+            )
+            if self._thread is None or not self._thread.is_alive():
+                # A new event, a stopped thread never runs again
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._ping_loop,
+                    args=(self._stop,),
+                    name="pyaml-circuit-breaker",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _ping_loop(self, stop: threading.Event):
+        while not stop.wait(self._ping_period):
+            with self._lock:
+                devices = list(self._open.keys())
+                if len(devices) == 0:
+                    self._thread = None
+                    return
+            for device_name in devices:
+                try:
+                    self._ping(device_name)
+                except tango.DevFailed:
+                    continue
+                with self._lock:
+                    if stop.is_set():
+                        return
+                self.record_success(device_name)
+
+    def stats(self) -> dict:
+        """
+        Return circuit breaker metrics.
+
+        Returns
+        -------
+        dict
+            open: names of the unavailable devices, nb_opened and nb_closed:
+            number of state changes, nb_rejected: number of requests failed
+            immediately.
+        """
+        with self._lock:
+            return {
+                "open": sorted(self._open.keys()),
+                "nb_opened": self._nb_opened,
+                "nb_closed": self._nb_closed,
+                "nb_rejected": self._nb_rejected,
+            }
+
+    def stop(self):
+        """
+        Stop the ping thread and wait for its end (i.e. at shutdown), open
+        breakers are no longer pinged.
+        """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def reset(self):
+        """Stop the ping thread, close all breakers and reset the metrics."""
+        self.stop()
+        with self._lock:
+            self._failures.clear()
+            self._open.clear()
+            self._nb_opened = 0
+            self._nb_closed = 0
+            self._nb_rejected = 0
@@ -0,0 +1,312 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+import tango
+
+logger = logging.getLogger(__name__)
+
+# Version of the cache file format
+FORMAT_VERSION: int = 1
+
+# Fields of tango.AttributeInfoEx kept by the cache, with their default
+_FIELDS: dict[str, object] = {
+    "writable": int(tango.AttrWriteType.READ),
+    "data_format": int(tango.AttrDataFormat.SCALAR),
+    "data_type": int(tango.CmdArgType.DevDouble),
+    "min_value": "Not specified",
+    "max_value": "Not specified",
+    "unit": "",
+    "format": "",
+    "max_dim_x": 1,
+    "max_dim_y": 0,
+}
+
+_ENUMS: dict[str, type] = {
+    "writable": tango.AttrWriteType,
+    "data_format": tango.AttrDataFormat,
+    "data_type": tango.CmdArgType,
+}
+
+
+def _host_and_name(device_name: str, default_host: str) -> tuple[str, str]:
+    # //host:port/domain/family/member -> (host:port, domain/family/member)
+    if device_name.startswith("//"):
+        host, name = device_name[2:].split("/", 1)
+        return host.lower(), name.lower()
+    return default_host.lower(), device_name.lower()
+
+
+class CachedAttributeConfig:
+    """
+    Attribute configuration served by the cache (tango.AttributeInfoEx
+    interface, limited to the cached fields).
+    """
+
+    def __init__(self, name: str, fields: dict, fetched: float):
+        self.name = name
+        self.fetched = fetched
+        self.update(fields, fetched)
+
+    def update(self, fields: dict, fetched: float):
+        for field, default in _FIELDS.items():
+            value = fields.get(field, default)
+            if field in _ENUMS:
+                value = _ENUMS[field].values[int(value)]
+            setattr(self, field, value)
+        self.fetched = fetched
+
+    @staticmethod
+    def fields_of(config) -> dict:
+        """Return the cached fields of a tango.AttributeInfoEx."""
+        fields = {}
+        for field, default in _FIELDS.items():
+            value = getattr(config, field, default)
+            fields[field] = int(value) if field in _ENUMS else value
+        return fields
+
+    def to_dict(self) -> dict:
+        fields = self.fields_of(self)
+        fields["name"] = self.name
+        fields["fetched"] = self.fetched
+        return fields
+
+
+class AttributeConfigCache:
+    """
+    Persistent cache of attribute configurations (writable type, range,
+    unit, format and dimensions), keyed by Tango host and attribute name.
+    Disabled by default.
+
+    Entries older than the time to live are still served and refreshed by a
+    background thread. The cache file is discarded if its version differs
+    from the configured one.
+
+    Parameters
+    ----------
+    fetch : Callable[[str, list[str]], list]
+        Returns the tango.AttributeInfoEx of attributes of a device.
+    """
+
+    def __init__(self, fetch: Callable[[str, list[str]], list]):
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        # Serializes file writes, a snapshot is never replaced by an older one
+        self._write_lock = threading.Lock()
+        self._path: str = None
+        self._ttl: float = None
+        self._version: str = None
+        self._tango_host = ""
+        self._entries: dict[str, CachedAttributeConfig] = {}
+        self._dirty = False
+        self._stale: dict[str, set[str]] = {}
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread = None
+        self._hits = 0
+        self._misses = 0
+        self._refreshed = 0
+        atexit.register(self.flush)
+
+    @property
+    def enabled(self) -> bool:
+        return self._path is not None
+
+    def configure(
+        self,
+        path: str | None = None,
+        ttl_s: float | None = None,
+        version: str | None = None,
+        tango_host: str | None = None,
+    ):
+        """
+        Enable the cache and load it, or disable it if path is None.
+
+        Parameters
+        ----------
+        path : str, optional
+            Path of the cache file (JSON).
+        ttl_s : float, optional
+            Age (in s) after which entries are refreshed in the background.
+            Never refreshed if not specified.
+        version : str, optional
+            Version of the cached configurations (i.e. of the lattice
+            database), entries of other versions are discarded.
+        tango_host : str, optional
+            Tango host of device names without host. Default is the
+            TANGO_HOST variable.
+        """
+        self.flush()
+        with self._lock:
+            self._path = path
+            self._ttl = ttl_s
+            self._version = version
+            self._tango_host = tango_host or os.environ.get("TANGO_HOST", "")
+            self._entries = {}
+            self._stale = {}
+            self._dirty = False
+            self._hits = self._misses = self._refreshed = 0
+        if path is not None:
+            self._load()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_loop, name="pyaml-config-cache", daemon=True
+                )
+                self._thread.start()
+
+    def _key(self, device_name: str, attr_name: str) -> str:
+        host, name = _host_and_name(device_name, self._tango_host)
+        return f"{host}/{name}/{attr_name.lower()}"
+
+    def _load(self):
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as ex:
+            logger.log(logging.WARNING, "Cannot load %s: %s", self._path, ex)
+            return
+        if data.get("format") != FORMAT_VERSION or data.get("version") != self._version:
+            logger.log(logging.INFO, "Discarding outdated cache %s", self._path)
+            self._dirty = True
+            return
+        with self._lock:
+            for key, entry in data.get("entries", {}).items():
+                self._entries[key] = CachedAttributeConfig(
+                    entry["name"], entry, entry.get("fetched", 0.0)
+                )
+
+    def lookup(self, device_name: str, attr_names: list[str]) -> dict:
+        """
+        Return the cached configurations of attributes of a device.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        attr_names : list[str]
+            Attribute names.
+
+        Returns
+        -------
+        dict[str, CachedAttributeConfig]
+            Configurations indexed by attribute name, missing attributes are
+            not cached.
+        """
+        if not self.enabled:
+            return {}
+        configs = {}
+        now = time.time()
+        with self._lock:
+            for attr_name in attr_names:
+                entry = self._entries.get(self._key(device_name, attr_name))
+                if entry is None:
+                    self._misses += 1
+                    continue
+                self._hits += 1
+                configs[attr_name] = entry
+                if self._ttl is not None and now - entry.fetched > self._ttl:
+                    self._stale.setdefault(device_name, set()).add(attr_name)
+        if len(self._stale) > 0:
+            self._wakeup.set()
+        return configs
+
+    def store(self, device_name: str, configs: dict):
+        """
+        Store configurations of attributes of a device.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        configs : dict[str, tango.AttributeInfoEx]
+            Configurations indexed by attribute name.
+        """
+        if not self.enabled or len(configs) == 0:
+            return
+        now = time.time()
+        with self._lock:
+            for attr_name, config in configs.items():
+                fields = CachedAttributeConfig.fields_of(config)
+                key = self._key(device_name, attr_name)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = CachedAttributeConfig(attr_name, fields, now)
+                else:
+                    # Attributes holding the entry see the new configuration
+                    entry.update(fields, now)
+            self._dirty = True
+        self._wakeup.set()
+
+    def refresh(self):
+        """Fetch the stale configurations now."""
+        with self._lock:
+            stale, self._stale = self._stale, {}
+        for device_name, attr_names in stale.items():
+            attr_names = sorted(attr_names)
+            try:
+                configs = self._fetch(device_name, attr_names)
+            except tango.DevFailed as df:
+                logger.log(
+                    logging.WARNING,
+                    "Cannot refresh the configuration of %s: %s",
+                    device_name,
+                    df.args[0].desc if len(df.args) > 0 else df,
+                )
+                continue
+            self.store(device_name, dict(zip(attr_names, configs)))
+            with self._lock:
+                self._refreshed += len(attr_names)
+
+    def flush(self):
+        """Write the cache file if it changed."""
+        with self._write_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self.enabled or not self._dirty:
+                return
+            data = {
+                "format": FORMAT_VERSION,
+                "version": self._version,
+                "entries": {
+                    key: entry.to_dict() for key, entry in self._entries.items()
+                },
+            }
+            self._dirty = False
+            path = self._path
+        # Atomic replacement, concurrent processes never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as ex:
+            logger.log(logging.WARNING, "Cannot write %s: %s", path, ex)
+
+    def _refresh_loop(self):
+        while True:
+            self._wakeup.wait(1.0)
+            self._wakeup.clear()
+            try:
+                self.refresh()
+                self.flush()
+            except Exception as ex:
+                logger.log(logging.WARNING, "Config cache refresh failed: %s", ex)
+
+    def stats(self) -> dict:
+        """
+        Return the number of entries, hits, misses and background refreshes.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshed": self._refreshed,
+            }
@@ -2,14 +2,45 @@ import logging
 import copy
 
 from pydantic import BaseModel
+from pyaml import PyAMLException
 from pyaml.control.controlsystem import ControlSystem
 from pyaml.control.deviceaccess import DeviceAccess
 from . import __version__
+from .attribute import Attribute
+from .device_factory import DeviceFactory
+from .device_policy import DevicePolicy
+from .initializer import initialize_attributes
+from .recording import Replay
+from .simulator import ConfigModel as SimulatorConfigModel, Simulator
+from .snapshot import RestoreResult, Snapshot, restore_snapshot, take_snapshot
+from .vector_attribute import VectorAttribute
+from .write_guard import WriteGuardMode
 
 PYAMLCLASS: str = "TangoControlSystem"
 
 logger = logging.getLogger(__name__)
 
+# Configuration fields applied to the DeviceFactory, shared by all control
+# systems of the process
+FACTORY_FIELDS: list[str] = [
+    "timeout_ms",
+    "device_policies",
+    "max_in_flight",
+    "max_in_flight_per_server",
+    "max_devices",
+    "device_idle_timeout_s",
+    "breaker_threshold",
+    "breaker_ping_period_s",
+    "instrumentation",
+    "config_cache",
+    "config_cache_ttl_s",
+    "config_cache_version",
+    "simulator",
+    "replay",
+    "replay_speed",
+    "recording",
+]
+
 
 class ConfigModel(BaseModel):
     """
@@ -26,9 +57,72 @@ class ConfigModel(BaseModel):
     scalar_aggregator : str
         Aggregator module for scalar values. If none specified, writings and readings of sclar value are serialized.
     vector_aggregator : str
-        Aggregator module for vecrors. If none specified, writings and readings of vector are serialized.
+        Aggregator module for vectors (SPECTRUM and IMAGE attributes). If none specified, writings and readings of vector are serialized.
+    lazy_devices : bool
+        If false, attached attributes are initialized in bulk at attach time
+        instead of on first access.
     timeout_ms : int
-        Device timeout in milli seconds.
+        Default device timeout in milli seconds.
+    device_policies : list[DevicePolicy]
+        Timeout and retry policies per device name pattern, the first matching
+        policy applies.
+    init_workers : int
+        Maximum number of devices initialized concurrently by bulk initialization.
+    max_in_flight : int, optional
+        Maximum number of asynchronous requests in flight. No limit if not specified.
+    max_in_flight_per_server : int, optional
+        Maximum number of asynchronous requests in flight per device server.
+        No limit if not specified.
+    max_devices : int, optional
+        Maximum number of device proxies kept by the device factory, least
+        recently used ones are released first. No limit if not specified.
+    device_idle_timeout_s : float, optional
+        Device proxies not used for this time (in s) are released by the
+        device factory. No limit if not specified.
+    breaker_threshold : int, optional
+        Number of consecutive connection errors or timeouts after which
+        requests to a device fail immediately, until the device answers a
+        ping again. Disabled if not specified.
+    breaker_ping_period_s : float
+        Period at which unavailable devices are pinged, in seconds.
+    instrumentation : bool
+        Record latency, error and data size metrics of all Tango calls
+        (see get_metrics() and export_prometheus()).
+    simulator : tango.pyaml.simulator.ConfigModel, optional
+        If specified, devices are served by an in-process simulator instead
+        of Tango.
+    recording : str, optional
+        Path of a binary log recording the values read and written through
+        Tango calls (see start_recording()).
+    replay : str, optional
+        Path of a recording. If specified, devices serve the recorded values
+        instead of Tango (ignored if a simulator is specified).
+    replay_speed : float
+        Replay speed, 2.0 replays the recording twice as fast.
+    config_cache : str, optional
+        Path of a persistent cache of attribute configurations, attributes
+        found in the cache are initialized without Tango calls.
+        Disabled if not specified.
+    config_cache_ttl_s : float, optional
+        Age (in s) after which cached configurations are refreshed in the
+        background. Default is 86400 (24 h), None to never refresh them.
+    config_cache_version : str, optional
+        Version of the cached configurations, the cache is discarded when
+        it changes.
+    events : bool
+        Default for attributes: serve get() and readback() from a value cache
+        fed by Tango events instead of synchronous reads.
+    event_type : str
+        Default Tango event type used for subscriptions (CHANGE_EVENT or PERIODIC_EVENT).
+    event_max_age_ms : int
+        Default maximum age of a cached value in milli seconds.
+    write_guard : str, optional
+        Default range check of written values (reject, clip or warn).
+        Disabled if not specified.
+    write_deadband : float, optional
+        Default write dead-band of scalar attributes: values differing by
+        less than this from the last commanded setpoint are not written.
+        Disabled if not specified.
     """
 
     name: str
@@ -36,25 +130,58 @@ class ConfigModel(BaseModel):
     debug_level: str = None
     lazy_devices: bool = True
     scalar_aggregator: str | None = "tango.pyaml.multi_attribute"
-    vector_aggregator: str | None = None
+    vector_aggregator: str | None = "tango.pyaml.multi_vector_attribute"
     timeout_ms: int = 3000
+    device_policies: list[DevicePolicy] = []
+    init_workers: int = 16
+    max_in_flight: int | None = None
+    max_in_flight_per_server: int | None = None
+    max_devices: int | None = None
+    device_idle_timeout_s: float | None = None
+    breaker_threshold: int | None = None
+    breaker_ping_period_s: float = 1.0
+    instrumentation: bool = False
+    simulator: SimulatorConfigModel | None = None
+    recording: str | None = None
+    replay: str | None = None
+    replay_speed: float = 1.0
+    config_cache: str | None = None
+    config_cache_ttl_s: float | None = 86400.0
+    config_cache_version: str | None = None
+    events: bool = False
+    event_type: str = "CHANGE_EVENT"
+    event_max_age_ms: int = 1000
+    write_guard: WriteGuardMode | None = None
+    write_deadband: float | None = None
 
 
 class TangoControlSystem(ControlSystem):
     """
     Tango-specific implementation of a Control System.
 
+    Device proxies, policies, limits and backend (FACTORY_FIELDS) are shared
+    by all control systems of the process: the last created control system
+    applies its values, a warning is logged when they differ from the ones
+    of the previous control system.
+
     Parameters
     ----------
     cfg : ConfigModel
         Configuration parameters including name, host and debug level.
     """
 
+    # Last control system that applied the shared settings
+    _instance: "TangoControlSystem" = None
+
     def __init__(self, cfg: ConfigModel):
         super().__init__()
         self._cfg = cfg
         self.__devices = {}  # Dict containing all attached DeviceAccess
 
+        self.__warn_overridden()
+        self.__configure_factory()
+        TangoControlSystem._instance = self
+
         if self._cfg.debug_level:
             log_level = getattr(logging, self._cfg.debug_level, logging.WARNING)
             logger.parent.setLevel(log_level)
@@ -66,6 +193,62 @@ class TangoControlSystem(ControlSystem):
             f" and TANGO_HOST={self._cfg.tango_host}",
         )
 
+    def __factory_settings(self) -> dict:
+        settings = {field: getattr(self._cfg, field) for field in FACTORY_FIELDS}
+        if self._cfg.config_cache is not None:
+            # Host of the cached configurations
+            settings["tango_host"] = self._cfg.tango_host
+        return settings
+
+    def __warn_overridden(self):
+        # Shared settings of the previous control system changed by this one
+        previous = TangoControlSystem._instance
+        if previous is None:
+            return
+        applied = previous.__factory_settings()
+        overridden = [
+            field
+            for field, value in self.__factory_settings().items()
+            if applied.get(field) != value
+        ]
+        if len(overridden) > 0:
+            logger.log(
+                logging.WARNING,
+                "Control system %s overrides the %s settings of control system %s, "
+                "these settings are shared by all control systems of the process",
+                self._cfg.name,
+                ", ".join(overridden),
+                previous.name(),
+            )
+
+    def __configure_factory(self):
+        DeviceFactory().set_timeout_ms(self._cfg.timeout_ms)
+        DeviceFactory().set_policies(self._cfg.device_policies)
+        DeviceFactory().get_scheduler().set_limits(
+            self._cfg.max_in_flight, self._cfg.max_in_flight_per_server
+        )
+        DeviceFactory().set_eviction_policy(
+            self._cfg.max_devices, self._cfg.device_idle_timeout_s
+        )
+        DeviceFactory().get_breaker().configure(
+            self._cfg.breaker_threshold, self._cfg.breaker_ping_period_s
+        )
+        DeviceFactory().get_instrumentation().enable(self._cfg.instrumentation)
+        DeviceFactory().get_config_cache().configure(
+            self._cfg.config_cache,
+            self._cfg.config_cache_ttl_s,
+            self._cfg.config_cache_version,
+            self._cfg.tango_host,
+        )
+        if self._cfg.simulator is not None:
+            DeviceFactory().set_backend(Simulator(self._cfg.simulator))
+        elif self._cfg.replay is not None:
+            DeviceFactory().set_backend(
+                Replay(self._cfg.replay, self._cfg.replay_speed)
+            )
+        if self._cfg.recording is not None:
+            self.start_recording(self._cfg.recording)
+
     def __newref(self, obj, new_name: str):
         # Shallow copy the object
         newObj = copy.copy(obj)
@@ -73,8 +256,21 @@ class TangoControlSystem(ControlSystem):
         # to allow a new attribute name
         newObj._cfg = copy.copy(obj._cfg)
         newObj._cfg.attribute = new_name
+        self.__apply_defaults(newObj._cfg)
         return newObj
 
+    def __apply_defaults(self, cfg: BaseModel):
+        # Fields left unset in the device configuration inherit the control system value
+        for field in [
+            "events",
+            "event_type",
+            "event_max_age_ms",
+            "write_guard",
+            "write_deadband",
+        ]:
+            if field in type(cfg).model_fields and getattr(cfg, field) is None:
+                setattr(cfg, field, getattr(self._cfg, field))
+
     def attach_array(self, devs: list[DeviceAccess]) -> list[DeviceAccess]:
         return self._attach(devs)
 
@@ -95,8 +291,201 @@ class TangoControlSystem(ControlSystem):
                 newDevs.append(self.__devices[full_name])
             else:
                 newDevs.append(None)
+        if not self._cfg.lazy_devices:
+            initialize_attributes(
+                [d for d in newDevs if isinstance(d, Attribute)],
+                self._cfg.init_workers,
+            )
         return newDevs
 
+    def initialize_devices(self) -> dict[str, PyAMLException]:
+        """
+        Initialize all attached attributes in parallel.
+
+        Device proxies are created concurrently and attribute configurations
+        are fetched with one call per device.
+
+        Returns
+        -------
+        dict[str, PyAMLException]
+            Errors indexed by attribute name, empty if all attributes are initialized.
+        """
+        attributes = [d for d in self.__devices.values() if isinstance(d, Attribute)]
+        return initialize_attributes(attributes, self._cfg.init_workers)
+
+    def get_scheduler_stats(self) -> dict:
+        """
+        Return the metrics of the asynchronous request scheduler (queue depth,
+        requests in flight and time spent in queue).
+
+        Returns
+        -------
+        dict
+            Scheduler metrics.
+        """
+        return DeviceFactory().get_scheduler().stats()
+
+    def get_device_pool_stats(self) -> dict:
+        """
+        Return the metrics of the device proxy pool (size, hits, misses,
+        evictions and proxy creation latency).
+
+        Returns
+        -------
+        dict
+            Device pool metrics.
+        """
+        return DeviceFactory().stats()
+
+    def get_breaker_stats(self) -> dict:
+        """
+        Return the circuit breaker metrics (unavailable devices, number of
+        state changes and of requests failed immediately).
+
+        Returns
+        -------
+        dict
+            Circuit breaker metrics.
+        """
+        return DeviceFactory().get_breaker().stats()
+
+    def get_metrics(self) -> dict:
+        """
+        Return a snapshot of all metrics.
+
+        Returns
+        -------
+        dict
+            calls: latency histograms, counts, errors and data sizes of the
+            Tango calls indexed by device and operation (empty if the
+            instrumentation is disabled), scheduler, device_pool and breaker:
+            see get_scheduler_stats(), get_device_pool_stats() and
+            get_breaker_stats().
+        """
+        return {
+            "calls": DeviceFactory().get_instrumentation().snapshot(),
+            "scheduler": self.get_scheduler_stats(),
+            "device_pool": self.get_device_pool_stats(),
+            "breaker": self.get_breaker_stats(),
+        }
+
+    def export_prometheus(self) -> str:
+        """
+        Return the metrics of the Tango calls in Prometheus text format.
+
+        Returns
+        -------
+        str
+            Latency histograms, error and data size counters.
+        """
+        return DeviceFactory().get_instrumentation().to_prometheus()
+
+    def _snapshot_attributes(self) -> dict[str, Attribute]:
+        # Attached writable scalar attributes
+        return {
+            name: d
+            for name, d in self.__devices.items()
+            if isinstance(d, Attribute)
+            and not isinstance(d, VectorAttribute)
+            and d.is_writable()
+        }
+
+    def snapshot(
+        self, path: str | None = None, timeout_ms: int | None = None
+    ) -> Snapshot:
+        """
+        Read the setpoints of all attached writable attributes, with one
+        asynchronous request per device.
+
+        Parameters
+        ----------
+        path : str, optional
+            If specified, the snapshot is saved in this NPZ file.
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+
+        Returns
+        -------
+        Snapshot
+            Setpoints, readbacks, qualities and timestamps indexed by attribute
+            name. Attributes that could not be read have a NaN setpoint.
+        """
+        snapshot = take_snapshot(
+            self._snapshot_attributes(), timeout_ms, self._cfg.init_workers
+        )
+        if path is not None:
+            snapshot.save(path)
+        return snapshot
+
+    def restore(
+        self,
+        snapshot: Snapshot | str,
+        batch_size: int = 500,
+        max_writes_per_s: float | None = None,
+        timeout_ms: int | None = None,
+        verify: bool = True,
+        tolerance: float | None = None,
+    ) -> RestoreResult:
+        """
+        Write the setpoints of a snapshot by batches of concurrent
+        asynchronous requests (one per device), then verify them.
+
+        Parameters
+        ----------
+        snapshot : Snapshot or str
+            Snapshot or path of a snapshot file.
+        batch_size : int
+            Number of attributes written per batch.
+        max_writes_per_s : float, optional
+            Maximum write rate, in attributes per second. No limit if not
+            specified.
+        timeout_ms : int, optional
+            Time allowed for each batch, in milli seconds.
+            Default is the timeout and retry policy of each device.
+        verify : bool
+            Read back the setpoints after the restore and report mismatches.
+        tolerance : float, optional
+            Absolute tolerance of the verification. Default is numpy.isclose().
+
+        Returns
+        -------
+        RestoreResult
+            Number of writes, errors and mismatches.
+        """
+        if isinstance(snapshot, str):
+            snapshot = Snapshot.load(snapshot)
+        return restore_snapshot(
+            snapshot,
+            self._snapshot_attributes(),
+            batch_size,
+            max_writes_per_s,
+            timeout_ms,
+            verify,
+            tolerance,
+            self._cfg.init_workers,
+        )
+
+    def start_recording(self, path: str):
+        """
+        Record the values read and written through Tango calls (Attribute,
+        AttributeList and MultiAttribute) into an append-only binary log,
+        written by a background thread. Replay it with
+        tango.pyaml.recording.Replay.
+
+        Parameters
+        ----------
+        path : str
+            Path of the binary log, attribute names are stored in <path>.names.
+        """
+        DeviceFactory().get_recorder().start(path)
+
+    def stop_recording(self):
+        """
+        Stop the recording, pending records are written before returning.
+        """
+        DeviceFactory().get_recorder().stop()
+
     def name(self) -> str:
         """
         Return the name of the control system.
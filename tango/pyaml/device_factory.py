@@ -1,7 +1,23 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
-from collections import defaultdict
+
+import pyaml
 import tango
 
+from .asynch_calls import AsynchScheduler
+from .circuit_breaker import CircuitBreaker
+from .config_cache import AttributeConfigCache
+from .device_policy import DevicePolicy
+from .instrumentation import Instrumentation
+from .recording import Recorder
+from .setpoint_cache import SetpointCache
+from .tango_pyaml_utils import tango_to_PyAMLException
+
+# Minimum period between two idle device scans (in s)
+IDLE_SCAN_PERIOD: float = 1.0
+
 
 class DeviceFactory:
     """Singleton factory to build PyAML elements with future compatibility logic."""
@@ -16,22 +32,424 @@ class DeviceFactory:
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
-                cls._instance._elements = defaultdict()
+                cls._instance._elements = OrderedDict()  # In LRU order
+                cls._instance._last_used = {}
+                cls._instance._pool_lock = Lock()
+                cls._instance._key_locks = {}
+                cls._instance._max_devices = None
+                cls._instance._idle_timeout = None
+                cls._instance._last_idle_scan = 0.0
                 cls._instance._timeout = 3000  # in ms
+                cls._instance._servers = {}
+                cls._instance._backend = None
+                cls._instance._policies = []
+                cls._instance._resolved_policies = {}
+                cls._instance._breaker = CircuitBreaker(cls._instance._ping)
+                cls._instance._instrumentation = Instrumentation()
+                cls._instance._recorder = Recorder()
+                cls._instance._setpoint_cache = SetpointCache()
+                cls._instance._config_cache = AttributeConfigCache(
+                    cls._instance._fetch_configs
+                )
+                cls._instance._scheduler = AsynchScheduler(
+                    cls._instance.get_server_name,
+                    cls._instance.get_policy,
+                    cls._instance._breaker,
+                    cls._instance._instrumentation,
+                    cls._instance._recorder,
+                )
+                cls._instance.reset_stats()
             return cls._instance
 
     def set_timeout_ms(self, timeout: int):
         self._timeout = timeout
+        self._update_policies()
 
     def get_timeout_ms(self) -> int:
         return self._timeout
 
-    def get_device(self, device_name: str) -> tango.DeviceProxy:
-        if device_name not in self._elements:
-            dp = tango.DeviceProxy(device_name)
-            dp.set_timeout_millis(self._timeout)
-            self._elements[device_name] = dp
-        return self._elements[device_name]
+    def set_policies(self, policies: list[DevicePolicy]):
+        """
+        Set the per-device timeout and retry policies. The first policy matching
+        a device name applies, devices matching no policy use the default timeout
+        and are not retried. Timeouts of existing proxies are updated.
+
+        Parameters
+        ----------
+        policies : list[DevicePolicy]
+            Policies, ordered by priority.
+        """
+        self._policies = list(policies)
+        self._update_policies()
+
+    def get_policy(self, device_name: str) -> DevicePolicy:
+        """
+        Return the policy applied to a device, with its timeout resolved.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        """
+        policy = self._resolved_policies.get(device_name)
+        if policy is None:
+            policy = next(
+                (p for p in self._policies if p.matches(device_name)),
+                DevicePolicy(pattern="*"),
+            )
+            if policy.timeout_ms is None:
+                policy = policy.model_copy(update={"timeout_ms": self._timeout})
+            self._resolved_policies[device_name] = policy
+        return policy
+
+    def _update_policies(self):
+        self._resolved_policies = {}
+        with self._pool_lock:
+            proxies = list(self._elements.items())
+        for key, dp in proxies:
+            device_name = key if isinstance(key, str) else key[0]
+            dp.set_timeout_millis(self.get_policy(device_name).timeout_ms)
+
+    def set_eviction_policy(
+        self, max_devices: int | None = None, idle_timeout_s: float | None = None
+    ):
+        """
+        Set the eviction policy of the device proxy pool. Evicted proxies are
+        only released by the factory, elements already holding them keep working.
+
+        Parameters
+        ----------
+        max_devices : int, optional
+            Maximum number of cached proxies, least recently used ones are
+            evicted first. No limit if not specified.
+        idle_timeout_s : float, optional
+            Proxies not requested for this time (in s) are evicted.
+            No limit if not specified.
+        """
+        with self._pool_lock:
+            self._max_devices = max_devices
+            self._idle_timeout = idle_timeout_s
+            self._evict(time.monotonic())
+
+    def get_device(
+        self, device_name: str, green_mode: tango.GreenMode = None
+    ) -> tango.DeviceProxy:
+        """
+        Return the device proxy of a device, created on first call.
+        Concurrent calls for the same device create a single proxy.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        green_mode : tango.GreenMode, optional
+            Green mode of the proxy (i.e. tango.GreenMode.Asyncio for awaitable
+            calls). Proxies of different green modes are cached separately.
+            Default is synchronous.
+        """
+        key = device_name if green_mode is None else (device_name, green_mode)
+        dp = self._lookup(key)
+        if dp is not None:
+            return dp
+
+        with self._pool_lock:
+            key_lock = self._key_locks.setdefault(key, Lock())
+        with key_lock:
+            # Another thread may have created it meanwhile
+            dp = self._lookup(key)
+            if dp is not None:
+                return dp
+            try:
+                start = time.monotonic()
+                if self._backend is not None:
+                    dp = self._backend.device_proxy(device_name, green_mode)
+                elif green_mode is None:
+                    dp = tango.DeviceProxy(device_name)
+                else:
+                    dp = tango.DeviceProxy(device_name, green_mode=green_mode)
+                dp.set_timeout_millis(self.get_policy(device_name).timeout_ms)
+                creation_time = time.monotonic() - start
+            except BaseException:
+                with self._pool_lock:
+                    self._misses += 1
+                    self._key_locks.pop(key, None)
+                raise
+
+            with self._pool_lock:
+                # The proxy is cached before the key lock is released, a thread
+                # arriving meanwhile either finds the proxy or waits for the lock
+                now = time.monotonic()
+                self._elements[key] = dp
+                self._last_used[key] = now
+                self._key_locks.pop(key, None)
+                self._misses += 1
+                self._nb_created += 1
+                self._total_creation_time += creation_time
+                self._max_creation_time = max(self._max_creation_time, creation_time)
+                self._evict(now)
+        return dp
+
+    def set_backend(self, backend=None):
+        """
+        Serve device proxies and groups from another backend than Tango
+        (i.e. tango.pyaml.simulator.Simulator or tango.pyaml.recording.Replay).
+        Cached proxies are released.
+
+        Parameters
+        ----------
+        backend : optional
+            Object providing device_proxy(device_name, green_mode) and
+            group(name). None for Tango.
+        """
+        self._backend = backend
+        self.clear()
+
+    def get_backend(self):
+        return self._backend
+
+    def create_group(self, name: str) -> tango.Group:
+        """
+        Return a new group from the current backend.
+
+        Parameters
+        ----------
+        name : str
+            Name of the group.
+        """
+        if self._backend is not None:
+            return self._backend.group(name)
+        return tango.Group(name)
+
+    def _lookup(self, key) -> tango.DeviceProxy | None:
+        with self._pool_lock:
+            now = time.monotonic()
+            if (
+                self._idle_timeout is not None
+                and now - self._last_idle_scan > IDLE_SCAN_PERIOD
+            ):
+                self._evict(now)
+            dp = self._elements.get(key)
+            if dp is not None:
+                self._hits += 1
+                self._elements.move_to_end(key)
+                self._last_used[key] = now
+            return dp
+
+    def _evict(self, now: float):
+        # Must be called with the pool lock held
+        if self._idle_timeout is not None:
+            self._last_idle_scan = now
+            # Least recently used proxies come first
+            while len(self._elements) > 0:
+                key = next(iter(self._elements))
+                if now - self._last_used[key] <= self._idle_timeout:
+                    break
+                self._remove(key)
+        if self._max_devices is not None:
+            while len(self._elements) > self._max_devices:
+                self._remove(next(iter(self._elements)))
+
+    def _remove(self, key):
+        del self._elements[key]
+        del self._last_used[key]
+        self._nb_evicted += 1
+
+    def warmup(
+        self, device_names: list[str], max_workers: int = 16
+    ) -> dict[str, pyaml.PyAMLException]:
+        """
+        Create the proxies of several devices in parallel.
+
+        Parameters
+        ----------
+        device_names : list[str]
+            Names of the devices.
+        max_workers : int
+            Maximum number of proxies created concurrently.
+
+        Returns
+        -------
+        dict[str, pyaml.PyAMLException]
+            Errors indexed by device name, empty if all proxies are created.
+        """
+
+        def create(device_name: str) -> pyaml.PyAMLException | None:
+            try:
+                self.get_device(device_name)
+            except tango.DevFailed as df:
+                return tango_to_PyAMLException(df)
+            return None
+
+        device_names = list(dict.fromkeys(device_names))
+        if len(device_names) == 0:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(device_names))) as ex:
+            errors = ex.map(create, device_names)
+        return {
+            name: error
+            for name, error in zip(device_names, errors)
+            if error is not None
+        }
+
+    def stats(self) -> dict:
+        """
+        Return device proxy pool metrics.
+
+        Returns
+        -------
+        dict
+            size: number of cached proxies, hits and misses: cache lookups,
+            created and evicted: number of proxies, mean_creation_s and
+            max_creation_s: proxy creation latency.
+        """
+        with self._pool_lock:
+            return {
+                "size": len(self._elements),
+                "hits": self._hits,
+                "misses": self._misses,
+                "created": self._nb_created,
+                "evicted": self._nb_evicted,
+                "mean_creation_s": self._total_creation_time / self._nb_created
+                if self._nb_created > 0
+                else 0.0,
+                "max_creation_s": self._max_creation_time,
+            }
+
+    def reset_stats(self):
+        self._hits = 0
+        self._misses = 0
+        self._nb_created = 0
+        self._nb_evicted = 0
+        self._total_creation_time = 0.0
+        self._max_creation_time = 0.0
+
+    def get_server_name(self, device_name: str) -> str:
+        """
+        Return the name of the device server running a device (i.e. 'TangoTest/test').
+        The device name is returned if the server cannot be found. The server
+        is resolved once per device, concurrent calls wait for the first one.
+        """
+        key = ("server", device_name)
+        with self._pool_lock:
+            server = self._servers.get(device_name)
+            if server is not None:
+                return server
+            key_lock = self._key_locks.setdefault(key, Lock())
+        with key_lock:
+            with self._pool_lock:
+                server = self._servers.get(device_name)
+            if server is not None:
+                return server
+            try:
+                server = self.get_device(device_name).info().server_id
+            except tango.DevFailed:
+                server = device_name
+            except BaseException:
+                with self._pool_lock:
+                    self._key_locks.pop(key, None)
+                raise
+            with self._pool_lock:
+                self._servers[device_name] = server
+                self._key_locks.pop(key, None)
+        return server
+
+    def _ping(self, device_name: str):
+        self.get_device(device_name).ping()
+
+    def get_breaker(self) -> CircuitBreaker:
+        """
+        Return the circuit breaker tracking device availability.
+        """
+        return self._breaker
+
+    def get_instrumentation(self) -> Instrumentation:
+        """
+        Return the metrics recorder of the Tango calls.
+        """
+        return self._instrumentation
+
+    def get_recorder(self) -> Recorder:
+        """
+        Return the recorder of the values read and written by Tango calls.
+        """
+        return self._recorder
+
+    def get_setpoint_cache(self) -> SetpointCache:
+        """
+        Return the last commanded setpoints, used by the write dead-band.
+        """
+        return self._setpoint_cache
+
+    def get_config_cache(self) -> AttributeConfigCache:
+        """
+        Return the persistent cache of attribute configurations.
+        """
+        return self._config_cache
+
+    def _fetch_configs(self, device_name: str, attr_names: list[str]) -> list:
+        return self.get_device(device_name).get_attribute_config(attr_names)
+
+    def get_attribute_configs(
+        self,
+        device_name: str,
+        attr_names: list[str],
+        device: tango.DeviceProxy = None,
+    ) -> dict[str, tango.AttributeInfoEx | pyaml.PyAMLException]:
+        """
+        Return the configurations of attributes of a device, from the
+        configuration cache when enabled. Missing configurations are fetched
+        with a single call, failing attributes are isolated.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        attr_names : list[str]
+            Attribute names.
+        device : tango.DeviceProxy, optional
+            Proxy of the device, from the pool if not specified.
+
+        Returns
+        -------
+        dict[str, tango.AttributeInfoEx | pyaml.PyAMLException]
+            Configurations or errors, indexed by attribute name.
+        """
+        configs = self._config_cache.lookup(device_name, attr_names)
+        missing = [name for name in attr_names if name not in configs]
+        if len(missing) == 0:
+            return configs
+
+        if device is None:
+            try:
+                device = self.get_device(device_name)
+            except tango.DevFailed as df:
+                ex = tango_to_PyAMLException(df)
+                configs.update({name: ex for name in missing})
+                return configs
+        fetched = {}
+        try:
+            # One round-trip for all attributes of the device
+            fetched = dict(zip(missing, device.get_attribute_config(missing)))
+        except tango.DevFailed:
+            # At least one attribute is wrong, isolate it
+            for attr_name in missing:
+                try:
+                    fetched[attr_name] = device.get_attribute_config(attr_name)
+                except tango.DevFailed as df:
+                    configs[attr_name] = tango_to_PyAMLException(df)
+        self._config_cache.store(device_name, fetched)
+        configs.update(fetched)
+        return configs
+
+    def get_scheduler(self) -> AsynchScheduler:
+        """
+        Return the scheduler used to send asynchronous requests.
+        """
+        return self._scheduler
 
     def clear(self):
-        self._elements.clear()
+        with self._pool_lock:
+            self._elements.clear()
+            self._last_used.clear()
+            self._servers.clear()
+        self._resolved_policies = {}
@@ -0,0 +1,58 @@
+import fnmatch
+import re
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DevicePolicy(BaseModel):
+    """
+    Timeout and retry policy applied to the devices matching a name pattern.
+
+    Attributes
+    ----------
+    pattern : str
+        Device name pattern (e.g., 'sr/ps-*/*'), case insensitive. The tango
+        host prefix of the device name is ignored.
+    regex : bool
+        If true, pattern is a regular expression instead of a glob.
+    timeout_ms : int, optional
+        Device timeout in milli seconds. Default is the control system timeout.
+    retries : int
+        Number of times a failed or timed out asynchronous read is sent again.
+        Writes are never sent again, they may have been applied.
+    backoff_ms : int
+        Delay before the first retry in milli seconds, doubled on each retry.
+    """
+
+    pattern: str
+    regex: bool = False
+    timeout_ms: Optional[int] = None
+    retries: int = 0
+    backoff_ms: int = 0
+
+    def matches(self, device_name: str) -> bool:
+        """
+        Return True if the policy applies to a device.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device, optionally prefixed by '//tango_host/'.
+        """
+        if device_name.startswith("//"):
+            device_name = device_name[2:].split("/", 1)[-1]
+        if self.regex:
+            return re.fullmatch(self.pattern, device_name, re.IGNORECASE) is not None
+        return fnmatch.fnmatchcase(device_name.lower(), self.pattern.lower())
+
+    def retry_delay(self, attempt: int) -> float:
+        """
+        Return the delay before a retry, in seconds.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of the retry, starting at 1.
+        """
+        return self.backoff_ms * 2 ** (attempt - 1) / 1000.0
@@ -0,0 +1,84 @@
+import logging
+import time
+from threading import Lock
+
+import tango
+
+logger = logging.getLogger(__name__)
+
+
+class EventCache:
+    """
+    Last value cache of a Tango attribute fed by change or periodic events.
+
+    Parameters
+    ----------
+    max_age_ms : float
+        Maximum age of the cached value in milli seconds. Older values are
+        considered stale and are not served.
+    """
+
+    def __init__(self, max_age_ms: float):
+        self._lock = Lock()
+        self._max_age = max_age_ms / 1000.0
+        self._value: tango.DeviceAttribute = None
+        self._received: float = 0.0
+        self._device: tango.DeviceProxy = None
+        self._event_id: int = None
+
+    def subscribe(
+        self, device: tango.DeviceProxy, attr_name: str, event_type: tango.EventType
+    ):
+        """
+        Subscribe to the events of an attribute.
+
+        Raises
+        ------
+        tango.DevFailed
+            If the subscription is refused by the device.
+        """
+        self._event_id = device.subscribe_event(attr_name, event_type, self.push_event)
+        self._device = device
+
+    def unsubscribe(self):
+        if self._event_id is not None:
+            try:
+                self._device.unsubscribe_event(self._event_id)
+            except tango.DevFailed:
+                logger.warning("Cannot unsubscribe event %s", self._event_id)
+            self._event_id = None
+        self.invalidate()
+
+    def is_subscribed(self) -> bool:
+        return self._event_id is not None
+
+    def push_event(self, event: tango.EventData):
+        """Callback invoked by Tango for each received event."""
+        with self._lock:
+            if event.err or event.attr_value is None:
+                # An error event means the last value cannot be trusted anymore
+                self._value = None
+            else:
+                self._value = event.attr_value
+                self._received = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+    def last_value(self) -> tango.DeviceAttribute | None:
+        """
+        Return the last received value or None if nothing valid is cached.
+
+        Returns
+        -------
+        tango.DeviceAttribute
+            Last received attribute value, None if no value was received
+            or if the value is older than the maximum age.
+        """
+        with self._lock:
+            if self._value is None:
+                return None
+            if time.monotonic() - self._received > self._max_age:
+                return None
+            return self._value
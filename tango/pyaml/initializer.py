@@ -0,0 +1,81 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pyaml
+import tango
+
+from .attribute import Attribute
+from .device_factory import DeviceFactory
+from .tango_pyaml_utils import tango_to_PyAMLException
+
+logger = logging.getLogger(__name__)
+
+
+def _initialize_device(
+    device_name: str, attributes: list[Attribute]
+) -> dict[str, pyaml.PyAMLException]:
+    failures = {}
+    try:
+        device = DeviceFactory().get_device(device_name)
+    except tango.DevFailed as df:
+        ex = tango_to_PyAMLException(df)
+        return {attr.name(): ex for attr in attributes}
+
+    attr_names = list(dict.fromkeys([attr.measure_name() for attr in attributes]))
+    configs = DeviceFactory().get_attribute_configs(device_name, attr_names, device)
+    for attr in attributes:
+        config = configs[attr.measure_name()]
+        if isinstance(config, pyaml.PyAMLException):
+            failures[attr.name()] = config
+            continue
+        try:
+            attr._initialize_from(device, config)
+        except pyaml.PyAMLException as ex:
+            failures[attr.name()] = ex
+    return failures
+
+
+def initialize_attributes(
+    attributes: list[Attribute], max_workers: int = 16
+) -> dict[str, pyaml.PyAMLException]:
+    """
+    Initialize a list of attributes in parallel.
+
+    Attributes are grouped by device, device proxies are created concurrently
+    and the configurations of all attributes of a device are fetched with a
+    single call. Already initialized attributes are skipped.
+
+    Parameters
+    ----------
+    attributes : list[Attribute]
+        Attributes to initialize.
+    max_workers : int
+        Maximum number of devices initialized at the same time.
+
+    Returns
+    -------
+    dict[str, pyaml.PyAMLException]
+        Errors indexed by attribute name, empty if all attributes are initialized.
+        Failed attributes stay uninitialized and will be retried on first access.
+    """
+    devices: dict[str, list[Attribute]] = {}
+    for attr in attributes:
+        if not attr.is_initialized():
+            device_name = attr.name().rsplit("/", 1)[0]
+            devices.setdefault(device_name, []).append(attr)
+
+    failures = {}
+    if len(devices) == 0:
+        return failures
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(devices))) as executor:
+        for dev_failures in executor.map(
+            _initialize_device, devices.keys(), devices.values()
+        ):
+            failures.update(dev_failures)
+    # Next processes start from the fetched configurations
+    DeviceFactory().get_config_cache().flush()
+
+    for name, ex in failures.items():
+        logger.log(logging.WARNING, "Cannot initialize %s: %s", name, ex)
+    return failures
@@ -0,0 +1,235 @@
+import bisect
+import time
+from threading import Lock
+from typing import Any, Callable
+
+import numpy as np
+import tango
+
+# Upper bounds of the latency histogram buckets (in s)
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def payload_size(obj: Any) -> int:
+    """
+    Return the approximate size in bytes of the data of a Tango call
+    (attribute values, written values or lists of them).
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    if isinstance(obj, (list, tuple)):
+        return sum(payload_size(item) for item in obj)
+    if hasattr(obj, "get_data"):
+        # Group reply
+        return 0 if obj.has_failed() else payload_size(obj.get_data())
+    if hasattr(obj, "value"):
+        # Device attribute
+        return payload_size(obj.value)
+    return 8
+
+
+class _Series:
+    """Metrics of one operation on one device."""
+
+    __slots__ = ("buckets", "count", "errors", "total_s", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last one is +Inf
+        self.count = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.bytes = 0
+
+
+class Instrumentation:
+    """
+    Latency, throughput and error metrics of the Tango calls, per device and
+    per operation. Disabled by default, calls are then forwarded with a single
+    flag check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = Lock()
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def record(
+        self,
+        device_name: str,
+        operation: str,
+        duration_s: float,
+        error: bool = False,
+        nbytes: int = 0,
+    ):
+        """
+        Record a call.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device (or of the group).
+        operation : str
+            Name of the operation (i.e. 'read_attribute').
+        duration_s : float
+            Duration of the call, in seconds.
+        error : bool
+            True if the call failed.
+        nbytes : int
+            Size of the data sent and received.
+        """
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(LATENCY_BUCKETS, duration_s)
+        with self._lock:
+            series = self._series.get((device_name, operation))
+            if series is None:
+                series = self._series[(device_name, operation)] = _Series()
+            series.buckets[index] += 1
+            series.count += 1
+            series.total_s += duration_s
+            series.bytes += nbytes
+            if error:
+                series.errors += 1
+
+    def call(self, device_name: str, method: Callable, *args) -> Any:
+        """
+        Call a Tango method and record it.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device (or of the group).
+        method : Callable
+            Bound method of the device proxy (or of the group).
+        *args
+            Arguments of the method.
+        """
+        if not self.enabled:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            result = method(*args)
+        except tango.DevFailed:
+            self.record(device_name, method.__name__, time.perf_counter() - start, True)
+            raise
+        self.record(
+            device_name,
+            method.__name__,
+            time.perf_counter() - start,
+            nbytes=payload_size(args) + payload_size(result),
+        )
+        return result
+
+    async def acall(self, device_name: str, method: Callable, *args) -> Any:
+        """
+        Await a Tango method (asyncio green mode) and record it.
+        """
+        if not self.enabled:
+            return await method(*args)
+        start = time.perf_counter()
+        try:
+            result = await method(*args)
+        except tango.DevFailed:
+            self.record(device_name, method.__name__, time.perf_counter() - start, True)
+            raise
+        self.record(
+            device_name,
+            method.__name__,
+            time.perf_counter() - start,
+            nbytes=payload_size(args) + payload_size(result),
+        )
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        Return the recorded metrics.
+
+        Returns
+        -------
+        dict
+            Metrics indexed by device name then operation: count, errors,
+            bytes, total_s and buckets (cumulative number of calls by latency
+            upper bound in seconds, the last bound is inf).
+        """
+        bounds = LATENCY_BUCKETS + (float("inf"),)
+        result: dict[str, dict[str, dict]] = {}
+        with self._lock:
+            for (device_name, operation), series in self._series.items():
+                result.setdefault(device_name, {})[operation] = {
+                    "count": series.count,
+                    "errors": series.errors,
+                    "bytes": series.bytes,
+                    "total_s": series.total_s,
+                    "buckets": dict(zip(bounds, np.cumsum(series.buckets).tolist())),
+                }
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        Return the recorded metrics in Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP pyaml_tango_call_duration_seconds Duration of Tango calls.",
+            "# TYPE pyaml_tango_call_duration_seconds histogram",
+        ]
+        errors = [
+            "# HELP pyaml_tango_call_errors_total Number of failed Tango calls.",
+            "# TYPE pyaml_tango_call_errors_total counter",
+        ]
+        sizes = [
+            "# HELP pyaml_tango_call_bytes_total Data sent and received by Tango calls.",
+            "# TYPE pyaml_tango_call_bytes_total counter",
+        ]
+        for device_name, operations in sorted(self.snapshot().items()):
+            for operation, metrics in sorted(operations.items()):
+                labels = (
+                    f'device="{_escape(device_name)}",operation="{_escape(operation)}"'
+                )
+                for bound, count in metrics["buckets"].items():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f'pyaml_tango_call_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+                    )
+                lines.append(
+                    f"pyaml_tango_call_duration_seconds_sum{{{labels}}} {metrics['total_s']!r}"
+                )
+                lines.append(
+                    f"pyaml_tango_call_duration_seconds_count{{{labels}}} {metrics['count']}"
+                )
+                errors.append(
+                    f"pyaml_tango_call_errors_total{{{labels}}} {metrics['errors']}"
+                )
+                sizes.append(
+                    f"pyaml_tango_call_bytes_total{{{labels}}} {metrics['bytes']}"
+                )
+        return "\n".join(lines + errors + sizes) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,16 +1,37 @@
+import asyncio
 import logging
+import time
+from dataclasses import dataclass
 from typing import Tuple, Optional
 
 import numpy as np
 import pyaml
+import tango
 from numpy import typing as npt
 from pyaml.control.deviceaccess import DeviceAccess
 from pydantic import BaseModel
 
 from pyaml.control.deviceaccesslist import DeviceAccessList
 
-from .attribute import Attribute, ConfigModel as AttrConfig
+from .attribute import (
+    Attribute,
+    ConfigModel as AttrConfig,
+    range_changed,
+    range_state,
+)
 from .device_factory import DeviceFactory
+from .initializer import initialize_attributes
+from .ramp import Ramp, ramp_steps
+from .write_guard import WriteGuardMode, guard, guard_modes
+from .asynch_calls import AsynchCall
+from .tango_pyaml_utils import (
+    named_errors,
+    tango_to_PyAMLException,
+    to_range_list,
+    WriteFailedException,
+    READBACK_DTYPE,
+    INVALID_QUALITY,
+)
 
 PYAMLCLASS: str = "MultiAttribute"
 
@@ -31,40 +52,186 @@ class ConfigModel(BaseModel):
         Unit of the attributes.
     range : tuple(min, max), optional
         Range of valid values. Use null for -∞ or +∞.
+    write_guard : str, optional
+        Range check of written values (reject, clip or warn), see
+        tango.pyaml.attribute.ConfigModel.
+    write_deadband : float, optional
+        Values differing by less than this from the last commanded setpoint
+        are not written, see tango.pyaml.attribute.ConfigModel.
     """
 
     attributes: list[str] = []
     name: str = ""
     unit: str = ""
     range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    write_guard: Optional[WriteGuardMode] = None
+    write_deadband: Optional[float] = None
+
+
+@dataclass
+class SetAndWaitTiming:
+    """
+    Timing information of a MultiAttribute.set_and_wait() call.
+
+    Attributes
+    ----------
+    write_time : float
+        Time to get all write replies, in seconds.
+    settle_time : float
+        Total time of the call, in seconds.
+    settle_times : numpy.array
+        Time for each attribute to be within tolerance, in seconds.
+        Equal to write_time when no tolerance is given.
+    nb_polls : int
+        Number of readback polls.
+    """
+
+    write_time: float
+    settle_time: float
+    settle_times: npt.NDArray[np.float64]
+    nb_polls: int
+
+
+class _SettleTracker:
+    """Convergence bookkeeping of set_and_wait() calls."""
+
+    def __init__(
+        self,
+        attributes: list[Attribute],
+        value: npt.NDArray[np.float64],
+        tolerance: float | npt.NDArray[np.float64] | None,
+        timeout_ms: int,
+    ):
+        self._attributes = attributes
+        self._timeout_ms = timeout_ms
+        self._start = time.monotonic()
+        self._deadline = self._start + timeout_ms / 1000.0
+        self._target = np.asarray(value, dtype=np.float64)
+        if tolerance is not None:
+            tolerance = np.broadcast_to(
+                np.asarray(tolerance, dtype=np.float64), (len(attributes),)
+            )
+        self._tolerance = tolerance
+        self._write_time = 0.0
+        self._settle_times = np.full(len(attributes), np.nan)
+        self._nb_polls = 0
+
+    def deadline(self) -> float:
+        return self._deadline
+
+    def written(self):
+        self._write_time = time.monotonic() - self._start
+
+    def update(self, readback: npt.NDArray[np.float64]) -> bool:
+        """Record a readback poll, return True when all attributes are settled."""
+        self._nb_polls += 1
+        now = time.monotonic()
+        readback = np.asarray(readback, dtype=np.float64)
+        within = np.abs(readback - self._target) <= self._tolerance.reshape(
+            (-1,) + (1,) * (readback.ndim - 1)
+        )
+        # Vector attributes are settled when all their elements are
+        within = within.reshape(len(self._attributes), -1).all(axis=1)
+        newly_settled = np.isnan(self._settle_times) & within
+        self._settle_times[newly_settled] = now - self._start
+        return not np.isnan(self._settle_times).any()
+
+    def wait_time(self, poll_period_ms: int) -> float:
+        """Return the time to wait before the next poll (in s)."""
+        if time.monotonic() + poll_period_ms / 1000.0 > self._deadline:
+            self._timed_out()
+        return poll_period_ms / 1000.0
+
+    def remaining_ms(self) -> int:
+        """Return the time left for the next poll (in ms)."""
+        remaining = int(np.ceil((self._deadline - time.monotonic()) * 1000.0))
+        if remaining <= 0:
+            self._timed_out()
+        return remaining
+
+    def _timed_out(self):
+        names = [
+            self._attributes[index].name()
+            for index in np.flatnonzero(np.isnan(self._settle_times))
+        ]
+        raise pyaml.PyAMLException(
+            f"Readback not within tolerance after {self._timeout_ms} ms: {', '.join(names)}"
+        )
+
+    def timing(self) -> SetAndWaitTiming:
+        if self._tolerance is None:
+            self._settle_times[:] = self._write_time
+        return SetAndWaitTiming(
+            write_time=self._write_time,
+            settle_time=time.monotonic() - self._start,
+            settle_times=self._settle_times,
+            nb_polls=self._nb_polls,
+        )
 
 
 class MultiAttribute(DeviceAccessList):
+    # Class of the managed attributes
+    _attribute_class: type = Attribute
+
     def __init__(self, cfg: ConfigModel = None):
         super().__init__()
         self._cfg = cfg
+        # Stacked ranges of the attributes and the range generations they
+        # match
+        self._ranges: np.ndarray = None
+        self._ranges_state: tuple = None
+        # Write guard mode codes of the attributes
+        self._guard_modes: np.ndarray = None
+        # Setpoint cache slots and dead-bands (NaN when disabled) of the
+        # attributes
+        self._setpoint_slots: np.ndarray = None
+        self._deadbands: np.ndarray = None
         if self._cfg:
             for attribute in self._cfg.attributes:
                 attr_config = AttrConfig(
-                    attribute=attribute, unit=self._cfg.unit, range=self._cfg.range
+                    attribute=attribute,
+                    unit=self._cfg.unit,
+                    range=self._cfg.range,
+                    write_guard=self._cfg.write_guard,
+                    write_deadband=self._cfg.write_deadband,
                 )
-                attr = Attribute(attr_config)
+                attr = self._attribute_class(attr_config)
                 self.append(attr)
 
     def add_devices(self, devices: DeviceAccess | list[DeviceAccess]):
+        cls = self._attribute_class
+        self._ranges = None
+        self._guard_modes = None
+        self._setpoint_slots = None
         if isinstance(devices, list):
-            if any([not isinstance(device, Attribute) for device in devices]):
+            if any([not isinstance(device, cls) for device in devices]):
                 raise pyaml.PyAMLException(
-                    "All devices must be instances of Attribute (tango.pyaml.attribute)."
+                    f"All devices must be instances of {cls.__name__} ({cls.__module__})."
                 )
             super().extend(devices)
         else:
-            if not isinstance(devices, Attribute):
+            if not isinstance(devices, cls):
                 raise pyaml.PyAMLException(
-                    "Device must be an instance of Attribute (tango.pyaml.attribute)."
+                    f"Device must be an instance of {cls.__name__} ({cls.__module__})."
                 )
             super().append(devices)
 
+    def initialize_all(self, max_workers: int = 16) -> dict[str, pyaml.PyAMLException]:
+        """
+        Initialize all managed attributes in parallel.
+
+        Parameters
+        ----------
+        max_workers : int
+            Maximum number of devices initialized concurrently.
+
+        Returns
+        -------
+        dict[str, pyaml.PyAMLException]
+            Errors indexed by attribute name, empty if all attributes are initialized.
+        """
+        return initialize_attributes(list(self), max_workers)
+
     def get_devices(self) -> DeviceAccess | list[DeviceAccess]:
         if len(self) == 1:
             return self[0]
@@ -72,73 +239,619 @@ class MultiAttribute(DeviceAccessList):
             return self
 
     def set(self, value: npt.NDArray[np.float64]):
+        self._write(value)
+
+    def _guard(self, value: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+        # Range check of the whole vector before anything is sent, a rejected
+        # write is never partially applied
         if len(value) != len(self):
             raise pyaml.PyAMLException(
                 f"Size of value ({len(value)} do not match the number of managed devices ({len(self)})"
             )
-        asynch_call_ids = []
-        timeout = DeviceFactory().get_timeout_ms()
-        # Set part
-        for index, device in enumerate(self):
-            device._ensure_initialized()
-            asynch_call_id = device._attribute_dev.write_attribute_asynch(
-                device._attr_name, value[index]
+        if self._guard_modes is None or len(self._guard_modes) != len(self):
+            self._guard_modes = guard_modes(
+                [device._cfg.write_guard for device in self]
             )
-            asynch_call_ids.append(asynch_call_id)
+        if not self._guard_modes.any():
+            return value
+        return guard(
+            value,
+            self.get_range_array(),
+            self._guard_modes,
+            [device.name() for device in self],
+        )
 
-        # Wait part
-        for index, call_id in enumerate(asynch_call_ids):
-            self[index]._attribute_dev.write_attribute_reply(call_id, timeout)
+    def _write(
+        self,
+        value: npt.NDArray[np.float64],
+        timeout_ms: int | None = None,
+        deadline: float | None = None,
+        deadband: bool = True,
+    ):
+        # Without dead-band, all values are sent (snapshot restore)
+        value = self._guard(value)
+        mask = self._changed(value) if deadband else None
+        if mask is None or mask.any():
+            self._send_writes(value, timeout_ms, deadline, mask)
 
-    def set_and_wait(self, value: npt.NDArray[np.float64]):
-        raise NotImplementedError("Not implemented yet.")
+    def _setpoint_state(self) -> tuple[np.ndarray, np.ndarray] | None:
+        # Slots and dead-bands of the attributes, None for vector attributes
+        if not self._attribute_class._scalar_setpoints:
+            return None
+        if self._setpoint_slots is None or len(self._setpoint_slots) != len(self):
+            self._deadbands = np.array(
+                [
+                    np.nan
+                    if device._cfg.write_deadband is None or not device.is_writable()
+                    else device._cfg.write_deadband
+                    for device in self
+                ],
+                dtype=np.float64,
+            )
+            self._setpoint_slots = np.array(
+                [device._slot() for device in self], dtype=np.intp
+            )
+        return self._setpoint_slots, self._deadbands
 
-    def get(self) -> npt.NDArray[np.float64]:
-        values = []
-        asynch_call_ids = []
-        timeout = DeviceFactory().get_timeout_ms()
-        # Read asynch
-        for index, device in enumerate(self):
+    def _changed(self, value: npt.NDArray[np.float64]) -> np.ndarray | None:
+        # Dead-band mask of the values to write, None to write all of them
+        state = self._setpoint_state()
+        if state is None or np.isnan(state[1]).all():
+            return None
+        slots, deadbands = state
+        return (
+            DeviceFactory()
+            .get_setpoint_cache()
+            .changed(slots, np.asarray(value, dtype=np.float64), deadbands)
+        )
+
+    def _observe(self, attr_values: list[tango.DeviceAttribute | None]):
+        # Setpoints changed elsewhere invalidate the dead-band
+        state = self._setpoint_state()
+        if state is None or np.isnan(state[1]).all():
+            return
+        setpoints = np.array(
+            [
+                np.nan if attr_value is None else attr_value.w_value
+                for attr_value in attr_values
+            ],
+            dtype=np.float64,
+        )
+        DeviceFactory().get_setpoint_cache().observe(state[0], setpoints, state[1])
+
+    def _written(
+        self,
+        value: npt.NDArray[np.float64],
+        mask: np.ndarray | None,
+        failed: list[int],
+    ):
+        # Record the written setpoints, shared with all elements writing them
+        state = self._setpoint_state()
+        if state is None:
+            return
+        slots = state[0]
+        failed = np.array(failed, dtype=np.intp)
+        written = np.ones(len(self), dtype=bool) if mask is None else mask.copy()
+        written[failed] = False
+        cache = DeviceFactory().get_setpoint_cache()
+        cache.update(slots[written], np.asarray(value, dtype=np.float64)[written])
+        if len(failed) > 0:
+            cache.invalidate(slots[failed])
+
+    def _send_writes(
+        self,
+        value: npt.NDArray[np.float64],
+        timeout_ms: int | None = None,
+        deadline: float | None = None,
+        mask: np.ndarray | None = None,
+    ):
+        devices = self._group_by_device(mask)
+        # One write request per device, replies collected as they arrive
+        calls = [self._write_call(indexes, value) for indexes in devices.values()]
+        DeviceFactory().get_scheduler().run(calls, timeout_ms, deadline)
+
+        errors = {}
+        failed = []
+        for indexes, call in zip(devices.values(), calls):
+            if call.has_failed():
+                for index, error in self._write_errors(
+                    indexes, call.error, call.dev_failed
+                ).items():
+                    failed.append(index)
+                    errors[self[index].name()] = error
+        self._written(value, mask, failed)
+        if len(errors) > 0:
+            raise WriteFailedException(errors)
+
+    @staticmethod
+    def _write_errors(
+        indexes: list[int],
+        error: pyaml.PyAMLException,
+        dev_failed: tango.DevFailed | None,
+    ) -> dict[int, pyaml.PyAMLException]:
+        # Errors of the attributes of a failed device write. Only the failed
+        # attributes are reported when Tango details them, all attributes of
+        # the device otherwise.
+        if dev_failed is not None:
+            errors = named_errors(dev_failed)
+            if errors is not None:
+                return {
+                    indexes[idx]: error
+                    for idx, error in errors.items()
+                    if 0 <= idx < len(indexes)
+                }
+        return {index: error for index in indexes}
+
+    def _write_call(
+        self, indexes: list[int], value: npt.NDArray[np.float64]
+    ) -> AsynchCall:
+        device = self[indexes[0]]
+        attr_values = [(self[index]._attr_name, value[index]) for index in indexes]
+        return AsynchCall(
+            device._attribute_dev_name,
+            lambda: device._attribute_dev.write_attributes_asynch(attr_values),
+            device._attribute_dev.write_attributes_reply,
+            "write_attributes",
+            (attr_values,),
+            device._attribute_dev.cancel_asynch_request,
+        )
+
+    def set_and_wait(
+        self,
+        value: npt.NDArray[np.float64],
+        tolerance: float | npt.NDArray[np.float64] | None = None,
+        timeout_ms: int | None = None,
+        poll_period_ms: int = 50,
+    ) -> "SetAndWaitTiming":
+        """
+        Write all values concurrently and wait for the write replies.
+
+        Optionally, the readbacks are polled until they are within the tolerance
+        of the written values.
+
+        Parameters
+        ----------
+        value : numpy.array
+            Values to write, ordered as the managed attributes.
+        tolerance : float or numpy.array, optional
+            Absolute tolerance (global or per attribute) on the readbacks.
+            If not specified, readbacks are not checked.
+        timeout_ms : int, optional
+            Overall deadline for writes and convergence, in milli seconds.
+            Default is the device factory timeout.
+        poll_period_ms : int
+            Readback polling period, in milli seconds.
+
+        Returns
+        -------
+        SetAndWaitTiming
+            Write and settling times.
+
+        Raises
+        ------
+        WriteFailedException
+            If some writes were not applied.
+        OutOfRangeException
+            If the write guard rejects values, nothing is written.
+        pyaml.PyAMLException
+            If some readbacks did not converge before the deadline.
+        """
+        if timeout_ms is None:
+            timeout_ms = DeviceFactory().get_timeout_ms()
+        # Clipped values are the ones to settle on
+        value = self._guard(value)
+        tracker = _SettleTracker(self, value, tolerance, timeout_ms)
+
+        mask = self._changed(value)
+        if mask is None or mask.any():
+            self._send_writes(value, timeout_ms, tracker.deadline(), mask)
+        tracker.written()
+
+        if tolerance is not None:
+            # Polls are bounded by the time left before the deadline
+            while not tracker.update(self.readback(tracker.remaining_ms())):
+                time.sleep(tracker.wait_time(poll_period_ms))
+
+        return tracker.timing()
+
+    def ramp(
+        self,
+        target: npt.NDArray[np.float64],
+        max_step: float | npt.NDArray[np.float64] | None = None,
+        max_rate: float | npt.NDArray[np.float64] | None = None,
+        period_ms: int = 100,
+        timeout_ms: int | None = None,
+        max_pending: int = 1,
+    ) -> Ramp:
+        """
+        Ramp the attributes from their current setpoints to a target.
+
+        The intermediate setpoints are computed up front, then written in the
+        background on a fixed cadence, one asynchronous request per device
+        and step. All attributes reach the target at the last step.
+
+        Parameters
+        ----------
+        target : numpy.array
+            Target values, ordered as the managed attributes.
+        max_step : float or numpy.array, optional
+            Maximum change per step (global or per attribute).
+        max_rate : float or numpy.array, optional
+            Maximum slew rate, in units per second (global or per attribute).
+        period_ms : int
+            Time between two steps, in milli seconds.
+        timeout_ms : int, optional
+            Timeout of the writes of each step, in milli seconds.
+            Default is the timeout and retry policy of each device.
+        max_pending : int
+            Maximum number of steps waiting for their write replies, steps
+            are written in order.
+
+        Returns
+        -------
+        Ramp
+            Running ramp, use wait() to wait for its end and cancel() to stop it.
+
+        Raises
+        ------
+        OutOfRangeException
+            If the write guard rejects the target, nothing is written.
+        pyaml.PyAMLException
+            If the current setpoints cannot be read or the step limits are
+            invalid.
+        """
+        target = self._guard(np.asarray(target, dtype=np.float64))
+        steps = ramp_steps(self.get(), target, max_step, max_rate, period_ms / 1000.0)
+        ramp = Ramp(self, steps, period_ms / 1000.0, timeout_ms, max_pending)
+        ramp.start()
+        return ramp
+
+    def _group_by_device(self, mask: np.ndarray | None = None) -> dict[str, list[int]]:
+        # Indexes of the managed attributes (the ones selected by the mask),
+        # grouped by device
+        devices: dict[str, list[int]] = {}
+        indexes = range(len(self)) if mask is None else np.flatnonzero(mask).tolist()
+        for index in indexes:
+            device = self[index]
             device._ensure_initialized()
-            asynch_call_id = device._attribute_dev.read_attribute_asynch(
-                device._attr_name
+            devices.setdefault(device._attribute_dev_name, []).append(index)
+        return devices
+
+    def _read_attributes(
+        self, timeout_ms: int | None = None
+    ) -> list[tango.DeviceAttribute | None]:
+        """
+        Read all attributes with one asynchronous request per device.
+
+        All requests share a single deadline, replies are collected in
+        arrival order.
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+
+        Returns
+        -------
+        list[tango.DeviceAttribute]
+            Attribute values ordered as the managed attributes, None for
+            attributes whose device missed the deadline or whose read failed.
+        """
+        deadline = None
+        if timeout_ms is not None:
+            deadline = time.monotonic() + timeout_ms / 1000.0
+        devices = self._group_by_device()
+        # One read request per device, replies collected as they arrive
+        calls = [self._read_call(indexes) for indexes in devices.values()]
+        DeviceFactory().get_scheduler().run(calls, timeout_ms, deadline)
+
+        # Scatter the replies in configuration order
+        attr_values: list[tango.DeviceAttribute] = [None] * len(self)
+        for indexes, call in zip(devices.values(), calls):
+            if call.has_expired() or call.has_failed():
+                # A slow or failed device must not stall the whole read
+                logger.log(logging.WARNING, call.error.message)
+                continue
+            for index, dev_attr in zip(indexes, call.result):
+                if dev_attr.has_failed:
+                    logger.log(
+                        logging.WARNING,
+                        "Cannot read %s: %s",
+                        self[index]._cfg.attribute,
+                        tango_to_PyAMLException(
+                            tango.DevFailed(*dev_attr.get_err_stack())
+                        ),
+                    )
+                    continue
+                attr_values[index] = dev_attr
+
+        self._observe(attr_values)
+        return attr_values
+
+    def _read_call(self, indexes: list[int]) -> AsynchCall:
+        device = self[indexes[0]]
+        attr_names = [self[index]._attr_name for index in indexes]
+        return AsynchCall(
+            device._attribute_dev_name,
+            lambda: device._attribute_dev.read_attributes_asynch(attr_names),
+            device._attribute_dev.read_attributes_reply,
+            "read_attributes",
+            (attr_names,),
+            device._attribute_dev.cancel_asynch_request,
+            idempotent=True,
+        )
+
+    def get(self, timeout_ms: int | None = None) -> npt.NDArray[np.float64]:
+        """
+        Return the setpoints of all attributes (readback of read-only ones).
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+
+        Returns
+        -------
+        numpy.array
+            Setpoints ordered as the managed attributes, NaN for attributes
+            whose device missed the deadline or whose read failed.
+        """
+        values = np.full(len(self), np.nan)
+        # Read the set_point, ie the write part in a tango attribute.
+        for index, dev_attr in enumerate(self._read_attributes(timeout_ms)):
+            if dev_attr is not None:
+                if self[index].is_writable():
+                    setpoint = dev_attr.w_value
+                else:
+                    setpoint = dev_attr.value
+                # None before the first write or on INVALID reads
+                values[index] = np.nan if setpoint is None else setpoint
+
+        return values
+
+    def readback(self, timeout_ms: int | None = None) -> np.array:
+        """
+        Return the readbacks of all attributes.
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+
+        Returns
+        -------
+        numpy.array
+            Readbacks ordered as the managed attributes, NaN for attributes
+            whose device missed the deadline or whose read failed.
+        """
+        values = np.full(len(self), np.nan)
+        for index, dev_attr in enumerate(self._read_attributes(timeout_ms)):
+            if dev_attr is not None and dev_attr.value is not None:
+                values[index] = dev_attr.value
+        return values
+
+    async def _aread_attributes(self) -> list[tango.DeviceAttribute]:
+        """
+        Read all attributes with one concurrent request per device (asyncio).
+
+        Returns
+        -------
+        list[tango.DeviceAttribute]
+            Attribute values ordered as the managed attributes.
+        """
+        devices = self._group_by_device()
+        attr_values: list[tango.DeviceAttribute] = [None] * len(self)
+        try:
+            replies = await asyncio.gather(
+                *[
+                    self[indexes[0]]._adevice_call(
+                        self[indexes[0]]._asyncio_device().read_attributes,
+                        [self[index]._attr_name for index in indexes],
+                    )
+                    for indexes in devices.values()
+                ]
             )
-            asynch_call_ids.append(asynch_call_id)
+            for indexes, dev_attrs in zip(devices.values(), replies):
+                for index, dev_attr in zip(indexes, dev_attrs):
+                    if dev_attr.has_failed:
+                        raise tango.DevFailed(*dev_attr.get_err_stack())
+                    attr_values[index] = dev_attr
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+
+        self._observe(attr_values)
+        return attr_values
 
-        # Wait to read the set_point, ie the write part in a tango attribute.
-        for index, call_id in enumerate(asynch_call_ids):
-            dev_attr = self[index]._attribute_dev.read_attribute_reply(call_id, timeout)
+    async def aget(self) -> npt.NDArray[np.float64]:
+        """Asyncio version of get()."""
+        values = []
+        for index, dev_attr in enumerate(await self._aread_attributes()):
             if self[index].is_writable():
                 values.append(dev_attr.w_value)
             else:
                 values.append(dev_attr.value)
+        # None (NaN) before the first write or on INVALID reads
+        return np.array(values, dtype=np.float64)
 
-        return np.array(values)
+    async def areadback(self) -> np.array:
+        """Asyncio version of readback()."""
+        return np.array(
+            [dev_attr.value for dev_attr in await self._aread_attributes()],
+            dtype=np.float64,
+        )
 
-    def readback(self) -> np.array:
-        values = []
-        asynch_call_ids = []
-        timeout = DeviceFactory().get_timeout_ms()
-        # Readback with asynch optim
-        for index, device in enumerate(self):
-            device._ensure_initialized()
-            asynch_call_id = device._attribute_dev.read_attribute_asynch(
-                device._attr_name
+    async def aset(self, value: npt.NDArray[np.float64]):
+        """
+        Asyncio version of set(), the call returns when all writes are done.
+
+        Raises
+        ------
+        WriteFailedException
+            If some writes were not applied.
+        OutOfRangeException
+            If the write guard rejects values, nothing is written.
+        """
+        value = self._guard(value)
+        mask = self._changed(value)
+        if mask is None or mask.any():
+            await self._asend_writes(value, mask)
+
+    async def _asend_writes(
+        self, value: npt.NDArray[np.float64], mask: np.ndarray | None = None
+    ):
+        devices = self._group_by_device(mask)
+        replies = await asyncio.gather(
+            *[
+                self[indexes[0]]._adevice_call(
+                    self[indexes[0]]._asyncio_device().write_attributes,
+                    [(self[index]._attr_name, value[index]) for index in indexes],
+                )
+                for indexes in devices.values()
+            ],
+            return_exceptions=True,
+        )
+        errors = {}
+        failed = []
+        for indexes, reply in zip(devices.values(), replies):
+            if isinstance(reply, tango.DevFailed):
+                for index, error in self._write_errors(
+                    indexes, tango_to_PyAMLException(reply), reply
+                ).items():
+                    failed.append(index)
+                    errors[self[index].name()] = error
+            elif isinstance(reply, pyaml.PyAMLException):
+                # Unavailable device
+                failed.extend(indexes)
+                for index in indexes:
+                    errors[self[index].name()] = reply
+            elif isinstance(reply, BaseException):
+                raise reply
+        self._written(value, mask, failed)
+        if len(errors) > 0:
+            raise WriteFailedException(errors)
+
+    async def aset_and_wait(
+        self,
+        value: npt.NDArray[np.float64],
+        tolerance: float | npt.NDArray[np.float64] | None = None,
+        timeout_ms: int | None = None,
+        poll_period_ms: int = 50,
+    ) -> SetAndWaitTiming:
+        """Asyncio version of set_and_wait()."""
+        if timeout_ms is None:
+            timeout_ms = DeviceFactory().get_timeout_ms()
+        value = self._guard(value)
+        tracker = _SettleTracker(self, value, tolerance, timeout_ms)
+
+        mask = self._changed(value)
+        try:
+            if mask is None or mask.any():
+                await asyncio.wait_for(
+                    self._asend_writes(value, mask), timeout_ms / 1000.0
+                )
+        except TimeoutError:
+            raise pyaml.PyAMLException(
+                f"Timeout ({timeout_ms} ms) waiting write replies"
             )
-            asynch_call_ids.append(asynch_call_id)
+        tracker.written()
+
+        if tolerance is not None:
+            while not tracker.update(await self.areadback()):
+                await asyncio.sleep(tracker.wait_time(poll_period_ms))
+
+        return tracker.timing()
+
+    def bulk_readback(self, timeout_ms: int | None = None) -> np.ndarray:
+        """
+        Return readback values, qualities and timestamps of all attributes.
 
-        # Wait to read the value
-        for index, call_id in enumerate(asynch_call_ids):
-            dev_attr = self[index]._attribute_dev.read_attribute_reply(call_id, timeout)
-            values.append(dev_attr.value)
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
 
-        return np.array(values)
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of READBACK_DTYPE ordered as the managed attributes,
+            with value (float64), quality (int8 tango.AttrQuality value) and
+            timestamp (float64 epoch seconds) fields. Attributes whose device
+            missed the deadline or whose read failed have a NaN value and
+            timestamp and an INVALID quality.
+        """
+        attr_values = self._read_attributes(timeout_ms)
+        result = np.empty(len(self), dtype=READBACK_DTYPE)
+        # Each column is built in one pass and assigned at once
+        result["value"] = np.fromiter(
+            (
+                np.nan
+                if attr_value is None or attr_value.value is None
+                else attr_value.value
+                for attr_value in attr_values
+            ),
+            dtype=np.float64,
+            count=len(result),
+        )
+        result["quality"] = np.fromiter(
+            (
+                INVALID_QUALITY if attr_value is None else int(attr_value.quality)
+                for attr_value in attr_values
+            ),
+            dtype=np.int8,
+            count=len(result),
+        )
+        result["timestamp"] = np.fromiter(
+            (
+                np.nan if attr_value is None else attr_value.time.totime()
+                for attr_value in attr_values
+            ),
+            dtype=np.float64,
+            count=len(result),
+        )
+        return result
 
     def get_range(self) -> list[float]:
-        attr_range: list[float] = []
-        for device in self:
-            attr_range.extend(device.get_range())
-        return attr_range
+        return to_range_list(self.get_range_array())
+
+    def _names(self) -> list[str]:
+        return [device._cfg.attribute for device in self]
+
+    def get_range_array(self) -> np.ndarray:
+        """
+        Return the ranges of all attributes, built once and rebuilt only when
+        the range of an attribute is invalidated or attributes are added.
+
+        Returns
+        -------
+        numpy.array
+            Read-only (n, 2) float64 array of [min, max] rows, -inf or +inf
+            when unbounded.
+        """
+        if (
+            self._ranges is None
+            or len(self._ranges) != len(self)
+            or range_changed(self._ranges_state, self._names())
+        ):
+            state = range_state(self._names())
+            # Ranges from Tango need the attribute configurations, fetch them
+            # with one call per device
+            initialize_attributes(
+                [
+                    device
+                    for device in self
+                    if device._cfg.range is None and not device.is_initialized()
+                ]
+            )
+            ranges = np.array([device.get_range_array() for device in self])
+            ranges = ranges.reshape(-1, 2)
+            ranges.flags.writeable = False
+            self._ranges = ranges
+            self._ranges_state = state
+        return self._ranges
 
     def check_device_availability(self) -> bool:
         available = False
@@ -0,0 +1,140 @@
+import logging
+
+import numpy as np
+
+from .multi_attribute import MultiAttribute, ConfigModel
+from .vector_attribute import VectorAttribute
+from .tango_pyaml_utils import INVALID_QUALITY
+
+PYAMLCLASS: str = "MultiVectorAttribute"
+
+logger = logging.getLogger(__name__)
+
+
+class MultiVectorAttribute(MultiAttribute):
+    """
+    Aggregator of Tango SPECTRUM or IMAGE attributes of the same shape.
+
+    Values are stacked in an array of shape (number of attributes, attribute
+    shape), directly filled from the numpy arrays extracted by PyTango.
+    A preallocated output buffer can be given to avoid any allocation.
+    Attributes whose device missed the deadline have NaN rows (0 for integer
+    buffers).
+    """
+
+    _attribute_class: type = VectorAttribute
+
+    def __init__(self, cfg: ConfigModel = None):
+        super().__init__(cfg)
+
+    def _stack(self, arrays: list, out: np.ndarray | None) -> np.ndarray:
+        if out is None:
+            first = next((a for a in arrays if a is not None), None)
+            if first is None:
+                return np.full(len(self), np.nan)
+            first = np.asarray(first)
+            out = np.empty((len(self),) + first.shape, dtype=first.dtype)
+        for index, array in enumerate(arrays):
+            if array is None:
+                out[index] = np.nan if np.issubdtype(out.dtype, np.inexact) else 0
+            else:
+                np.copyto(out[index], array)
+        return out
+
+    def _setpoints(self, attr_values: list) -> list:
+        return [
+            None if attr_value is None else self[index]._setpoint(attr_value)
+            for index, attr_value in enumerate(attr_values)
+        ]
+
+    def get(
+        self, timeout_ms: int | None = None, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Return the setpoints of all attributes (readback of read-only ones).
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+        out : numpy.array, optional
+            Preallocated buffer of shape (number of attributes, attribute shape).
+
+        Returns
+        -------
+        numpy.array
+            Setpoints ordered as the managed attributes (out if given).
+        """
+        return self._stack(self._setpoints(self._read_attributes(timeout_ms)), out)
+
+    def readback(
+        self, timeout_ms: int | None = None, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Return the readbacks of all attributes.
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+        out : numpy.array, optional
+            Preallocated buffer of shape (number of attributes, attribute shape).
+
+        Returns
+        -------
+        numpy.array
+            Readbacks ordered as the managed attributes (out if given).
+        """
+        attr_values = self._read_attributes(timeout_ms)
+        return self._stack([None if v is None else v.value for v in attr_values], out)
+
+    async def aget(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Asyncio version of get()."""
+        return self._stack(self._setpoints(await self._aread_attributes()), out)
+
+    async def areadback(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Asyncio version of readback()."""
+        attr_values = await self._aread_attributes()
+        return self._stack([v.value for v in attr_values], out)
+
+    def bulk_readback(self, timeout_ms: int | None = None) -> np.ndarray:
+        """
+        Return readback arrays, qualities and timestamps of all attributes.
+
+        Parameters
+        ----------
+        timeout_ms : int, optional
+            Time allowed for the whole read, in milli seconds.
+            Default is the timeout and retry policy of each device.
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array ordered as the managed attributes, with value
+            (sub-array of the attribute shape), quality (int8 tango.AttrQuality
+            value) and timestamp (float64 epoch seconds) fields. Attributes
+            whose device missed the deadline have an INVALID quality and a NaN
+            timestamp.
+        """
+        attr_values = self._read_attributes(timeout_ms)
+        values = self._stack(
+            [None if v is None else v.value for v in attr_values], None
+        )
+        result = np.empty(
+            len(self),
+            dtype=[
+                ("value", values.dtype, values.shape[1:]),
+                ("quality", np.int8),
+                ("timestamp", np.float64),
+            ],
+        )
+        result["value"] = values
+        result["quality"] = INVALID_QUALITY
+        result["timestamp"] = np.nan
+        for index, attr_value in enumerate(attr_values):
+            if attr_value is not None:
+                result["quality"][index] = int(attr_value.quality)
+                result["timestamp"][index] = attr_value.time.totime()
+        return result
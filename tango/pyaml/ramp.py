@@ -0,0 +1,262 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pyaml
+from numpy import typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+def ramp_steps(
+    start: npt.ArrayLike,
+    target: npt.ArrayLike,
+    max_step: float | npt.ArrayLike | None = None,
+    max_rate: float | npt.ArrayLike | None = None,
+    period_s: float = 0.1,
+) -> npt.NDArray[np.float64]:
+    """
+    Compute the intermediate setpoints of a ramp.
+
+    All attributes move linearly and reach the target together, the number
+    of steps is set by the attribute needing the most steps.
+
+    Parameters
+    ----------
+    start : numpy.array
+        Current setpoints, one row per attribute.
+    target : numpy.array
+        Target setpoints, same shape as start.
+    max_step : float or numpy.array, optional
+        Maximum change per step (global or per attribute).
+    max_rate : float or numpy.array, optional
+        Maximum slew rate per second (global or per attribute).
+    period_s : float
+        Time between two steps, in seconds.
+
+    Returns
+    -------
+    numpy.array
+        (steps, ...) array of setpoints, the last one being the target.
+
+    Raises
+    ------
+    pyaml.PyAMLException
+        If no step limit is given, a limit is not positive or a setpoint is NaN.
+    """
+    start = np.asarray(start, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    if start.shape != target.shape:
+        raise pyaml.PyAMLException(
+            f"Shape of target {target.shape} does not match the setpoints {start.shape}"
+        )
+    if np.isnan(start).any() or np.isnan(target).any():
+        raise pyaml.PyAMLException("Cannot ramp from or to NaN setpoints")
+    if max_step is None and max_rate is None:
+        raise pyaml.PyAMLException("A maximum step or a maximum rate is needed")
+
+    nb_attributes = len(start)
+    limit = np.full(nb_attributes, np.inf)
+    if max_step is not None:
+        limit = np.minimum(limit, np.broadcast_to(max_step, (nb_attributes,)))
+    if max_rate is not None:
+        limit = np.minimum(
+            limit, np.broadcast_to(max_rate, (nb_attributes,)) * period_s
+        )
+    if (limit <= 0).any():
+        raise pyaml.PyAMLException("Ramp step limits must be positive")
+
+    delta = target - start
+    # Largest change of each attribute (all elements of vectors)
+    change = np.abs(delta).reshape(nb_attributes, -1).max(axis=1, initial=0.0)
+    nb_steps = max(int(np.ceil((change / limit).max(initial=0.0))), 1)
+    fractions = np.arange(1, nb_steps + 1, dtype=np.float64) / nb_steps
+    steps = start + fractions.reshape((-1,) + (1,) * delta.ndim) * delta
+    # No rounding error on the final setpoints
+    steps[-1] = target
+    return steps
+
+
+class Ramp:
+    """
+    Ramp of the attributes of an aggregator through precomputed steps,
+    written by a background thread on a fixed cadence. Each step is written
+    with one asynchronous request per device.
+
+    Parameters
+    ----------
+    aggregator : MultiAttribute
+        Attributes to ramp.
+    steps : numpy.array
+        Setpoints of each step (see ramp_steps()).
+    period_s : float
+        Time between two steps, in seconds. Steps are scheduled on absolute
+        times, slow replies do not shift the following steps.
+    timeout_ms : int, optional
+        Timeout of the writes of each step, in milli seconds.
+        Default is the timeout and retry policy of each device.
+    max_pending : int
+        Maximum number of steps waiting for their write replies. Steps are
+        always written in order, each one once the previous one is
+        acknowledged. With more than one, steps are queued behind a slow step
+        instead of delaying the cadence of the following ones.
+    """
+
+    def __init__(
+        self,
+        aggregator,
+        steps: npt.NDArray[np.float64],
+        period_s: float,
+        timeout_ms: int | None = None,
+        max_pending: int = 1,
+    ):
+        if max_pending < 1:
+            raise pyaml.PyAMLException(
+                f"Invalid number of pending steps: {max_pending}"
+            )
+        self._aggregator = aggregator
+        self._steps = steps
+        self._period = period_s
+        self._timeout_ms = timeout_ms
+        self._max_pending = max_pending
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._sent = 0
+        self._acknowledged = 0
+        self._max_lag = 0.0
+        self._start: float = None
+        self._end: float = None
+        self.error: Exception = None
+
+    def start(self):
+        """Start writing the steps."""
+        if self._thread is not None:
+            raise pyaml.PyAMLException("Ramp already started")
+        self._thread = threading.Thread(
+            target=self._run, name="pyaml-ramp", daemon=True
+        )
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Stop the ramp, no step is sent after this call. Attributes keep the
+        setpoints of the last written step.
+        """
+        self._cancel.set()
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        """Return True when the ramp is over (completed, cancelled or failed)."""
+        return self._done.is_set()
+
+    def wait(self, timeout_s: float | None = None) -> bool:
+        """
+        Wait for the end of the ramp.
+
+        Parameters
+        ----------
+        timeout_s : float, optional
+            Maximum waiting time, in seconds. No limit if not specified.
+
+        Returns
+        -------
+        bool
+            True if the ramp is over.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If a step could not be written (i.e. WriteFailedException).
+        """
+        over = self._done.wait(timeout_s)
+        if over and self.error is not None:
+            raise self.error
+        return over
+
+    def setpoints(self) -> npt.NDArray[np.float64] | None:
+        """
+        Return the setpoints of the last acknowledged step, None if none was.
+        """
+        with self._lock:
+            if self._acknowledged == 0:
+                return None
+            return self._steps[self._acknowledged - 1]
+
+    def stats(self) -> dict:
+        """
+        Return the ramp progress.
+
+        Returns
+        -------
+        dict
+            steps: number of steps, sent and acknowledged: steps written and
+            replied, max_lag_s: largest delay of a step after its scheduled
+            time, duration_s: time since the ramp started (until it ended).
+        """
+        with self._lock:
+            end = self._end if self._end is not None else time.monotonic()
+            return {
+                "steps": len(self._steps),
+                "sent": self._sent,
+                "acknowledged": self._acknowledged,
+                "max_lag_s": self._max_lag,
+                "duration_s": end - self._start if self._start is not None else 0.0,
+            }
+
+    def _write(self, index: int) -> bool:
+        # Steps queued behind a failed or cancelled step are not written
+        if self._cancel.is_set():
+            return False
+        with self._lock:
+            self._sent += 1
+        try:
+            self._aggregator._send_writes(self._steps[index], self._timeout_ms)
+        except Exception:
+            self._cancel.set()
+            raise
+        return True
+
+    def _acknowledge(self, pending: deque[tuple[int, Future]]):
+        index, future = pending.popleft()
+        # Raises the write error of the step
+        if not future.result():
+            return
+        with self._lock:
+            self._acknowledged = max(self._acknowledged, index + 1)
+
+    def _run(self):
+        self._start = time.monotonic()
+        pending: deque[tuple[int, Future]] = deque()
+        last = len(self._steps) - 1
+        try:
+            # A single writer, a step never overtakes the previous one
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for index in range(len(self._steps)):
+                    # Collect replies of the previous steps while waiting
+                    scheduled = self._start + index * self._period
+                    while len(pending) > 0 and (
+                        len(pending) >= self._max_pending or index == last
+                    ):
+                        self._acknowledge(pending)
+                    if self._cancel.wait(max(scheduled - time.monotonic(), 0.0)):
+                        break
+                    with self._lock:
+                        self._max_lag = max(self._max_lag, time.monotonic() - scheduled)
+                    pending.append((index, executor.submit(self._write, index)))
+                while len(pending) > 0:
+                    self._acknowledge(pending)
+        except Exception as ex:
+            self._cancel.set()
+            self.error = ex
+            logger.log(logging.WARNING, "Ramp stopped: %s", ex)
+        finally:
+            with self._lock:
+                self._end = time.monotonic()
+            self._done.set()
@@ -0,0 +1,504 @@
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Any
+
+import numpy as np
+import pyaml
+import tango
+
+from .simulator import SimulatedDevice, SimulatedDeviceAttribute, Simulator
+from .tango_pyaml_utils import throw_dev_failed
+
+logger = logging.getLogger(__name__)
+
+# File header: magic, format version and record size
+MAGIC: bytes = b"PYAMLREC"
+VERSION: int = 1
+HEADER_SIZE: int = 16
+
+# Record of the binary log. index is the position of the attribute name in
+# the string table (<log>.names), quality a tango.AttrQuality value and
+# latency the duration of the Tango call in seconds.
+RECORD_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("latency", "<f4"),
+        ("index", "<u4"),
+        ("value", "<f8"),
+        ("quality", "i1"),
+        ("flags", "u1"),
+    ]
+)
+FLAG_WRITE: int = 1  # Written value (read value otherwise)
+FLAG_NOT_SCALAR: int = 2  # Array or string value, recorded as NaN
+
+_VALID: int = int(tango.AttrQuality.ATTR_VALID)
+
+# Maximum number of entries written at once by the background thread
+_BATCH_SIZE: int = 4096
+# Default maximum number of calls waiting to be written
+_MAX_QUEUED: int = 65536
+
+
+def _names_path(path: str) -> str:
+    return path + ".names"
+
+
+def _strip_host(name: str) -> str:
+    # //host:port/domain/family/member/attr -> domain/family/member/attr
+    if name.startswith("//"):
+        name = name[2:].split("/", 1)[-1]
+    return name.lower()
+
+
+class Recorder:
+    """
+    Records the values read and written through Tango calls into an
+    append-only binary log of RECORD_DTYPE records, with a string table of
+    attribute names. Disabled by default.
+
+    The calling thread only queues the call, records are decoded and written
+    by a background thread. The queue is bounded: when the writer cannot keep
+    up, new calls are dropped (and counted in stats()) rather than blocking
+    the control loop or growing memory without limit.
+
+    Parameters
+    ----------
+    max_queued : int
+        Maximum number of calls waiting to be written.
+    """
+
+    def __init__(self, max_queued: int = _MAX_QUEUED):
+        self.enabled = False
+        self._queue: queue.Queue = queue.Queue(max_queued)
+        self._nb_dropped = 0
+        self._thread: threading.Thread = None
+        self._path: str = None
+        self._names: dict[str, int] = {}
+        self._nb_records = 0
+
+    def start(self, path: str):
+        """
+        Start recording, records are appended to an existing log.
+
+        Parameters
+        ----------
+        path : str
+            Path of the binary log. Attribute names are stored in <path>.names.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the file is not a recording.
+        """
+        if self.enabled:
+            self.stop()
+        self._names = {}
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            Recording.check_header(path)
+            if os.path.exists(_names_path(path)):
+                with open(_names_path(path), encoding="utf-8") as f:
+                    for name in f.read().splitlines():
+                        self._names[name] = len(self._names)
+        self._path = path
+        self._nb_records = 0
+        self._nb_dropped = 0
+        self._thread = threading.Thread(
+            target=self._write_loop, name="pyaml-recorder", daemon=True
+        )
+        self._thread.start()
+        self.enabled = True
+
+    def stop(self):
+        """Stop recording, queued records are written before returning."""
+        if self._thread is None:
+            return
+        self.enabled = False
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def record_call(
+        self,
+        device_name: str,
+        operation: str,
+        args: tuple,
+        result: Any,
+        latency_s: float,
+    ):
+        """
+        Record the values of a successful Tango call.
+
+        Parameters
+        ----------
+        device_name : str
+            Name of the device.
+        operation : str
+            Name of the Tango method (read_attribute(s), write_attribute(s)
+            and their asynchronous versions are recorded).
+        args : tuple
+            Arguments of the call.
+        result : Any
+            Result of the call.
+        latency_s : float
+            Duration of the call, in seconds.
+        """
+        if self.enabled:
+            self._put((time.time(), latency_s, device_name, operation, args, result))
+
+    def record_values(
+        self,
+        names: list[str],
+        values: np.ndarray,
+        qualities: np.ndarray | None,
+        latency_s: float,
+        write: bool = False,
+    ):
+        """
+        Record values of several attributes (i.e. replies of a group).
+
+        Parameters
+        ----------
+        names : list[str]
+            Full attribute names.
+        values : numpy.array
+            Values of the attributes (copied).
+        qualities : numpy.array, optional
+            tango.AttrQuality values, VALID if not specified.
+        latency_s : float
+            Duration of the call, in seconds.
+        write : bool
+            True for written values.
+        """
+        if self.enabled:
+            self._put(
+                (
+                    time.time(),
+                    latency_s,
+                    list(names),
+                    np.array(values, dtype=np.float64),
+                    None if qualities is None else np.array(qualities),
+                    write,
+                )
+            )
+
+    def stats(self) -> dict:
+        """
+        Return the number of recorded attributes, of written records and of
+        calls dropped because the queue was full.
+        """
+        return {
+            "attributes": len(self._names),
+            "records": self._nb_records,
+            "dropped": self._nb_dropped,
+        }
+
+    def _put(self, entry: tuple):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if self._nb_dropped == 0:
+                logger.log(
+                    logging.WARNING,
+                    "Recording to %s cannot keep up, calls are dropped",
+                    self._path,
+                )
+            self._nb_dropped += 1
+
+    def _write_loop(self):
+        with (
+            open(self._path, "ab") as log,
+            open(_names_path(self._path), "a", encoding="utf-8") as names,
+        ):
+            if log.tell() == 0:
+                log.write(MAGIC + struct.pack("<II", VERSION, RECORD_DTYPE.itemsize))
+            stopped = False
+            while not stopped:
+                batch = [self._queue.get()]
+                while len(batch) < _BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                rows = []
+                for entry in batch:
+                    if entry is None:
+                        stopped = True
+                        continue
+                    try:
+                        rows.extend(self._decode(entry, names))
+                    except Exception as ex:
+                        # A bad entry must not stop the recording
+                        logger.log(logging.WARNING, "Cannot record %s: %s", entry, ex)
+                if len(rows) > 0:
+                    log.write(np.array(rows, dtype=RECORD_DTYPE).tobytes())
+                    self._nb_records += len(rows)
+                names.flush()
+                log.flush()
+
+    def _index(self, name: str, names) -> int:
+        index = self._names.get(name)
+        if index is None:
+            index = self._names[name] = len(self._names)
+            names.write(name + "\n")
+        return index
+
+    @staticmethod
+    def _scalar(value: Any) -> tuple[float, int]:
+        # Value and flags of a record
+        try:
+            return float(value), 0
+        except (TypeError, ValueError):
+            return np.nan, FLAG_NOT_SCALAR
+
+    def _decode(self, entry: tuple, names) -> list[tuple]:
+        t, latency, device_name, operation, args, result = entry
+        if isinstance(device_name, list):
+            # record_values(): attribute names, values, qualities and write flag
+            values, qualities, write = operation, args, result
+            flags = FLAG_WRITE if write else 0
+            return [
+                (
+                    t,
+                    latency,
+                    self._index(name, names),
+                    value,
+                    _VALID if qualities is None else qualities[position],
+                    flags,
+                )
+                for position, (name, value) in enumerate(zip(device_name, values))
+            ]
+
+        if operation in ("write_attribute", "write_attribute_asynch"):
+            attr_values = [(args[0], args[1])]
+        elif operation in ("write_attributes", "write_attributes_asynch"):
+            attr_values = args[0]
+        elif operation == "read_attribute":
+            attr_values = [(args[0], result)]
+        elif operation == "read_attributes":
+            attr_values = list(zip(args[0], result))
+        else:
+            return []
+
+        rows = []
+        write = operation.startswith("write")
+        for attr_name, value in attr_values:
+            quality = _VALID
+            if not write:
+                if value is None or value.has_failed:
+                    continue
+                quality = int(value.quality)
+                value = value.value
+            value, flags = self._scalar(value)
+            rows.append(
+                (
+                    t,
+                    latency,
+                    self._index(f"{device_name}/{attr_name}", names),
+                    value,
+                    quality,
+                    flags | (FLAG_WRITE if write else 0),
+                )
+            )
+        return rows
+
+
+class Recording:
+    """
+    Binary log written by a Recorder, records are memory mapped.
+
+    Parameters
+    ----------
+    path : str
+        Path of the binary log.
+
+    Attributes
+    ----------
+    records : numpy.memmap
+        Records (RECORD_DTYPE) in recording order.
+    names : list[str]
+        String table, records['index'] gives the attribute name.
+    """
+
+    def __init__(self, path: str):
+        Recording.check_header(path)
+        nb_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if nb_records > 0:
+            self.records = np.memmap(
+                path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(nb_records,),
+            )
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+        self.names: list[str] = []
+        if os.path.exists(_names_path(path)):
+            with open(_names_path(path), encoding="utf-8") as f:
+                self.names = f.read().splitlines()
+
+    @staticmethod
+    def check_header(path: str):
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+            raise pyaml.PyAMLException(f"{path} is not a PyAML recording")
+        version, record_size = struct.unpack("<II", header[8:])
+        if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise pyaml.PyAMLException(
+                f"Unsupported recording version {version} ({path})"
+            )
+
+    def attribute(self, name: str, write: bool = False) -> np.ndarray:
+        """
+        Return the read (or written) records of an attribute.
+
+        Parameters
+        ----------
+        name : str
+            Full attribute name, the Tango host prefix is ignored.
+        write : bool
+            True for the written values.
+        """
+        indexes = [
+            index
+            for index, recorded in enumerate(self.names)
+            if _strip_host(recorded) == _strip_host(name)
+        ]
+        mask = np.isin(self.records["index"], indexes) & (
+            (self.records["flags"] & FLAG_WRITE) == (FLAG_WRITE if write else 0)
+        )
+        return self.records[mask]
+
+
+class ReplayedDevice(SimulatedDevice):
+    """Device serving the values of a recording."""
+
+    def __init__(self, name: str, replay: "Replay"):
+        super().__init__(name, None, replay._cfg, None)
+        self._replay = replay
+        self._w_values: dict[str, float] = {}
+
+    @property
+    def read_latency(self) -> float:
+        return self._replay.read_latency(self.name)
+
+    def read(self, attr_name: str, t: float) -> SimulatedDeviceAttribute:
+        full_name = f"{self.name}/{attr_name}"
+        record = self._replay.lookup(full_name, t)
+        if record is None:
+            throw_dev_failed(
+                "API_AttrNotFound", f"Attribute {full_name} not recorded", "Replay"
+            )
+        with self.lock:
+            w_value = self._w_values.get(attr_name.lower())
+        if w_value is None:
+            written = self._replay.lookup(full_name, t, write=True)
+            w_value = record["value"] if written is None else written["value"]
+        attr_value = SimulatedDeviceAttribute(
+            attr_name, float(record["value"]), float(w_value), record["timestamp"]
+        )
+        attr_value.quality = tango.AttrQuality.values[int(record["quality"])]
+        return attr_value
+
+    def write(self, attr_name: str, value: float, now: float) -> float:
+        # Writes do not change the replayed readbacks
+        with self.lock:
+            self._w_values[attr_name.lower()] = float(value)
+        return now
+
+
+class Replay(Simulator):
+    """
+    DeviceFactory backend (see DeviceFactory.set_backend()) serving the
+    values of a recording, at real or accelerated speed. Reads return the
+    last value recorded before the replay time. Writes are accepted and
+    only change the setpoints returned by the replayed devices.
+
+    Parameters
+    ----------
+    path : str
+        Path of the binary log.
+    speed : float
+        Replay speed, 2.0 replays the recording twice as fast.
+    latencies : bool
+        Reproduce the mean recorded read latency of each device.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, latencies: bool = False):
+        super().__init__()
+        recording = Recording(path)
+        self._speed = speed
+        self._latencies = latencies
+        self._t0 = (
+            float(recording.records["timestamp"].min())
+            if len(recording.records) > 0
+            else 0.0
+        )
+        self._start = time.time()
+        # Read and write records grouped by attribute, in time order
+        self._series: dict[tuple[str, bool], np.ndarray] = {}
+        self._device_latency: dict[str, float] = {}
+        records = np.asarray(recording.records)
+        records = records[np.lexsort((records["timestamp"], records["index"]))]
+        bounds = np.searchsorted(records["index"], np.arange(len(recording.names) + 1))
+        for index, name in enumerate(recording.names):
+            selected = records[bounds[index] : bounds[index + 1]]
+            write = (selected["flags"] & FLAG_WRITE) != 0
+            key = _strip_host(name)
+            for flag in (False, True):
+                series = selected[write == flag]
+                if len(series) > 0:
+                    previous = self._series.get((key, flag))
+                    if previous is not None:
+                        series = np.sort(
+                            np.concatenate([previous, series]), order="timestamp"
+                        )
+                    self._series[(key, flag)] = series
+            reads = selected[~write]
+            if len(reads) > 0:
+                device = key.rsplit("/", 1)[0]
+                self._device_latency[device] = max(
+                    self._device_latency.get(device, 0.0),
+                    float(reads["latency"].mean()),
+                )
+
+    def rewind(self):
+        """Restart the replay from the beginning of the recording."""
+        self._start = time.time()
+
+    def replay_time(self, t: float | None = None) -> float:
+        """Return the recording time replayed at time t (default now)."""
+        if t is None:
+            t = time.time()
+        return self._t0 + (t - self._start) * self._speed
+
+    def lookup(self, name: str, t: float, write: bool = False) -> np.void | None:
+        """
+        Return the last record of an attribute before the replay time
+        corresponding to t (the first one if t is before it), None if the
+        attribute is not recorded.
+        """
+        series = self._series.get((_strip_host(name), write))
+        if series is None:
+            return None
+        position = np.searchsorted(series["timestamp"], self.replay_time(t), "right")
+        return series[max(position - 1, 0)]
+
+    def read_latency(self, device_name: str) -> float:
+        if not self._latencies:
+            return 0.0
+        return self._device_latency.get(_strip_host(device_name), 0.0) / self._speed
+
+    def device(self, device_name: str) -> ReplayedDevice:
+        key = device_name.lower()
+        with self._lock:
+            device = self._devices.get(key)
+            if device is None:
+                device = self._devices[key] = ReplayedDevice(device_name, self)
+            return device
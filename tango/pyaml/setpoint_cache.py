@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+from numpy import typing as npt
+
+
+class SetpointCache:
+    """
+    Last setpoints commanded to scalar attributes, shared by all elements
+    writing them (attributes and aggregators). Used by the write dead-band to
+    skip writes that would not change a setpoint.
+
+    Each attribute name gets a slot in a numpy array so that aggregators
+    check and update their attributes with vectorized operations. NaN means
+    unknown (never written, write failure or external change).
+
+    Writers that cannot tell their setpoints (group writes) only need to
+    forget them once a dead-band is in use, see deadband_used.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: dict[str, int] = {}
+        self._values = np.full(1024, np.nan)
+        self._skipped = 0
+        self._invalidated = 0
+        self._deadband_used = False
+
+    @property
+    def deadband_used(self) -> bool:
+        """True once an element checked a write dead-band."""
+        return self._deadband_used
+
+    def slot(self, name: str) -> int:
+        """Return the slot of an attribute, allocated on first call."""
+        name = name.lower()
+        with self._lock:
+            slot = self._slots.get(name)
+            if slot is None:
+                slot = len(self._slots)
+                if slot == len(self._values):
+                    self._values = np.concatenate(
+                        [self._values, np.full(len(self._values), np.nan)]
+                    )
+                self._slots[name] = slot
+            return slot
+
+    def slots(self, names: list[str]) -> npt.NDArray[np.intp]:
+        """Return the slots of several attributes."""
+        return np.array([self.slot(name) for name in names], dtype=np.intp)
+
+    def changed(
+        self,
+        slots: npt.NDArray[np.intp],
+        value: npt.NDArray[np.float64],
+        epsilon: npt.NDArray[np.float64],
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Return the mask of the values to write: the ones differing by epsilon
+        or more from the last setpoint, or whose last setpoint is unknown.
+        """
+        with self._lock:
+            if not self._deadband_used:
+                # Setpoints recorded so far may have been changed by group
+                # writes, which were not tracked
+                self._deadband_used = True
+                self._values[:] = np.nan
+            unchanged = np.abs(value - self._values[slots]) < epsilon
+            self._skipped += int(np.count_nonzero(unchanged))
+        return ~unchanged
+
+    def update(
+        self,
+        slots: npt.NDArray[np.intp] | int,
+        value: npt.NDArray[np.float64] | float,
+    ):
+        """Record written setpoints, NaN for unknown ones."""
+        with self._lock:
+            self._values[slots] = value
+
+    def invalidate(self, slots: npt.NDArray[np.intp] | int):
+        """Forget setpoints, next writes are sent."""
+        with self._lock:
+            self._invalidated += np.size(slots)
+            self._values[slots] = np.nan
+
+    def observe(
+        self,
+        slots: npt.NDArray[np.intp] | int,
+        setpoint: npt.NDArray[np.float64] | float | None,
+        epsilon: npt.NDArray[np.float64] | float,
+    ):
+        """
+        Forget the setpoints that were changed by someone else, detected by
+        a read (setpoints differing by epsilon or more from the last write).
+        NaN or None setpoints (failed reads) are ignored.
+        """
+        slots = np.atleast_1d(slots)
+        setpoint = np.atleast_1d(np.asarray(setpoint, dtype=np.float64))
+        with self._lock:
+            changed = np.abs(setpoint - self._values[slots]) >= epsilon
+            if changed.any():
+                self._invalidated += int(np.count_nonzero(changed))
+                self._values[slots[changed]] = np.nan
+
+    def clear(self):
+        with self._lock:
+            self._values[:] = np.nan
+            self._skipped = 0
+            self._invalidated = 0
+            self._deadband_used = False
+
+    def stats(self) -> dict:
+        """
+        Return the number of attributes, of skipped writes and of setpoints
+        invalidated by failures or external changes.
+        """
+        with self._lock:
+            return {
+                "size": len(self._slots),
+                "skipped": self._skipped,
+                "invalidated": self._invalidated,
+            }
@@ -0,0 +1,811 @@
+import asyncio
+import fnmatch
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import tango
+from pydantic import BaseModel
+
+from .tango_pyaml_utils import throw_dev_failed
+
+logger = logging.getLogger(__name__)
+
+
+class AttributeModel(BaseModel):
+    """
+    Model of a simulated attribute.
+
+    Attributes
+    ----------
+    name : str
+        Name of the attribute (e.g., 'current').
+    value : float
+        Initial value.
+    range : tuple(min, max), optional
+        Range of valid setpoints. Use null for -∞ or +∞.
+    writable : bool
+        If false, the attribute is read only.
+    write_latency_ms : float
+        Time between a write and the start of the setpoint change, in milli seconds.
+    settling_time_ms : float
+        Time constant of the first order response of the readback to a
+        setpoint change (magnet dynamics), in milli seconds. 0 for an
+        immediate change.
+    abs_change : float
+        Minimum readback change triggering a change event.
+    """
+
+    name: str
+    value: float = 0.0
+    range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    writable: bool = True
+    write_latency_ms: float = 0.0
+    settling_time_ms: float = 0.0
+    abs_change: float = 1e-9
+
+
+class DeviceModel(BaseModel):
+    """
+    Model of simulated devices.
+
+    Attributes
+    ----------
+    pattern : str
+        Glob pattern of the device names using this model (e.g., 'sr/ps-*/*').
+    attributes : list[AttributeModel]
+        Attributes of the devices.
+    read_latency_ms : float
+        Duration of a read, in milli seconds.
+    latency_jitter_ms : float
+        Maximum deviation (uniform) of the read and write latencies, in
+        milli seconds.
+    failure_rate : float
+        Probability of a request to fail (API_DeviceTimedOut).
+    """
+
+    pattern: str
+    attributes: list[AttributeModel] = []
+    read_latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+
+
+class ConfigModel(BaseModel):
+    """
+    Configuration of the device simulator.
+
+    Attributes
+    ----------
+    devices : list[DeviceModel]
+        Device models, the first model matching a device name applies.
+    default_attributes : bool
+        If true, attributes not described by a model (or devices matching no
+        model) are created on first access as writable attributes set to 0.
+    event_period_ms : int
+        Period at which subscribed attributes are checked for events, in milli seconds.
+    seed : int
+        Seed of the failure injection random generator.
+    """
+
+    devices: list[DeviceModel] = []
+    default_attributes: bool = True
+    event_period_ms: int = 100
+    seed: int = 0
+
+
+def _throw(reason: str, desc: str):
+    throw_dev_failed(reason, desc, "Simulator")
+
+
+class SimulatedNamedDevFailed:
+    """Error of one attribute of a multi-attribute write (tango.NamedDevFailed interface)."""
+
+    def __init__(self, name: str, idx_in_call: int, err_stack: list):
+        self.name = name
+        self.idx_in_call = idx_in_call
+        self.err_stack = err_stack
+
+
+class SimulatedNamedDevFailedList(tango.DevFailed):
+    """
+    Error of a multi-attribute write where some attributes failed
+    (tango.NamedDevFailedList interface).
+    """
+
+    def __init__(self, err_list: list[SimulatedNamedDevFailed]):
+        super().__init__(*[err for failed in err_list for err in failed.err_stack])
+        self.err_list = err_list
+
+
+class SimulatedDeviceAttribute:
+    """Read value of a simulated attribute (tango.DeviceAttribute interface)."""
+
+    def __init__(self, name: str, value: float, w_value: float | None, t: float):
+        self.name = name
+        self.value = value
+        self.w_value = w_value
+        self.quality = tango.AttrQuality.ATTR_VALID
+        self.time = tango.TimeVal.fromtimestamp(t)
+        self.has_failed = False
+        self.data_format = tango.AttrDataFormat.SCALAR
+        self.dim_x = 1
+        self.dim_y = 0
+
+    def get_err_stack(self) -> list:
+        return []
+
+
+class SimulatedAttributeConfig:
+    """Configuration of a simulated attribute (tango.AttributeInfoEx interface)."""
+
+    def __init__(self, model: AttributeModel):
+        self.name = model.name
+        self.writable = (
+            tango.AttrWriteType.READ_WRITE
+            if model.writable
+            else tango.AttrWriteType.READ
+        )
+        self.data_format = tango.AttrDataFormat.SCALAR
+        low, high = model.range if model.range is not None else (None, None)
+        self.min_value = "Not specified" if low is None else str(low)
+        self.max_value = "Not specified" if high is None else str(high)
+
+
+class SimulatedDeviceInfo:
+    """
+    Information of a simulated device (tango.DeviceInfo interface, whose
+    fields are read only). Devices of a domain/family share a server.
+    """
+
+    def __init__(self, device_name: str):
+        self.dev_class = "Simulated"
+        self.dev_type = "Simulated"
+        self.server_id = "Simulator/" + device_name.rsplit("/", 1)[0]
+        self.server_host = "localhost"
+
+
+class SimulatedEventData:
+    """
+    Event sent to subscribers (tango.EventData interface, or
+    tango.AttrConfEventData when attr_conf is given).
+    """
+
+    def __init__(
+        self,
+        device,
+        attr_name: str,
+        attr_value,
+        event: str,
+        attr_conf: SimulatedAttributeConfig | None = None,
+    ):
+        self.device = device
+        self.attr_name = attr_name
+        self.attr_value = attr_value
+        self.attr_conf = attr_conf
+        self.event = event
+        self.err = attr_value is None and attr_conf is None
+        self.errors = []
+
+
+class _SimulatedAttribute:
+    """State of a simulated attribute, the readback follows a first order response."""
+
+    def __init__(self, model: AttributeModel):
+        self.model = model
+        self.w_value = model.value if model.writable else None
+        self._tau = model.settling_time_ms / 1000.0
+        # Trajectory segments: start time, start value and target
+        self._segments: list[tuple[float, float, float]] = [
+            (0.0, model.value, model.value)
+        ]
+
+    def value(self, t: float) -> float:
+        segment = self._segments[0]
+        for s in self._segments:
+            if s[0] > t:
+                break
+            segment = s
+        start, start_value, target = segment
+        if self._tau == 0.0:
+            return target
+        return target + (start_value - target) * math.exp(-(t - start) / self._tau)
+
+    def write(self, value: float, now: float, jitter: float = 0.0) -> float:
+        """
+        Apply a setpoint, return the time at which it takes effect (write
+        latency plus jitter, in s).
+        """
+        low, high = self.model.range if self.model.range is not None else (None, None)
+        if (low is not None and value < low) or (high is not None and value > high):
+            _throw(
+                "API_WAttrOutsideLimit",
+                f"Value {value} out of range [{low}, {high}] for {self.model.name}",
+            )
+        start = now + max(self.model.write_latency_ms / 1000.0 + jitter, 0.0)
+        start_value = self.value(start)
+        # Keep the segment running now and the pending ones starting before this write
+        current = [s for s in self._segments if s[0] <= now][-1:]
+        pending = [s for s in self._segments if now < s[0] < start]
+        self._segments = current + pending + [(start, start_value, value)]
+        self.w_value = value
+        return start
+
+
+class SimulatedDevice:
+    """State of a simulated device."""
+
+    def __init__(self, name: str, model: DeviceModel | None, cfg: ConfigModel, rng):
+        self.name = name
+        self.model = model
+        self._cfg = cfg
+        self._rng = rng
+        self.lock = threading.Lock()
+        self.offline = False
+        self.attributes: dict[str, _SimulatedAttribute] = {}
+        if model is not None:
+            for attr_model in model.attributes:
+                self.attributes[attr_model.name.lower()] = _SimulatedAttribute(
+                    attr_model
+                )
+
+    @property
+    def read_latency(self) -> float:
+        """Duration of a read (in s), jitter included."""
+        if self.model is None:
+            return 0.0
+        return max(self.model.read_latency_ms / 1000.0 + self.jitter(), 0.0)
+
+    def jitter(self) -> float:
+        """Return a random latency deviation, in s."""
+        if self.model is None or self.model.latency_jitter_ms == 0.0:
+            return 0.0
+        jitter = self.model.latency_jitter_ms / 1000.0
+        return self._rng.uniform(-jitter, jitter)
+
+    def attribute(self, attr_name: str) -> _SimulatedAttribute:
+        attr = self.attributes.get(attr_name.lower())
+        if attr is None:
+            if not self._cfg.default_attributes:
+                _throw(
+                    "API_AttrNotFound",
+                    f"Attribute {attr_name} not found on {self.name}",
+                )
+            attr = _SimulatedAttribute(AttributeModel(name=attr_name))
+            self.attributes[attr_name.lower()] = attr
+        return attr
+
+    def check(self):
+        """Raise if the device is offline or if a failure is injected."""
+        if self.offline:
+            _throw("API_CantConnectToDevice", f"Device {self.name} is offline")
+        if (
+            self.model is not None
+            and self.model.failure_rate > 0
+            and self._rng.random() < self.model.failure_rate
+        ):
+            _throw("API_DeviceTimedOut", f"Simulated timeout of {self.name}")
+
+    def read(self, attr_name: str, t: float) -> SimulatedDeviceAttribute:
+        with self.lock:
+            attr = self.attribute(attr_name)
+            return SimulatedDeviceAttribute(
+                attr.model.name, attr.value(t), attr.w_value, t
+            )
+
+    def write(self, attr_name: str, value: float, now: float) -> float:
+        with self.lock:
+            attr = self.attribute(attr_name)
+            if not attr.model.writable:
+                _throw("API_AttrNotWritable", f"Attribute {attr_name} is not writable")
+            return attr.write(float(value), now, self.jitter())
+
+    def write_attributes(
+        self, attr_values: list[tuple[str, float]], now: float
+    ) -> float:
+        """
+        Apply several setpoints, return the time at which the last one takes
+        effect. Like Tango, valid setpoints are applied when others fail and
+        the failed ones are reported with a SimulatedNamedDevFailedList.
+        """
+        start = now
+        failed = []
+        for idx, (attr_name, value) in enumerate(attr_values):
+            try:
+                start = max(start, self.write(attr_name, value, now))
+            except tango.DevFailed as df:
+                failed.append(SimulatedNamedDevFailed(attr_name, idx, list(df.args)))
+        if len(failed) > 0:
+            raise SimulatedNamedDevFailedList(failed)
+        return start
+
+    def config(self, attr_name: str) -> SimulatedAttributeConfig:
+        with self.lock:
+            return SimulatedAttributeConfig(self.attribute(attr_name).model)
+
+    def set_range(
+        self, attr_name: str, attr_range: Tuple[Optional[float], Optional[float]]
+    ):
+        """Change the range of valid setpoints of an attribute."""
+        with self.lock:
+            attr = self.attribute(attr_name)
+            # Models are shared by the devices matching their pattern
+            attr.model = attr.model.model_copy(update={"range": attr_range})
+
+
+class SimulatedDeviceProxy:
+    """
+    In-memory device proxy (tango.DeviceProxy interface) serving a simulated device.
+    """
+
+    def __init__(self, simulator: "Simulator", device: SimulatedDevice):
+        self._simulator = simulator
+        self._device = device
+        self._timeout_ms = 3000
+        # Pending asynchronous calls: reply time and result (or error)
+        self._pending: dict[int, tuple[float, object]] = {}
+        self._lock = threading.Lock()
+
+    def name(self) -> str:
+        return self._device.name
+
+    def info(self) -> "SimulatedDeviceInfo":
+        return SimulatedDeviceInfo(self._device.name)
+
+    def set_timeout_millis(self, timeout: int):
+        self._timeout_ms = timeout
+
+    def get_timeout_millis(self) -> int:
+        return self._timeout_ms
+
+    def ping(self, *args, **kwargs) -> int:
+        self._device.check()
+        return 1
+
+    def state(self) -> tango.DevState:
+        self._device.check()
+        return tango.DevState.ON
+
+    def status(self) -> str:
+        return "The device is in ON state."
+
+    def get_attribute_config(self, attr_names, wait=True):
+        self._device.check()
+        if isinstance(attr_names, (list, tuple)):
+            return [self._device.config(name) for name in attr_names]
+        return self._device.config(attr_names)
+
+    def read_attribute(self, attr_name: str, *args, **kwargs):
+        self._device.check()
+        latency = self._device.read_latency
+        if latency > 0:
+            time.sleep(latency)
+        return self._device.read(attr_name, time.time())
+
+    def read_attributes(self, attr_names: list[str], *args, **kwargs):
+        self._device.check()
+        latency = self._device.read_latency
+        if latency > 0:
+            time.sleep(latency)
+        now = time.time()
+        return [self._device.read(attr_name, now) for attr_name in attr_names]
+
+    def write_attribute(self, attr_name: str, value: float, *args, **kwargs):
+        self._device.check()
+        start = self._device.write(attr_name, value, time.time())
+        delay = start - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def write_attributes(self, attr_values: list[tuple[str, float]], *args, **kwargs):
+        self._device.check()
+        now = time.time()
+        start = self._device.write_attributes(attr_values, now)
+        delay = start - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _send(self, request: Callable[[float], tuple[float, object]]) -> int:
+        # The reply time and the result are computed at send time, the
+        # simulated dynamics being deterministic
+        try:
+            self._device.check()
+            reply_time, result = request(time.time())
+        except tango.DevFailed as df:
+            reply_time, result = time.time(), df
+        call_id = self._simulator.next_call_id()
+        with self._lock:
+            self._pending[call_id] = (reply_time, result)
+        return call_id
+
+    def _reply(self, call_id: int):
+        with self._lock:
+            reply_time, result = self._pending[call_id]
+            if time.time() < reply_time:
+                raise tango.AsynReplyNotArrived()
+            del self._pending[call_id]
+        if isinstance(result, tango.DevFailed):
+            raise result
+        return result
+
+    def read_attribute_asynch(self, attr_name: str, *args, **kwargs) -> int:
+        def request(now: float):
+            t = now + self._device.read_latency
+            return t, self._device.read(attr_name, t)
+
+        return self._send(request)
+
+    def read_attributes_asynch(self, attr_names: list[str], *args, **kwargs) -> int:
+        def request(now: float):
+            t = now + self._device.read_latency
+            return t, [self._device.read(attr_name, t) for attr_name in attr_names]
+
+        return self._send(request)
+
+    def write_attribute_asynch(self, attr_name: str, value: float, *args, **kwargs):
+        return self.write_attributes_asynch([(attr_name, value)])
+
+    def write_attributes_asynch(
+        self, attr_values: list[tuple[str, float]], *args, **kwargs
+    ) -> int:
+        def request(now: float):
+            return self._device.write_attributes(attr_values, now), None
+
+        return self._send(request)
+
+    def cancel_asynch_request(self, call_id: int):
+        with self._lock:
+            self._pending.pop(call_id, None)
+
+    def read_attribute_reply(self, call_id: int, *args, **kwargs):
+        return self._reply(call_id)
+
+    def read_attributes_reply(self, call_id: int, *args, **kwargs):
+        return self._reply(call_id)
+
+    def write_attribute_reply(self, call_id: int, *args, **kwargs):
+        self._reply(call_id)
+
+    def write_attributes_reply(self, call_id: int, *args, **kwargs):
+        self._reply(call_id)
+
+    def subscribe_event(
+        self, attr_name: str, event_type: tango.EventType, cb, *args, **kwargs
+    ) -> int:
+        self._device.check()
+        return self._simulator.subscribe(self, attr_name, event_type, cb)
+
+    def unsubscribe_event(self, event_id: int):
+        self._simulator.unsubscribe(event_id)
+
+
+class SimulatedAsyncioDeviceProxy:
+    """Asyncio green mode version of SimulatedDeviceProxy."""
+
+    def __init__(self, proxy: SimulatedDeviceProxy):
+        self._proxy = proxy
+        self._device = proxy._device
+
+    def __getattr__(self, name):
+        return getattr(self._proxy, name)
+
+    async def read_attribute(self, attr_name: str, *args, **kwargs):
+        self._device.check()
+        latency = self._device.read_latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return self._device.read(attr_name, time.time())
+
+    async def read_attributes(self, attr_names: list[str], *args, **kwargs):
+        self._device.check()
+        latency = self._device.read_latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        now = time.time()
+        return [self._device.read(attr_name, now) for attr_name in attr_names]
+
+    async def write_attribute(self, attr_name: str, value: float, *args, **kwargs):
+        await self.write_attributes([(attr_name, value)])
+
+    async def write_attributes(
+        self, attr_values: list[tuple[str, float]], *args, **kwargs
+    ):
+        self._device.check()
+        now = time.time()
+        start = self._device.write_attributes(attr_values, now)
+        delay = start - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SimulatedGroupReply:
+    """Reply of a simulated group (tango.GroupAttrReply interface)."""
+
+    def __init__(self, dev_name: str, obj_name: str, data=None, error=None):
+        self.dev_name = dev_name
+        self.obj_name = obj_name
+        self._data = data
+        self._error = error
+
+    def has_failed(self) -> bool:
+        return self._error is not None
+
+    def get_data(self):
+        return self._data
+
+    def get_err_stack(self) -> list:
+        return [] if self._error is None else list(self._error.args)
+
+
+class SimulatedGroup:
+    """
+    Group of simulated devices (tango.Group interface). Devices are accessed
+    in parallel: a call lasts as long as the slowest device.
+    """
+
+    def __init__(self, simulator: "Simulator", name: str):
+        self._simulator = simulator
+        self._name = name
+        self._devices: list[SimulatedDevice] = []
+        # Names of the disabled devices, skipped by group calls
+        self._disabled: set[str] = set()
+
+    def get_name(self) -> str:
+        return self._name
+
+    def add(self, device_name: str, *args, **kwargs):
+        self._devices.append(self._simulator.device(device_name))
+
+    def get_device_list(self, *args, **kwargs) -> list[str]:
+        return [device.name for device in self._devices]
+
+    def get_size(self, *args, **kwargs) -> int:
+        return len(self._devices)
+
+    def enable(self, device_name: str, *args, **kwargs):
+        self._disabled.discard(self._simulator.device(device_name).name)
+
+    def disable(self, device_name: str, *args, **kwargs):
+        self._disabled.add(self._simulator.device(device_name).name)
+
+    def _enabled(self) -> list[SimulatedDevice]:
+        return [device for device in self._devices if device.name not in self._disabled]
+
+    def _wait(self):
+        delay = max([device.read_latency for device in self._enabled()], default=0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def read_attribute(self, attr_name: str, *args, **kwargs):
+        self._wait()
+        now = time.time()
+        replies = []
+        for device in self._enabled():
+            try:
+                device.check()
+                replies.append(
+                    SimulatedGroupReply(
+                        device.name, attr_name, device.read(attr_name, now)
+                    )
+                )
+            except tango.DevFailed as df:
+                replies.append(SimulatedGroupReply(device.name, attr_name, error=df))
+        return replies
+
+    def write_attribute(self, attr_name: str, value: float, *args, **kwargs):
+        replies = []
+        now = time.time()
+        start = now
+        for device in self._enabled():
+            try:
+                device.check()
+                start = max(start, device.write(attr_name, value, now))
+                replies.append(SimulatedGroupReply(device.name, attr_name))
+            except tango.DevFailed as df:
+                replies.append(SimulatedGroupReply(device.name, attr_name, error=df))
+        delay = start - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        return replies
+
+    def write_attribute_asynch(self, attr_name: str, value: float, *args, **kwargs):
+        now = time.time()
+        for device in self._enabled():
+            try:
+                device.check()
+                device.write(attr_name, value, now)
+            except tango.DevFailed:
+                pass
+        return self._simulator.next_call_id()
+
+    def write_attribute_reply(self, call_id: int, *args, **kwargs):
+        return []
+
+    def ping(self, *args, **kwargs) -> bool:
+        for device in self._enabled():
+            device.check()
+        return True
+
+
+class Simulator:
+    """
+    In-process simulated Tango devices, used as a DeviceFactory backend
+    (see DeviceFactory.set_backend()) to run a control system without hardware.
+
+    Parameters
+    ----------
+    cfg : ConfigModel
+        Device models.
+    """
+
+    def __init__(self, cfg: ConfigModel | None = None):
+        self._cfg = cfg if cfg is not None else ConfigModel()
+        self._rng = random.Random(self._cfg.seed)
+        self._devices: dict[str, SimulatedDevice] = {}
+        self._lock = threading.Lock()
+        self._call_ids = itertools.count()
+        self._subscriptions: dict[int, list] = {}
+        self._event_ids = itertools.count(1)
+        self._event_thread: threading.Thread = None
+        self._stop = threading.Event()
+
+    def device(self, device_name: str) -> SimulatedDevice:
+        """Return the state of a simulated device, created on first access."""
+        name = device_name
+        if name.startswith("//"):
+            name = name[2:].split("/", 1)[-1]
+        # The same device with or without Tango host
+        key = name.lower()
+        with self._lock:
+            device = self._devices.get(key)
+            if device is None:
+                model = next(
+                    (
+                        m
+                        for m in self._cfg.devices
+                        if fnmatch.fnmatchcase(name.lower(), m.pattern.lower())
+                    ),
+                    None,
+                )
+                if model is None and not self._cfg.default_attributes:
+                    _throw("API_DeviceNotDefined", f"Device {device_name} not defined")
+                device = SimulatedDevice(device_name, model, self._cfg, self._rng)
+                self._devices[key] = device
+            return device
+
+    def device_proxy(
+        self, device_name: str, green_mode: tango.GreenMode = None
+    ) -> SimulatedDeviceProxy:
+        proxy = SimulatedDeviceProxy(self, self.device(device_name))
+        if green_mode == tango.GreenMode.Asyncio:
+            return SimulatedAsyncioDeviceProxy(proxy)
+        return proxy
+
+    def group(self, name: str) -> SimulatedGroup:
+        return SimulatedGroup(self, name)
+
+    def set_offline(self, device_name: str, offline: bool = True):
+        """Simulate a device server crash (or restart)."""
+        self.device(device_name).offline = offline
+
+    def set_range(
+        self,
+        device_name: str,
+        attr_name: str,
+        attr_range: Tuple[Optional[float], Optional[float]],
+    ):
+        """
+        Change the range of an attribute, ATTR_CONF_EVENT subscribers are
+        notified.
+        """
+        device = self.device(device_name)
+        device.set_range(attr_name, attr_range)
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        for proxy, name, event_type, cb, _ in subscriptions:
+            if (
+                event_type == tango.EventType.ATTR_CONF_EVENT
+                and proxy._device is device
+                and name.lower() == attr_name.lower()
+            ):
+                self._push(cb, self._conf_event(proxy, name))
+
+    def next_call_id(self) -> int:
+        return next(self._call_ids)
+
+    def subscribe(
+        self,
+        proxy: SimulatedDeviceProxy,
+        attr_name: str,
+        event_type: tango.EventType,
+        cb,
+    ) -> int:
+        device = proxy._device
+        event_id = next(self._event_ids)
+        if event_type == tango.EventType.ATTR_CONF_EVENT:
+            # Only sent on configuration changes, see set_range()
+            with self._lock:
+                self._subscriptions[event_id] = [proxy, attr_name, event_type, cb, None]
+            cb(self._conf_event(proxy, attr_name))
+            return event_id
+        attr_value = device.read(attr_name, time.time())
+        with self._lock:
+            self._subscriptions[event_id] = [
+                proxy,
+                attr_name,
+                event_type,
+                cb,
+                attr_value.value,
+            ]
+            if self._event_thread is None:
+                self._stop.clear()
+                self._event_thread = threading.Thread(
+                    target=self._event_loop, name="pyaml-simulator-events", daemon=True
+                )
+                self._event_thread.start()
+        # Like Tango, the current value is sent at subscription time
+        cb(SimulatedEventData(proxy, attr_name, attr_value, str(event_type)))
+        return event_id
+
+    def unsubscribe(self, event_id: int):
+        with self._lock:
+            del self._subscriptions[event_id]
+
+    @staticmethod
+    def _conf_event(proxy: SimulatedDeviceProxy, attr_name: str) -> SimulatedEventData:
+        return SimulatedEventData(
+            proxy,
+            attr_name,
+            None,
+            str(tango.EventType.ATTR_CONF_EVENT),
+            proxy._device.config(attr_name),
+        )
+
+    @staticmethod
+    def _push(cb, event: SimulatedEventData):
+        try:
+            cb(event)
+        except Exception as ex:
+            logger.log(logging.WARNING, "Event callback failed: %s", ex)
+
+    def _event_loop(self):
+        while not self._stop.wait(self._cfg.event_period_ms / 1000.0):
+            with self._lock:
+                subscriptions = list(self._subscriptions.values())
+            now = time.time()
+            for subscription in subscriptions:
+                proxy, attr_name, event_type, cb, last = subscription
+                periodic = event_type == tango.EventType.PERIODIC_EVENT
+                if not periodic and event_type != tango.EventType.CHANGE_EVENT:
+                    continue
+                device = proxy._device
+                if device.offline:
+                    if last is not None:
+                        subscription[4] = None
+                        cb(SimulatedEventData(proxy, attr_name, None, str(event_type)))
+                    continue
+                attr_value = device.read(attr_name, now)
+                changed = (
+                    last is None
+                    or abs(attr_value.value - last)
+                    >= device.attribute(attr_name).model.abs_change
+                )
+                if periodic or changed:
+                    subscription[4] = attr_value.value
+                    self._push(
+                        cb,
+                        SimulatedEventData(
+                            proxy, attr_name, attr_value, str(event_type)
+                        ),
+                    )
+
+    def stop(self):
+        """Stop event emission."""
+        self._stop.set()
+        with self._lock:
+            self._subscriptions.clear()
+            self._event_thread = None
@@ -0,0 +1,274 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pyaml
+from numpy import typing as npt
+
+from .attribute import Attribute
+from .initializer import initialize_attributes
+from .multi_attribute import MultiAttribute
+from .tango_pyaml_utils import (
+    INVALID_QUALITY,
+    OutOfRangeException,
+    WriteFailedException,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Snapshot:
+    """
+    Setpoints of a set of attributes, stored column by column.
+
+    Attributes
+    ----------
+    names : numpy.array
+        Full attribute names.
+    setpoints : numpy.array
+        Setpoints (float64), NaN for attributes that could not be read.
+    readbacks : numpy.array
+        Readbacks (float64) at snapshot time.
+    qualities : numpy.array
+        Readback qualities (int8 tango.AttrQuality values).
+    timestamps : numpy.array
+        Readback timestamps (float64 epoch seconds).
+    time : float
+        Time of the snapshot (epoch seconds).
+    """
+
+    names: npt.NDArray[np.str_]
+    setpoints: npt.NDArray[np.float64]
+    readbacks: npt.NDArray[np.float64]
+    qualities: npt.NDArray[np.int8]
+    timestamps: npt.NDArray[np.float64]
+    time: float
+
+    def save(self, path: str):
+        """Save the snapshot in a compressed NPZ file."""
+        np.savez_compressed(
+            path,
+            names=self.names,
+            setpoints=self.setpoints,
+            readbacks=self.readbacks,
+            qualities=self.qualities,
+            timestamps=self.timestamps,
+            time=np.float64(self.time),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        """Load a snapshot saved by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                names=data["names"],
+                setpoints=data["setpoints"],
+                readbacks=data["readbacks"],
+                qualities=data["qualities"],
+                timestamps=data["timestamps"],
+                time=float(data["time"]),
+            )
+
+
+@dataclass
+class RestoreResult:
+    """
+    Outcome of a snapshot restore.
+
+    Attributes
+    ----------
+    written : int
+        Number of setpoints written.
+    errors : dict[str, pyaml.PyAMLException]
+        Errors indexed by name of the attributes that were not written
+        (unknown attribute, initialization or write failure).
+    mismatches : list[str]
+        Names of the attributes whose setpoint read after the restore does
+        not match the snapshot.
+    duration_s : float
+        Duration of the restore, in seconds.
+    """
+
+    written: int = 0
+    errors: dict[str, pyaml.PyAMLException] = field(default_factory=dict)
+    mismatches: list[str] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    def ok(self) -> bool:
+        return len(self.errors) == 0 and len(self.mismatches) == 0
+
+
+def _aggregate(attributes: list[Attribute]) -> MultiAttribute:
+    aggregator = MultiAttribute()
+    aggregator.add_devices(attributes)
+    return aggregator
+
+
+def take_snapshot(
+    attributes: dict[str, Attribute],
+    timeout_ms: int | None = None,
+    max_workers: int = 16,
+) -> Snapshot:
+    """
+    Read the setpoints of attributes with one asynchronous request per device.
+
+    Parameters
+    ----------
+    attributes : dict[str, Attribute]
+        Attributes indexed by full name.
+    timeout_ms : int, optional
+        Time allowed for the whole read, in milli seconds.
+        Default is the timeout and retry policy of each device.
+    max_workers : int
+        Maximum number of devices initialized concurrently.
+
+    Returns
+    -------
+    Snapshot
+        Attributes that could not be initialized or read have a NaN setpoint.
+    """
+    names = list(attributes.keys())
+    errors = initialize_attributes(list(attributes.values()), max_workers)
+
+    snapshot = Snapshot(
+        names=np.array(names, dtype=np.str_),
+        setpoints=np.full(len(names), np.nan),
+        readbacks=np.full(len(names), np.nan),
+        qualities=np.full(len(names), INVALID_QUALITY, dtype=np.int8),
+        timestamps=np.full(len(names), np.nan),
+        time=time.time(),
+    )
+    indexes = [
+        index
+        for index, name in enumerate(names)
+        if attributes[name].name() not in errors
+    ]
+    if len(indexes) == 0:
+        return snapshot
+    aggregator = _aggregate([attributes[names[index]] for index in indexes])
+    for index, attr_value in zip(indexes, aggregator._read_attributes(timeout_ms)):
+        if attr_value is not None:
+            snapshot.setpoints[index] = attr_value.w_value
+            snapshot.readbacks[index] = attr_value.value
+            snapshot.qualities[index] = int(attr_value.quality)
+            snapshot.timestamps[index] = attr_value.time.totime()
+    return snapshot
+
+
+def restore_snapshot(
+    snapshot: Snapshot,
+    attributes: dict[str, Attribute],
+    batch_size: int = 500,
+    max_writes_per_s: float | None = None,
+    timeout_ms: int | None = None,
+    verify: bool = True,
+    tolerance: float | None = None,
+    max_workers: int = 16,
+) -> RestoreResult:
+    """
+    Write the setpoints of a snapshot.
+
+    Attributes are sorted by device and written by batches, each batch being
+    written with one asynchronous request per device. Setpoints rejected by
+    the write guard of their attribute are reported as errors.
+
+    Parameters
+    ----------
+    snapshot : Snapshot
+        Setpoints to restore, NaN setpoints are skipped.
+    attributes : dict[str, Attribute]
+        Attributes indexed by full name.
+    batch_size : int
+        Number of attributes written per batch.
+    max_writes_per_s : float, optional
+        Maximum write rate, in attributes per second. No limit if not specified.
+    timeout_ms : int, optional
+        Time allowed for each batch, in milli seconds.
+        Default is the timeout and retry policy of each device.
+    verify : bool
+        Read back the setpoints after the restore and report mismatches.
+    tolerance : float, optional
+        Absolute tolerance of the verification. Default is numpy.isclose().
+    max_workers : int
+        Maximum number of devices initialized concurrently.
+
+    Returns
+    -------
+    RestoreResult
+        Number of writes, errors and mismatches.
+    """
+    start = time.monotonic()
+    result = RestoreResult()
+    targets: dict[str, float] = {}
+    for name, value in zip(snapshot.names.tolist(), snapshot.setpoints):
+        if np.isnan(value):
+            continue
+        if name not in attributes:
+            result.errors[name] = pyaml.PyAMLException(
+                f"Attribute {name} is not attached to the control system"
+            )
+            continue
+        targets[name] = value
+
+    errors = initialize_attributes([attributes[name] for name in targets], max_workers)
+    for name in list(targets):
+        if attributes[name].name() in errors:
+            result.errors[name] = errors[attributes[name].name()]
+            del targets[name]
+
+    # Attributes of a device in the same batch as much as possible
+    names = sorted(targets, key=lambda name: attributes[name]._attribute_dev_name)
+    interval = None
+    if max_writes_per_s is not None:
+        interval = batch_size / max_writes_per_s
+    for batch_index, first in enumerate(range(0, len(names), batch_size)):
+        if interval is not None:
+            delay = start + batch_index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        batch = names[first : first + batch_size]
+        aggregator = _aggregate([attributes[name] for name in batch])
+        value = np.array([targets[name] for name in batch])
+        try:
+            try:
+                aggregator._write(value, timeout_ms, deadband=False)
+            except OutOfRangeException as ex:
+                # Nothing written, write the batch without the rejected values
+                rejected = set(ex.names)
+                for name in batch:
+                    if attributes[name].name() in rejected:
+                        result.errors[name] = ex
+                kept = [
+                    index
+                    for index, name in enumerate(batch)
+                    if attributes[name].name() not in rejected
+                ]
+                batch = [batch[index] for index in kept]
+                if len(batch) > 0:
+                    _aggregate([attributes[name] for name in batch])._write(
+                        value[kept], timeout_ms, deadband=False
+                    )
+            result.written += len(batch)
+        except WriteFailedException as ex:
+            result.written += len(batch) - len(ex.errors)
+            result.errors.update(ex.errors)
+
+    if verify:
+        written = [
+            name for name in names if attributes[name].name() not in result.errors
+        ]
+        if len(written) > 0:
+            setpoints = _aggregate([attributes[name] for name in written]).get(
+                timeout_ms
+            )
+            expected = np.array([targets[name] for name in written])
+            if tolerance is None:
+                matching = np.isclose(setpoints, expected)
+            else:
+                matching = np.abs(setpoints - expected) <= tolerance
+            result.mismatches = [name for name, ok in zip(written, matching) if not ok]
+
+    result.duration_s = time.monotonic() - start
+    return result
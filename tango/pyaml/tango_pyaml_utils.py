@@ -1,5 +1,7 @@
+import numpy as np
 import tango
 import pyaml
+import pyaml.control.readback_value
 
 
 def to_float_or_none(s):
@@ -9,6 +11,45 @@ def to_float_or_none(s):
         return None
 
 
+def to_range_array(limits: list) -> np.ndarray:
+    """
+    Convert (min, max) limits, None for unbounded, to a read-only (n, 2)
+    float64 array with -inf and +inf for unbounded limits.
+    """
+    ranges = np.array(
+        [
+            (-np.inf if low is None else low, np.inf if high is None else high)
+            for low, high in limits
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    ranges.flags.writeable = False
+    return ranges
+
+
+def to_range_list(ranges: np.ndarray) -> list[float]:
+    """
+    Flatten a range array to [min0, max0, min1, ...], None for unbounded.
+    """
+    return [None if np.isinf(limit) else limit for limit in ranges.ravel().tolist()]
+
+
+def throw_dev_failed(reason: str, desc: str, origin: str):
+    """
+    Raise a tango.DevFailed exception.
+
+    Parameters
+    ----------
+    reason : str
+        Tango error reason (e.g. API_DeviceTimedOut).
+    desc : str
+        Description of the error.
+    origin : str
+        Origin of the error.
+    """
+    tango.Except.throw_exception(reason, desc, origin)
+
+
 def tango_to_PyAMLException(df: tango.DevFailed) -> pyaml.PyAMLException:
     """
     Convert a Tango DevFailed exception to a PyAMLException.
@@ -24,8 +65,96 @@ def tango_to_PyAMLException(df: tango.DevFailed) -> pyaml.PyAMLException:
         Converted exception including reason, description, origin and severity.
     """
     if len(df.args) > 0:
-        err = df.args[0]
-        message = f"{err.reason}: {err.desc} Origin: {err.origin} Severity: {err.severity.name}"
+        message = _dev_error_message(df.args[0])
     else:
         message = "Unknown tango error!"
     return pyaml.PyAMLException(message)
+
+
+def _dev_error_message(err: tango.DevError) -> str:
+    return (
+        f"{err.reason}: {err.desc} Origin: {err.origin} Severity: {err.severity.name}"
+    )
+
+
+def named_errors(df: tango.DevFailed) -> dict[int, pyaml.PyAMLException] | None:
+    """
+    Return the errors of the attributes that failed in a multi-attribute
+    write (tango.NamedDevFailedList), indexed by position in the call.
+
+    Parameters
+    ----------
+    df : tango.DevFailed
+        Error of a write_attributes call.
+
+    Returns
+    -------
+    dict[int, pyaml.PyAMLException] | None
+        Errors of the failed attributes, None if the error does not detail
+        them (the whole call failed).
+    """
+    err_list = getattr(df, "err_list", None)
+    if err_list is None and len(df.args) > 0:
+        err_list = getattr(df.args[0], "err_list", None)
+    if err_list is None:
+        return None
+    return {
+        failed.idx_in_call: pyaml.PyAMLException(
+            _dev_error_message(failed.err_stack[0])
+            if len(failed.err_stack) > 0
+            else "Unknown tango error!"
+        )
+        for failed in err_list
+    }
+
+
+class WriteFailedException(pyaml.PyAMLException):
+    """
+    Raised when some writes of a multi-attribute write were not applied.
+
+    Attributes
+    ----------
+    errors : dict[str, pyaml.PyAMLException]
+        Errors indexed by name of the attributes that were not applied.
+    """
+
+    def __init__(self, errors: dict[str, pyaml.PyAMLException]):
+        self.errors = errors
+        details = "; ".join([f"{name}: {ex}" for name, ex in errors.items()])
+        super().__init__(f"{len(errors)} attribute(s) not applied. {details}")
+
+    def not_applied(self) -> list[str]:
+        """Return the names of the attributes that were not applied."""
+        return list(self.errors.keys())
+
+
+class OutOfRangeException(pyaml.PyAMLException):
+    """
+    Raised when a write is rejected because values are out of range.
+    Nothing has been written.
+
+    Attributes
+    ----------
+    names : list[str]
+        Names of the attributes whose value is out of range.
+    """
+
+    def __init__(self, names: list[str], details: str):
+        self.names = names
+        super().__init__(
+            f"{len(names)} value(s) out of range, nothing written. {details}"
+        )
+
+
+# PyAML qualities indexed by tango.AttrQuality value (AttrQuality.ATTR_VALID gives Quality.VALID)
+QUALITIES: tuple[pyaml.control.readback_value.Quality, ...] = tuple(
+    pyaml.control.readback_value.Quality[quality.name.rsplit("_", 1)[1]]
+    for quality in sorted(tango.AttrQuality.values.values(), key=int)
+)
+INVALID_QUALITY: int = int(tango.AttrQuality.ATTR_INVALID)
+
+# Record of bulk readbacks: value, tango.AttrQuality value and epoch timestamp (s).
+# QUALITIES[quality] gives the PyAML quality.
+READBACK_DTYPE = np.dtype(
+    [("value", np.float64), ("quality", np.int8), ("timestamp", np.float64)]
+)
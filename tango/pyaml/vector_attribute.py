@@ -0,0 +1,181 @@
+import logging
+
+import numpy as np
+from numpy import typing as npt
+
+from pyaml.control.readback_value import Value
+
+from .attribute import Attribute, ConfigModel
+from .tango_pyaml_utils import *
+
+PYAMLCLASS: str = "VectorAttribute"
+
+logger = logging.getLogger(__name__)
+
+
+class VectorAttribute(Attribute):
+    """
+    Tango SPECTRUM or IMAGE attribute.
+
+    Values are extracted by PyTango as numpy arrays (no intermediate Python
+    lists) and can be copied into preallocated buffers, so that large waveforms
+    can be read periodically without allocations.
+
+    Parameters
+    ----------
+    cfg : ConfigModel
+        Configuration object containing attribute path and units.
+    writable : bool
+        False for read-only attributes.
+    """
+
+    # The write dead-band only applies to scalar attributes
+    _scalar_setpoints: bool = False
+
+    def __init__(self, cfg: ConfigModel, writable=True):
+        super().__init__(cfg, writable)
+
+    def _read_attribute(self) -> tango.DeviceAttribute:
+        if self._event_cache is not None:
+            attr_value = self._event_cache.last_value()
+            if attr_value is not None:
+                return attr_value
+        return self._device_call(
+            self._attribute_dev.read_attribute,
+            self._attr_name,
+            tango.ExtractAs.Numpy,
+        )
+
+    async def _aread_attribute(self) -> tango.DeviceAttribute:
+        device = self._asyncio_device()
+        if self._event_cache is not None:
+            attr_value = self._event_cache.last_value()
+            if attr_value is not None:
+                return attr_value
+        return await self._adevice_call(
+            device.read_attribute, self._attr_name, tango.ExtractAs.Numpy
+        )
+
+    @staticmethod
+    def _to_array(data, out: np.ndarray | None) -> np.ndarray:
+        if out is None:
+            return np.asarray(data)
+        np.copyto(out, data)
+        return out
+
+    def _setpoint(self, attr_value: tango.DeviceAttribute):
+        return attr_value.w_value if self._writable else attr_value.value
+
+    def set(self, value: npt.ArrayLike):
+        """
+        Write an array asynchronously to the Tango attribute.
+
+        Parameters
+        ----------
+        value : numpy.array
+            Value to write, 1D for SPECTRUM and 2D for IMAGE attributes.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the Tango write fails.
+        """
+        super().set(np.asarray(value))
+
+    def set_and_wait(self, value: npt.ArrayLike):
+        """
+        Write an array synchronously to the Tango attribute.
+
+        Parameters
+        ----------
+        value : numpy.array
+            Value to write, 1D for SPECTRUM and 2D for IMAGE attributes.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the Tango write fails.
+        """
+        super().set_and_wait(np.asarray(value))
+
+    def readback(self, out: np.ndarray | None = None) -> Value:
+        """
+        Return the readback array with metadata.
+
+        Parameters
+        ----------
+        out : numpy.array, optional
+            Preallocated buffer receiving the readback, it must have the
+            shape of the attribute.
+
+        Returns
+        -------
+        Value
+            The readback array (out if given) including quality and timestamp.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the Tango read fails.
+        """
+        self._ensure_initialized()
+        logger.log(logging.DEBUG, "Reading %s", self._cfg.attribute)
+        try:
+            attr_value = self._read_attribute()
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+        return Value(
+            self._to_array(attr_value.value, out),
+            QUALITIES[int(attr_value.quality)],
+            attr_value.time.todatetime(),
+        )
+
+    def get(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Get the last written array (readback of read-only attributes).
+
+        Parameters
+        ----------
+        out : numpy.array, optional
+            Preallocated buffer receiving the value, it must have the shape
+            of the attribute.
+
+        Returns
+        -------
+        numpy.array
+            The last written array (out if given).
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            If the Tango read fails.
+        """
+        self._ensure_initialized()
+        try:
+            return self._to_array(self._setpoint(self._read_attribute()), out)
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+
+    async def aset(self, value: npt.ArrayLike):
+        """Asyncio version of set()."""
+        await super().aset(np.asarray(value))
+
+    async def areadback(self, out: np.ndarray | None = None) -> Value:
+        """Asyncio version of readback()."""
+        logger.log(logging.DEBUG, "Reading %s", self._cfg.attribute)
+        try:
+            attr_value = await self._aread_attribute()
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
+        return Value(
+            self._to_array(attr_value.value, out),
+            QUALITIES[int(attr_value.quality)],
+            attr_value.time.todatetime(),
+        )
+
+    async def aget(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Asyncio version of get()."""
+        try:
+            return self._to_array(self._setpoint(await self._aread_attribute()), out)
+        except tango.DevFailed as df:
+            raise tango_to_PyAMLException(df)
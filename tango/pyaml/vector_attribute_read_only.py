@@ -0,0 +1,55 @@
+import logging
+
+from .attribute import ConfigModel
+from .vector_attribute import VectorAttribute
+from .tango_pyaml_utils import *
+
+PYAMLCLASS: str = "VectorAttributeReadOnly"
+
+logger = logging.getLogger(__name__)
+
+
+class VectorAttributeReadOnly(VectorAttribute):
+    """
+    Read-only Tango SPECTRUM or IMAGE attribute.
+
+    Parameters
+    ----------
+    cfg : ConfigModel
+        Configuration model containing attribute path and unit.
+    """
+
+    def __init__(self, cfg: ConfigModel):
+        super().__init__(cfg, False)
+
+    def set(self, value):
+        """
+        Disallowed write operation.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            Always raised because the attribute is read-only.
+        """
+        raise pyaml.PyAMLException(
+            f"Tango attribute {self._cfg.attribute} is not writable."
+        )
+
+    def set_and_wait(self, value):
+        """
+        Disallowed synchronous write operation.
+
+        Raises
+        ------
+        pyaml.PyAMLException
+            Always raised because the attribute is read-only.
+        """
+        raise pyaml.PyAMLException(
+            f"Tango attribute {self._cfg.attribute} is not writable."
+        )
+
+    async def aset(self, value):
+        self.set(value)
+
+    async def aset_and_wait(self, value):
+        self.set_and_wait(value)
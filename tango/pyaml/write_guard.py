@@ -0,0 +1,107 @@
+import logging
+from typing import Literal
+
+import numpy as np
+from numpy import typing as npt
+
+from .tango_pyaml_utils import OutOfRangeException
+
+logger = logging.getLogger(__name__)
+
+# Write guard modes: reject out of range writes, clip values to the range or
+# only log a warning
+WriteGuardMode = Literal["reject", "clip", "warn"]
+
+NO_GUARD: int = 0
+WARN: int = 1
+CLIP: int = 2
+REJECT: int = 3
+
+_MODES: dict[str | None, int] = {
+    None: NO_GUARD,
+    "warn": WARN,
+    "clip": CLIP,
+    "reject": REJECT,
+}
+
+# Maximum number of out of range values detailed in messages
+MAX_DETAILS: int = 10
+
+
+def guard_modes(modes: list[str | None]) -> npt.NDArray[np.int8]:
+    """Convert write guard modes to an array of mode codes."""
+    return np.array([_MODES[mode] for mode in modes], dtype=np.int8)
+
+
+def _details(names: list[str], values, ranges: np.ndarray, indexes) -> str:
+    details = [
+        f"{names[index]}: {values[index]} not in [{ranges[index, 0]}, {ranges[index, 1]}]"
+        for index in indexes[:MAX_DETAILS]
+    ]
+    if len(indexes) > MAX_DETAILS:
+        details.append(f"{len(indexes) - MAX_DETAILS} more")
+    return "; ".join(details)
+
+
+def guard(
+    value: npt.ArrayLike,
+    ranges: np.ndarray,
+    modes: npt.NDArray[np.int8],
+    names: list[str],
+) -> np.ndarray:
+    """
+    Check values against ranges before writing them.
+
+    Parameters
+    ----------
+    value : numpy.array
+        Values to write, one row per attribute (vector attributes have one
+        row of several elements).
+    ranges : numpy.array
+        (n, 2) array of [min, max] rows.
+    modes : numpy.array
+        Write guard mode code of each attribute.
+    names : list[str]
+        Names of the attributes.
+
+    Returns
+    -------
+    numpy.array
+        Values to write, clipped where the mode is clip. The value itself is
+        returned if it is within range.
+
+    Raises
+    ------
+    OutOfRangeException
+        If a value of an attribute in reject mode is out of range.
+    """
+    value = np.asarray(value)
+    # Broadcast the per-attribute limits over the elements of vectors
+    shape = (len(ranges),) + (1,) * (value.ndim - 1)
+    low = ranges[:, 0].reshape(shape)
+    high = ranges[:, 1].reshape(shape)
+    outside = (value < low) | (value > high)
+    if value.ndim > 1:
+        outside = outside.reshape(len(ranges), -1).any(axis=1)
+    outside &= modes != NO_GUARD
+    if not outside.any():
+        return value
+
+    rejected = np.flatnonzero(outside & (modes == REJECT))
+    if len(rejected) > 0:
+        raise OutOfRangeException(
+            [names[index] for index in rejected],
+            _details(names, value, ranges, rejected),
+        )
+    warned = np.flatnonzero(outside & (modes == WARN))
+    if len(warned) > 0:
+        logger.log(
+            logging.WARNING,
+            "Writing out of range values: %s",
+            _details(names, value, ranges, warned),
+        )
+    clipped = outside & (modes == CLIP)
+    if clipped.any():
+        clipped = clipped.reshape(shape)
+        value = np.where(clipped, np.clip(value, low, high), value)
+    return value
@@ -6,14 +6,61 @@ from tango.pyaml.attribute import ConfigModel as AttrCM
 from tango.pyaml.multi_attribute import ConfigModel as MultiAttrCM
 from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
 from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.simulator import ConfigModel as SimulatorCM, Simulator
+
+# Devices served by the simulator fixture, other devices get default attributes
+SIMULATED_DEVICES = """
+event_period_ms: 5
+devices:
+  - pattern: "sys/hung/*"
+    read_latency_ms: 60000
+  - pattern: "sys/stuck/*"
+    attributes:
+      - name: current
+        settling_time_ms: 1.0e+9
+  - pattern: "sys/settling/*"
+    attributes:
+      - name: current
+        settling_time_ms: 5
+  - pattern: "sys/ps/*"
+    attributes:
+      - name: current
+        range: [-10, 10]
+        write_latency_ms: 2
+      - name: voltage
+        range: [0, 100]
+      - name: power
+        range: [0, 50]
+"""
 
 
 @pytest.fixture(autouse=True)
 def clear_device_factory_cache():
-    DeviceFactory()._elements.clear()
+    DeviceFactory().set_backend()
+    DeviceFactory().set_eviction_policy()
+    DeviceFactory().set_timeout_ms(3000)
+    DeviceFactory().set_policies([])
+    DeviceFactory().get_breaker().configure()
+    DeviceFactory().get_breaker().reset()
+    DeviceFactory().get_instrumentation().enable(False)
+    DeviceFactory().get_instrumentation().reset()
+    DeviceFactory().get_recorder().stop()
+    DeviceFactory().get_config_cache().configure()
+    DeviceFactory().get_setpoint_cache().clear()
+    DeviceFactory().reset_stats()
+    DeviceFactory().get_scheduler().set_limits()
+    DeviceFactory().get_scheduler().reset_stats()
     TangoControlSystem._instance = None
 
 
+@pytest.fixture
+def simulator() -> Simulator:
+    simulator = Simulator(SimulatorCM(**yaml.safe_load(SIMULATED_DEVICES)))
+    DeviceFactory().set_backend(simulator)
+    yield simulator
+    simulator.stop()
+
+
 @pytest.fixture
 def config():
     conf = """
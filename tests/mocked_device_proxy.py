@@ -24,6 +24,7 @@ class MockedDeviceAttribute:
         self.name = name
         self.quality = tango.AttrQuality.ATTR_VALID
         self.time = tango.TimeVal.now()
+        self.has_failed = False
         if isinstance(value, np.ndarray):
             if len(value.shape) == 1:
                 self.data_format = tango.AttrDataFormat.SPECTRUM
@@ -39,6 +40,7 @@ class MockedDeviceAttribute:
             self.dim_y = 0
         self.w_dim_x = self.dim_x
         self.w_dim_y = self.dim_y
+        self.err_stack = []
         """
         self.r_dimension : (tuple) Attribute read dimensions.
         self.w_dimension : (tuple) Attribute written dimensions.
@@ -46,6 +48,17 @@ class MockedDeviceAttribute:
         self.nb_written : (int) attribute written total length
         """
 
+    def get_err_stack(self):
+        return self.err_stack
+
+
+class MockedEventData:
+    def __init__(self, device, attr_name, attr_value=None, err=False):
+        self.device = device
+        self.attr_name = attr_name
+        self.attr_value = attr_value
+        self.err = err
+
 
 class MockedDeviceProxy(MagicMock):
     def __init__(self, device_name, *args, **kwargs):
@@ -56,6 +69,7 @@ class MockedDeviceProxy(MagicMock):
             "status": MockedDeviceAttribute("status", ""),
         }
         self.asynch_values = {}
+        self.event_callbacks = {}
 
     def name(self) -> str:
         return self.device_name
@@ -79,7 +93,7 @@ class MockedDeviceProxy(MagicMock):
         val = self.asynch_values.pop(idx)
         return val
 
-    def read_attribute(self, attr_name: str):
+    def read_attribute(self, attr_name: str, extract_as=None):
         if attr_name not in self.values.keys():
             return MockedDeviceAttribute(attr_name, None)
         return self.values[attr_name]
@@ -87,6 +101,10 @@ class MockedDeviceProxy(MagicMock):
     def write_attribute(self, attr_name, value):
         self.values[attr_name] = MockedDeviceAttribute(attr_name, value)
 
+    def write_attributes(self, attr_values):
+        for attr_name, value in attr_values:
+            self.write_attribute(attr_name, value)
+
     def read_attribute_asynch(self, attr_name) -> int:
         asynch_index = 0
         if len(self.asynch_values) > 0:
@@ -94,6 +112,20 @@ class MockedDeviceProxy(MagicMock):
         self.asynch_values[asynch_index] = self.read_attribute(attr_name)
         return asynch_index
 
+    def read_attributes_asynch(self, attr_names) -> int:
+        asynch_index = 0
+        if len(self.asynch_values) > 0:
+            asynch_index = max(self.asynch_values.keys()) + 1
+        self.asynch_values[asynch_index] = [
+            self.read_attribute(attr_name) for attr_name in attr_names
+        ]
+        return asynch_index
+
+    def read_attributes_reply(
+        self, idx, extract_as=None, green_mode=None, wait=True
+    ) -> list[MockedDeviceAttribute]:
+        return self.asynch_values.pop(idx)
+
     def write_attribute_asynch(self, attr_name, value) -> int:
         asynch_index = 0
         if len(self.asynch_values) > 0:
@@ -102,6 +134,21 @@ class MockedDeviceProxy(MagicMock):
         self.asynch_values[asynch_index] = None
         return asynch_index
 
+    def write_attributes_asynch(self, attr_values) -> int:
+        asynch_index = 0
+        if len(self.asynch_values) > 0:
+            asynch_index = max(self.asynch_values.keys()) + 1
+        for attr_name, value in attr_values:
+            self.write_attribute(attr_name, value)
+        self.asynch_values[asynch_index] = None
+        return asynch_index
+
+    def write_attributes_reply(self, idx, green_mode=None, wait=True):
+        self.asynch_values.pop(idx)
+
+    def cancel_asynch_request(self, idx):
+        self.asynch_values.pop(idx, None)
+
     def read_attribute_reply(
         self, idx, extract_as=None, green_mode=None, wait=True
     ) -> MockedDeviceAttribute:
@@ -121,17 +168,44 @@ class MockedDeviceProxy(MagicMock):
         return MockedAttributeInfoEx(attr_name)
 
     def get_attribute_config(self, attr_name, wait=True):
+        if isinstance(attr_name, (list, tuple)):
+            return [self.attribute_query(name) for name in attr_name]
         return self.attribute_query(attr_name)
 
     def attribute_list_query(self):
         pass
 
     def set_timeout_millis(self, timeout: float):
-        pass
+        self.timeout_ms = timeout
+
+    def get_timeout_millis(self) -> int:
+        return self.timeout_ms
 
     def ping(self, green_mode=None, wait=True, timeout=True) -> int:
         return 1
 
+    def info(self):
+        info = MagicMock()
+        info.dev_class = "Mocked"
+        info.server_id = "Mocked/" + self.device_name.rsplit("/", 1)[0]
+        return info
+
+    def subscribe_event(self, attr_name, event_type, cb, *args, **kwargs) -> int:
+        event_id = len(self.event_callbacks) + 1
+        self.event_callbacks[event_id] = (attr_name, cb)
+        # Like Tango, the current value is sent at subscription time
+        cb(MockedEventData(self, attr_name, self.read_attribute(attr_name)))
+        return event_id
+
+    def unsubscribe_event(self, event_id):
+        del self.event_callbacks[event_id]
+
+    def push_event(self, attr_name, value=None, err=False):
+        attr_value = None if err else MockedDeviceAttribute(attr_name, value)
+        for name, cb in list(self.event_callbacks.values()):
+            if name == attr_name:
+                cb(MockedEventData(self, attr_name, attr_value, err))
+
 
 class MockedAttributeProxy(MagicMock):
     def __init__(self, attr_full_name, *args, **kwargs):
@@ -169,3 +243,40 @@ class MockedAttributeProxy(MagicMock):
 
     def ping(self):
         return self.device_proxy.ping()
+
+
+class MockedAsyncioDeviceProxy:
+    """DeviceProxy in asyncio green mode, sharing the state of a synchronous proxy"""
+
+    def __init__(self, proxy: MockedDeviceProxy):
+        self.proxy = proxy
+
+    async def read_attribute(self, attr_name, extract_as=None):
+        return self.proxy.read_attribute(attr_name)
+
+    async def read_attributes(self, attr_names):
+        return [self.proxy.read_attribute(attr_name) for attr_name in attr_names]
+
+    async def write_attribute(self, attr_name, value):
+        self.proxy.write_attribute(attr_name, value)
+
+    async def write_attributes(self, attr_values):
+        self.proxy.write_attributes(attr_values)
+
+    def set_timeout_millis(self, timeout: float):
+        pass
+
+
+class MockedGreenDeviceProxyFactory:
+    """Replaces tango.DeviceProxy, proxies of a device share its state whatever the green mode"""
+
+    def __init__(self, proxy_class=MockedDeviceProxy):
+        self.proxy_class = proxy_class
+        self.devices = {}
+
+    def __call__(self, device_name, green_mode=None):
+        if device_name not in self.devices:
+            self.devices[device_name] = self.proxy_class(device_name)
+        if green_mode == tango.GreenMode.Asyncio:
+            return MockedAsyncioDeviceProxy(self.devices[device_name])
+        return self.devices[device_name]
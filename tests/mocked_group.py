@@ -10,6 +10,9 @@ class MockedGroupReply:
     def has_failed(self):
         return self.err is not None
 
+    def get_err_stack(self):
+        return list(self.err.args) if isinstance(self.err, tango.DevFailed) else []
+
     def __repr__(self):
         return f"<MockedGroupReply device={self.dev_name}, obj_name={self.obj_name}, error={self.err}>"
 
@@ -38,14 +41,30 @@ class MockedGroup(MagicMock):
     def __init__(self, name, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.name = name
-        self.devices = {}
+        self.all_devices = {}
+        self.disabled = set()
         self.asynch_values = {}
 
+    @property
+    def devices(self) -> dict:
+        # Disabled devices are skipped by group calls
+        return {
+            name: dev
+            for name, dev in self.all_devices.items()
+            if name not in self.disabled
+        }
+
     def add(self, device_name):
         proxy = MockedDeviceProxy(device_name)
-        self.devices[device_name] = proxy
+        self.all_devices[device_name] = proxy
         return proxy
 
+    def enable(self, device_name):
+        self.disabled.discard(device_name)
+
+    def disable(self, device_name):
+        self.disabled.add(device_name)
+
     def command_inout(self, command_name, *args, **kwargs):
         replies_id = {}
         replies = []
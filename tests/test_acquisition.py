@@ -0,0 +1,139 @@
+import time
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.acquisition import Acquisition
+from tango.pyaml.attribute import ConfigModel as AttrCM
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import ConfigModel as MultiAttrCM
+from tango.pyaml.multi_vector_attribute import MultiVectorAttribute
+from tango.pyaml.vector_attribute import VectorAttribute
+
+BPMS = ["sr/bpm/c01-1", "sr/bpm/c01-2", "sr/bpm/c02-1"]
+
+
+class MockedCountingDeviceProxy(MockedDeviceProxy):
+    """Each read of tbt_x returns the number of the read"""
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_reads = 0
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        self.nb_reads += 1
+        self.values["tbt_x"] = MockedDeviceAttribute(
+            "tbt_x", np.full(8, float(self.nb_reads))
+        )
+        return super().read_attributes_asynch(attr_names)
+
+
+def bpm_attributes() -> MultiVectorAttribute:
+    return MultiVectorAttribute(
+        MultiAttrCM(attributes=[f"{bpm}/tbt_x" for bpm in BPMS], unit="mm")
+    )
+
+
+def test_acquisition_polling():
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        acq = Acquisition(bpm_attributes(), n_samples=8, history=4, period_ms=1)
+        assert acq.buffer.shape == (3, 8, 4)
+        with acq:
+            frames = []
+            for frame in acq:
+                assert frame.shape == (3, 8)
+                frames.append(frame[0, 0])
+                if len(frames) == 10:
+                    break
+        # Back-pressure: frames are consumed in order, none is lost
+        assert frames == list(np.arange(1.0, 11.0))
+        stats = acq.stats()
+        assert stats["overruns"] == 0
+        assert stats["frames"] - stats["consumed"] <= 4
+
+
+def test_acquisition_back_pressure():
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        acq = Acquisition(bpm_attributes(), n_samples=8, history=3, period_ms=1)
+        acq.start()
+        time.sleep(0.05)
+        # Polling waits for the consumer when the buffer is full
+        assert acq.stats()["frames"] == 3
+        frames = acq.frames(timeout_s=0.5)
+        assert next(frames)[0, 0] == 1.0
+        assert next(frames)[0, 0] == 2.0
+        acq.stop()
+        assert [frame[0, 0] for frame in frames] == [3.0, 4.0]
+
+        # Without back-pressure, old frames are overwritten
+        acq = Acquisition(
+            bpm_attributes(), n_samples=8, history=3, period_ms=1, blocking=False
+        )
+        acq.start()
+        time.sleep(0.05)
+        acq.stop()
+        values = [frame[0, 0] for frame in acq.frames()]
+        assert len(values) == 3
+        assert values == sorted(values)
+        assert acq.stats()["overruns"] > 0
+
+
+def test_acquisition_events(tmp_path):
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        attributes = [VectorAttribute(AttrCM(attribute=f"{bpm}/tbt_x")) for bpm in BPMS]
+        for attribute in attributes:
+            attribute._ensure_initialized()
+            attribute._attribute_dev.write_attribute("tbt_x", np.zeros(8))
+
+        acq = Acquisition(
+            attributes, n_samples=8, history=4, filename=str(tmp_path / "ring.dat")
+        )
+        assert isinstance(acq.buffer, np.memmap)
+        acq.start()
+        # Value sent at subscription time
+        assert acq.stats()["frames"] == 1
+        devices = [DeviceFactory().get_device(bpm) for bpm in BPMS]
+        for index, device in enumerate(devices[:-1]):
+            device.push_event("tbt_x", np.full(8, 10.0 + index))
+        # A frame is complete when all BPMs sent their waveform
+        assert acq.stats()["frames"] == 1
+        devices[-1].push_event("tbt_x", np.full(8, 12.0))
+        assert acq.stats()["frames"] == 2
+        assert np.array_equal(acq.latest()[:, 0], [10.0, 11.0, 12.0])
+
+        # A second waveform of a BPM closes the frame, missing ones are NaN
+        devices[0].push_event("tbt_x", np.zeros(4))
+        assert acq.stats()["errors"] == 1
+        for turn in range(2, 4):
+            for index, device in enumerate(devices[:-1]):
+                device.push_event("tbt_x", np.full(8, turn * 10.0 + index))
+        assert acq.stats()["frames"] == 3
+        assert np.array_equal(acq.latest()[:, 0], [20.0, 21.0, np.nan], equal_nan=True)
+        devices[-1].push_event("tbt_x", np.full(8, 32.0))
+        assert acq.stats()["frames"] == 4
+
+        # Full buffer, events are dropped instead of blocking Tango
+        for turn in range(4, 7):
+            devices[-1].push_event("tbt_x", np.full(8, 0.0))
+        assert acq.stats()["dropped"] == 3
+        frames = acq.frames()
+        assert next(frames)[0, 0] == 0.0
+        # Releases the first frame
+        assert np.array_equal(next(frames)[:, 0], [10.0, 11.0, 12.0])
+        # All BPMs advance together after the dropped waveforms
+        for index, device in enumerate(devices):
+            device.push_event("tbt_x", np.full(8, 40.0 + index))
+        acq.stop()
+
+        frames = [frame[:, 0].copy() for frame in frames]
+        assert len(frames) == 3
+        assert np.array_equal(frames[1], [30.0, 31.0, 32.0])
+        assert np.array_equal(frames[2], [40.0, 41.0, 42.0])
+
+
+def test_acquisition_history():
+    with pytest.raises(pyaml.PyAMLException):
+        Acquisition(bpm_attributes(), n_samples=8, history=1, period_ms=1)
@@ -0,0 +1,240 @@
+import time
+
+import pytest
+import pyaml
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+from tango.pyaml.simulator import (
+    AttributeModel,
+    ConfigModel as SimulatorCM,
+    DeviceModel,
+    SimulatedDeviceProxy,
+    Simulator,
+)
+
+
+class MockedInFlightDeviceProxy(MockedDeviceProxy):
+    """Replies arrive after a few polls, requests in flight are counted per server"""
+
+    in_flight = {}
+    max_in_flight = {}
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.polls = {}
+
+    def _sent(self, idx):
+        server = self.info().server_id
+        count = MockedInFlightDeviceProxy.in_flight.get(server, 0) + 1
+        MockedInFlightDeviceProxy.in_flight[server] = count
+        MockedInFlightDeviceProxy.max_in_flight[server] = max(
+            count, MockedInFlightDeviceProxy.max_in_flight.get(server, 0)
+        )
+        self.polls[idx] = 0
+        return idx
+
+    def _arrived(self, idx):
+        self.polls[idx] += 1
+        if self.polls[idx] < 3:
+            raise tango.AsynReplyNotArrived()
+        MockedInFlightDeviceProxy.in_flight[self.info().server_id] -= 1
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        return self._sent(super().read_attributes_asynch(attr_names))
+
+    def read_attributes_reply(self, idx, *args, **kwargs):
+        self._arrived(idx)
+        return super().read_attributes_reply(idx)
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        return self._sent(super().write_attributes_asynch(attr_values))
+
+    def write_attributes_reply(self, idx, *args, **kwargs):
+        self._arrived(idx)
+        super().write_attributes_reply(idx)
+
+
+def magnets(nb_servers: int, nb_devices: int) -> MultiAttribute:
+    attributes = [
+        f"sys/ps{server}/{device}/current"
+        for device in range(nb_devices)
+        for server in range(nb_servers)
+    ]
+    return MultiAttribute(MultiAttrCM(attributes=attributes))
+
+
+def test_per_server_limit(config_tango_cs_lazy_default):
+    config_tango_cs_lazy_default.max_in_flight_per_server = 2
+    MockedInFlightDeviceProxy.max_in_flight.clear()
+    with patch("tango.DeviceProxy", new=MockedInFlightDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs_lazy_default)
+        ma = magnets(3, 5)
+        values = [float(index) for index in range(len(ma))]
+        ma.set(values)
+        assert list(ma.readback()) == values
+        assert MockedInFlightDeviceProxy.max_in_flight == {
+            "Mocked/sys/ps0": 2,
+            "Mocked/sys/ps1": 2,
+            "Mocked/sys/ps2": 2,
+        }
+        stats = cs.get_scheduler_stats()
+        assert stats["in_flight"] == 0
+        assert stats["queued"] == 0
+        assert stats["max_queued"] == 15
+        assert stats["nb_calls"] == 30
+
+
+def test_global_limit():
+    DeviceFactory().get_scheduler().set_limits(max_in_flight=1)
+    MockedInFlightDeviceProxy.max_in_flight.clear()
+    with patch("tango.DeviceProxy", new=MockedInFlightDeviceProxy):
+        ma = magnets(2, 3)
+        values = [float(index) for index in range(len(ma))]
+        ma.set(values)
+        assert list(ma.get()) == values
+        assert max(MockedInFlightDeviceProxy.max_in_flight.values()) == 1
+        assert sum(MockedInFlightDeviceProxy.in_flight.values()) == 0
+
+
+def test_invalid_limit():
+    with pytest.raises(pyaml.PyAMLException):
+        DeviceFactory().get_scheduler().set_limits(max_in_flight=0)
+
+
+class MockedLateDeviceProxy(MockedDeviceProxy):
+    """Read replies arrive 50 ms after the request, polls are counted"""
+
+    nb_polls = 0
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        self.sent = time.monotonic()
+        return super().read_attributes_asynch(attr_names)
+
+    def read_attributes_reply(self, idx, *args, **kwargs):
+        MockedLateDeviceProxy.nb_polls += 1
+        if time.monotonic() - self.sent < 0.05:
+            raise tango.AsynReplyNotArrived()
+        return super().read_attributes_reply(idx)
+
+
+def test_poll_backoff():
+    MockedLateDeviceProxy.nb_polls = 0
+    with patch("tango.DeviceProxy", new=MockedLateDeviceProxy):
+        ma = magnets(1, 1)
+        ma.set([1.0])
+        assert list(ma.readback()) == [1.0]
+    # About a hundred polls with a fixed 0.5 ms period
+    assert MockedLateDeviceProxy.nb_polls < 40
+
+
+class CountingDeviceProxy(SimulatedDeviceProxy):
+    """Count polls and requests in flight per device server"""
+
+    def _send(self, request) -> int:
+        self._simulator.sent(self.info().server_id)
+        return super()._send(request)
+
+    def _reply(self, call_id: int):
+        self._simulator.nb_polls += 1
+        try:
+            result = super()._reply(call_id)
+        except tango.AsynReplyNotArrived:
+            raise
+        except tango.DevFailed:
+            self._simulator.in_flight[self.info().server_id] -= 1
+            raise
+        self._simulator.in_flight[self.info().server_id] -= 1
+        return result
+
+
+class CountingSimulator(Simulator):
+    def __init__(self, latency_ms: float):
+        super().__init__(
+            SimulatorCM(
+                devices=[
+                    DeviceModel(
+                        pattern="*",
+                        read_latency_ms=latency_ms,
+                        attributes=[
+                            AttributeModel(name="current", write_latency_ms=latency_ms)
+                        ],
+                    )
+                ]
+            )
+        )
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.nb_polls = 0
+
+    def sent(self, server: str):
+        count = self.in_flight.get(server, 0) + 1
+        self.in_flight[server] = count
+        self.max_in_flight[server] = max(count, self.max_in_flight.get(server, 0))
+
+    def device_proxy(self, device_name: str, green_mode=None) -> CountingDeviceProxy:
+        return CountingDeviceProxy(self, self.device(device_name))
+
+
+@pytest.fixture
+def counting_simulator() -> CountingSimulator:
+    simulator = CountingSimulator(latency_ms=2.0)
+    DeviceFactory().set_backend(simulator)
+    return simulator
+
+
+def test_simulated_per_server_limit(counting_simulator, config_tango_cs_lazy_default):
+    config_tango_cs_lazy_default.max_in_flight_per_server = 2
+    cs = TangoControlSystem(config_tango_cs_lazy_default)
+    ma = magnets(3, 5)
+    values = [float(index) for index in range(len(ma))]
+    ma.set(values)
+    assert list(ma.readback()) == values
+    assert counting_simulator.max_in_flight == {
+        "Simulator/sys/ps0": 2,
+        "Simulator/sys/ps1": 2,
+        "Simulator/sys/ps2": 2,
+    }
+    stats = cs.get_scheduler_stats()
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    assert stats["max_queued"] == 15
+    assert stats["nb_calls"] == 30
+
+
+def test_simulated_global_limit(counting_simulator):
+    DeviceFactory().get_scheduler().set_limits(max_in_flight=1)
+    ma = magnets(2, 3)
+    values = [float(index) for index in range(len(ma))]
+    ma.set(values)
+    assert list(ma.get()) == values
+    assert max(counting_simulator.max_in_flight.values()) == 1
+    assert sum(counting_simulator.in_flight.values()) == 0
+
+
+def test_simulated_poll_backoff():
+    # Replies arrive 50 ms after the requests
+    simulator = CountingSimulator(latency_ms=50.0)
+    DeviceFactory().set_backend(simulator)
+    ma = magnets(1, 1)
+    ma.initialize_all()
+    ma[0]._attribute_dev.write_attribute("current", 1.0)
+    simulator.nb_polls = 0
+    assert list(ma.readback()) == [1.0]
+    # About a hundred polls with a fixed 0.5 ms period
+    assert simulator.nb_polls < 40
+
+
+def test_simulated_poll_oldest():
+    simulator = CountingSimulator(latency_ms=20.0)
+    DeviceFactory().set_backend(simulator)
+    ma = magnets(20, 1)
+    ma.initialize_all()
+    simulator.nb_polls = 0
+    ma.readback()
+    # Younger calls are polled once the oldest one arrived, about 200 polls
+    # when all of them are polled
+    assert simulator.nb_polls < 60
@@ -0,0 +1,70 @@
+import asyncio
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from .mocked_group import MockedGroup
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute
+from tango.pyaml.attribute_read_only import AttributeReadOnly
+from tango.pyaml.attribute_list import AttributeList
+from tango.pyaml.multi_attribute import MultiAttribute
+
+
+def test_attribute_asyncio(config):
+    with patch("tango.DeviceProxy", new=MockedGreenDeviceProxyFactory()):
+        attr = Attribute(config)
+
+        async def run():
+            await attr.aset(12.0)
+            return await attr.aget(), await attr.areadback()
+
+        setpoint, readback = asyncio.run(run())
+        assert setpoint == 12.0
+        assert readback == 12.0
+        # Synchronous API still works side by side
+        assert attr.get() == 12.0
+        assert attr._attribute_adev is not attr._attribute_dev
+
+
+def test_attribute_read_only_asyncio(config):
+    with patch("tango.DeviceProxy", new=MockedGreenDeviceProxyFactory()):
+        attr = AttributeReadOnly(config)
+        with pytest.raises(pyaml.PyAMLException):
+            asyncio.run(attr.aset(1.0))
+
+
+def test_multi_attribute_asyncio(config_multi):
+    with patch("tango.DeviceProxy", new=MockedGreenDeviceProxyFactory()):
+        ma = MultiAttribute(config_multi)
+        values = np.array([1.0, 2.0, 3.0, 4.0])
+
+        async def run():
+            timing = await ma.aset_and_wait(values, tolerance=0.1)
+            return timing, await ma.aget(), await ma.areadback()
+
+        timing, setpoints, readbacks = asyncio.run(run())
+        assert timing.nb_polls == 1
+        assert list(setpoints) == list(values)
+        assert list(readbacks) == list(values)
+        assert list(ma.get()) == list(values)
+
+
+def test_attribute_list_asyncio(config_group):
+    factory = MockedGreenDeviceProxyFactory()
+    with (
+        patch("tango.DeviceProxy", new=factory),
+        patch("tango.Group", new=MockedGroup),
+    ):
+        attr_list = AttributeList(config_group)
+
+        async def run():
+            await attr_list.aset_and_wait(5.0)
+            return await attr_list.aget(), await attr_list.areadback()
+
+        setpoints, readbacks = asyncio.run(run())
+        assert list(setpoints) == [5.0] * 4
+        assert list(readbacks) == [5.0] * 4
+        assert factory.devices["sys/tg_test/3"].values["float_scalar"].value == 5.0
@@ -74,6 +74,10 @@ class TestAttributes:
             with pytest.raises(pyaml.PyAMLException) as exc:
                 attr1.get()
             assert exc.value.message == expected_message
+            # The failed attribute stays uninitialized, the check is done again
+            assert not attr1.is_initialized()
+            with pytest.raises(pyaml.PyAMLException):
+                attr1.get()
 
             # Read-only attributes cannot be sets.
             attr = AttributeReadOnly(config)
@@ -0,0 +1,108 @@
+import time
+
+from .mocked_control_system_initialized import MockedControlSystemInitialized
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.controlsystem import TangoControlSystem
+
+
+class MockedCountingDeviceProxy(MockedDeviceProxy):
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_read = 0
+
+    def read_attribute(self, attr_name: str):
+        self.nb_read += 1
+        return super().read_attribute(attr_name)
+
+
+class MockedNoEventDeviceProxy(MockedCountingDeviceProxy):
+    def subscribe_event(self, attr_name, event_type, cb, *args, **kwargs) -> int:
+        raise tango.Except.throw_exception(
+            "API_EventPropertiesNotSet", "no change event configured", "mocked"
+        )
+
+
+def event_config(max_age_ms=1000):
+    return AttrCM(
+        attribute="sys/tg_test/1/float_scalar",
+        unit="A",
+        events=True,
+        event_max_age_ms=max_age_ms,
+    )
+
+
+def test_readback_from_events():
+    with (
+        patch("tango.DeviceProxy", new=MockedCountingDeviceProxy),
+        patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ),
+    ):
+        attr = Attribute(event_config())
+        attr.set_and_wait(1.0)
+        dev = attr._attribute_dev
+        nb_read = dev.nb_read
+
+        dev.push_event("float_scalar", 5.0)
+        assert attr.readback() == 5.0
+        assert attr.get() == 5.0
+        assert dev.nb_read == nb_read
+
+        # Error events invalidate the cache
+        dev.push_event("float_scalar", err=True)
+        assert attr.readback() == 1.0
+        assert dev.nb_read == nb_read + 1
+
+        attr.unsubscribe_events()
+        assert len(dev.event_callbacks) == 0
+
+
+def test_stale_event_falls_back_to_read():
+    with (
+        patch("tango.DeviceProxy", new=MockedCountingDeviceProxy),
+        patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ),
+    ):
+        attr = Attribute(event_config(max_age_ms=10))
+        attr.set_and_wait(1.0)
+        dev = attr._attribute_dev
+        dev.push_event("float_scalar", 5.0)
+        time.sleep(0.02)
+        nb_read = dev.nb_read
+        assert attr.readback() == 1.0
+        assert dev.nb_read == nb_read + 1
+
+
+def test_subscription_failure_falls_back_to_read():
+    with (
+        patch("tango.DeviceProxy", new=MockedNoEventDeviceProxy),
+        patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ),
+    ):
+        attr = Attribute(event_config())
+        attr.set_and_wait(3.0)
+        assert attr.readback() == 3.0
+        assert attr._event_cache is None
+
+
+def test_events_from_control_system(config_tango_cs, config):
+    config_tango_cs.events = True
+    config_tango_cs.event_type = "PERIODIC_EVENT"
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs)
+        attr = cs.attach([Attribute(config)])[0]
+        assert attr._cfg.events
+        assert attr._cfg.event_type == "PERIODIC_EVENT"
+        # Original configuration is left untouched
+        assert config.events is None
+
+        attr.set_and_wait(2.0)
+        attr._attribute_dev.push_event("float_scalar", 7.0)
+        assert attr.readback() == 7.0
@@ -0,0 +1,184 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyaml.control.readback_value
+
+from .mocked_group import *
+from .mocked_control_system_initialized import MockedControlSystemInitialized
+from unittest.mock import patch
+from tango.pyaml.attribute_list import AttributeList, ConfigModel as GrpCM
+from tango.pyaml.simulator import Simulator
+from tango.pyaml.tango_pyaml_utils import READBACK_DTYPE, QUALITIES
+from pyaml.control.readback_value import Quality
+
+ATTRIBUTES = [
+    "sys/tg_test/2/float_scalar",
+    "sys/tg_test/1/double_scalar",
+    "sys/tg_test/1/float_scalar",
+]
+
+
+class MockedFailingGroup(MockedGroup):
+    def read_attribute(self, attr_name) -> list[MockedGroupAttrReply]:
+        replies = super().read_attribute(attr_name)
+        return [
+            MockedGroupAttrReply(r.dev_name, r.obj_name, None, "mocked error")
+            if r.dev_name == "sys/tg_test/1"
+            else r
+            for r in replies
+        ]
+
+
+def write_values(attr_list: AttributeList):
+    attr_list._ensure_initialized()
+    for attribute, value in zip(ATTRIBUTES, [2.0, 10.0, 1.0]):
+        dev_name, attr_name = attribute.rsplit("/", 1)
+        group = attr_list._tango_groups[attr_name]
+        group.devices[dev_name].write_attribute(attr_name, value)
+
+
+def test_group_order():
+    with (
+        patch("tango.Group", new=MockedGroup),
+        patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ),
+    ):
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES, float_values=True))
+        write_values(attr_list)
+        vals = attr_list.readback()
+        assert vals.dtype == np.float64
+        assert list(vals) == [2.0, 10.0, 1.0]
+        assert list(attr_list.get()) == [2.0, 10.0, 1.0]
+
+
+def test_group_value_objects():
+    with patch("tango.Group", new=MockedGroup):
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES))
+        write_values(attr_list)
+        vals = attr_list.readback()
+        assert list(vals) == [2.0, 10.0, 1.0]
+        for val in vals:
+            assert val.quality is pyaml.control.readback_value.Quality.VALID
+            assert val.timestamp is not None
+
+
+def test_group_failed_reply():
+    with patch("tango.Group", new=MockedFailingGroup):
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES, float_values=True))
+        write_values(attr_list)
+        vals = attr_list.readback()
+        assert vals[0] == 2.0
+        assert np.isnan(vals[1]) and np.isnan(vals[2])
+
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES))
+        write_values(attr_list)
+        vals = attr_list.readback()
+        assert vals[0] == 2.0 and vals[0].quality is Quality.VALID
+        assert vals[1] is None and vals[2] is None
+
+
+def test_group_bulk_readback():
+    with patch("tango.Group", new=MockedFailingGroup):
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES))
+        write_values(attr_list)
+        result = attr_list.bulk_readback()
+        assert result.dtype == READBACK_DTYPE
+        assert result["value"][0] == 2.0
+        assert list(result["quality"]) == [
+            int(tango.AttrQuality.ATTR_VALID),
+            int(tango.AttrQuality.ATTR_INVALID),
+            int(tango.AttrQuality.ATTR_INVALID),
+        ]
+        assert QUALITIES[result["quality"][0]] is Quality.VALID
+        assert result["timestamp"][0] > 0
+
+
+def write_simulated_values(simulator: Simulator, attr_list: AttributeList):
+    attr_list._ensure_initialized()
+    for attribute, value in zip(ATTRIBUTES, [2.0, 10.0, 1.0]):
+        dev_name, attr_name = attribute.rsplit("/", 1)
+        simulator.device(dev_name).write(attr_name, value, time.time())
+
+
+def test_simulated_group_order(simulator):
+    with patch(
+        "tango.pyaml.controlsystem.TangoControlSystem",
+        new=MockedControlSystemInitialized,
+    ):
+        attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES, float_values=True))
+        write_simulated_values(simulator, attr_list)
+        vals = attr_list.readback()
+        assert vals.dtype == np.float64
+        assert list(vals) == [2.0, 10.0, 1.0]
+        assert list(attr_list.get()) == [2.0, 10.0, 1.0]
+
+
+def test_simulated_group_value_objects(simulator):
+    attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES))
+    write_simulated_values(simulator, attr_list)
+    vals = attr_list.readback()
+    assert list(vals) == [2.0, 10.0, 1.0]
+    for val in vals:
+        assert val.quality is pyaml.control.readback_value.Quality.VALID
+        assert val.timestamp is not None
+
+
+def test_simulated_group_failed_reply(simulator):
+    attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES, float_values=True))
+    write_simulated_values(simulator, attr_list)
+    simulator.set_offline("sys/tg_test/1")
+    vals = attr_list.readback()
+    assert vals[0] == 2.0
+    assert np.isnan(vals[1]) and np.isnan(vals[2])
+
+
+def test_simulated_group_bulk_readback(simulator):
+    attr_list = AttributeList(GrpCM(attributes=ATTRIBUTES))
+    write_simulated_values(simulator, attr_list)
+    simulator.set_offline("sys/tg_test/1")
+    result = attr_list.bulk_readback()
+    assert result.dtype == READBACK_DTYPE
+    assert result["value"][0] == 2.0
+    assert list(result["quality"]) == [
+        int(tango.AttrQuality.ATTR_VALID),
+        int(tango.AttrQuality.ATTR_INVALID),
+        int(tango.AttrQuality.ATTR_INVALID),
+    ]
+    assert QUALITIES[result["quality"][0]] is Quality.VALID
+    assert result["timestamp"][0] > 0
+
+
+def test_group_concurrent_reads(simulator):
+    # Setpoints of stuck devices stay away from their readbacks
+    attr_list = AttributeList(
+        GrpCM(
+            attributes=[f"sys/stuck/{i}/current" for i in range(4)],
+            float_values=True,
+        )
+    )
+    attr_list.set(5.0)
+    store = attr_list._store
+
+    def slow_store(*args):
+        time.sleep(0.0001)
+        store(*args)
+
+    attr_list._store = slow_store
+
+    def read(setpoint: bool) -> list:
+        return [
+            attr_list.get() if setpoint else attr_list.readback() for _ in range(50)
+        ]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        setpoints, readbacks = executor.map(read, [True, False])
+    assert all(list(values) == [5.0] * 4 for values in setpoints)
+    assert all((values < 1.0).all() for values in readbacks)
+
+    # Results are not overwritten by the next reads
+    previous = attr_list.bulk_readback()
+    attr_list.get()
+    assert (previous["value"] < 1.0).all()
@@ -1,7 +1,12 @@
+import numpy as np
+import pytest
+
 from .mocked_device_proxy import *
 
 from unittest.mock import patch
-from tango.pyaml.attribute import Attribute
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList
+from tango.pyaml.multi_attribute import MultiAttribute
 from .mocked_control_system_initialized import MockedControlSystemInitialized
 
 
@@ -83,3 +88,78 @@ def test_attribute_range_by_device_min_only(config):
         assert attr_range is not None
         assert len(attr_range) == 2
         assert attr_range[0] == -10 and attr_range[1] == None
+
+
+class MockedDeviceRangeProxy(MockedDeviceProxy):
+    """Range [-n, n] for device n, configuration requests are counted"""
+
+    nb_requests = 0
+
+    def attribute_query(self, name):
+        MockedDeviceRangeProxy.nb_requests += 1
+        limit = self.device_name.rsplit("/", 1)[1]
+        return MockedAttributeInfoEx(
+            name, tango.AttrWriteType.READ_WRITE, f"-{limit}", limit
+        )
+
+
+def test_attribute_range_cached(config):
+    with patch("tango.DeviceProxy", new=MockedMinMaxAttrDeviceProxy):
+        attr = Attribute(config.model_copy(update={"events": True}))
+        attr_range = attr.get_range_array()
+        assert list(attr_range) == [-10.0, 10.0]
+        assert attr.get_range_array() is attr_range
+        with pytest.raises(ValueError):
+            attr_range[0] = 0.0
+
+        # A configuration change event invalidates the range
+        dp = attr._attribute_dev
+        [conf_cb] = [
+            cb
+            for event_id, (name, cb) in dp.event_callbacks.items()
+            if event_id == attr._conf_event_id
+        ]
+        conf_cb(MockedEventData(dp, "float_scalar", None))
+        assert attr.get_range_array() is attr_range
+        event = MockedEventData(dp, "float_scalar", None)
+        event.attr_conf = MockedAttributeInfoEx(
+            "float_scalar", tango.AttrWriteType.READ_WRITE, "-5", ""
+        )
+        conf_cb(event)
+        assert attr.get_range() == [-5.0, None]
+        assert list(attr.get_range_array()) == [-5.0, np.inf]
+
+
+def test_aggregator_ranges(config_group, config_multi):
+    with patch("tango.DeviceProxy", new=MockedDeviceRangeProxy):
+        MockedDeviceRangeProxy.nb_requests = 0
+        group = AttributeList(config_group)
+        ranges = group.get_range_array()
+        assert ranges.shape == (4, 2)
+        assert list(ranges[:, 1]) == [1.0, 2.0, 3.0, 4.0]
+        assert group.get_range() == [-1.0, 1.0, -2.0, 2.0, -3.0, 3.0, -4.0, 4.0]
+        assert group.get_range_array() is ranges
+        assert MockedDeviceRangeProxy.nb_requests == 4
+
+        group = AttributeList(config_group.model_copy(update={"range": (0.0, None)}))
+        assert group.get_range() == [0.0, None] * 4
+
+        ma = MultiAttribute(config_multi)
+        ranges = ma.get_range_array()
+        assert list(ranges[:, 0]) == [-1.0, -2.0, -3.0, -4.0]
+        assert ma.get_range_array() is ranges
+        assert MockedDeviceRangeProxy.nb_requests == 8
+
+        # Invalidating an attribute range rebuilds the aggregated ranges
+        ma[0].invalidate_range()
+        assert ma.get_range_array() is not ranges
+        assert np.array_equal(ma.get_range_array(), ranges)
+
+        # Only the ranges of the aggregated attributes are checked
+        ranges = ma.get_range_array()
+        group_ranges = group.get_range_array()
+        Attribute(AttrCM(attribute="sys/tg_test/9/float_scalar")).invalidate_range()
+        assert ma.get_range_array() is ranges
+        assert group.get_range_array() is group_ranges
+        Attribute(AttrCM(attribute=config_group.attributes[0])).invalidate_range()
+        assert group.get_range_array() is not group_ranges
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList, ConfigModel as GrpCM
+from tango.pyaml.circuit_breaker import CircuitBreaker
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+from tango.pyaml.tango_pyaml_utils import INVALID_QUALITY, WriteFailedException
+
+
+class MockedDownDeviceProxy(MockedDeviceProxy):
+    """Requests to devices in the down set time out"""
+
+    down = set()
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_requests = 0
+
+    def _request(self, reason="API_DeviceTimedOut"):
+        self.nb_requests += 1
+        if self.device_name in MockedDownDeviceProxy.down:
+            tango.Except.throw_exception(reason, "mocked timeout", "mocked")
+
+    def read_attribute(self, attr_name: str):
+        self._request()
+        return super().read_attribute(attr_name)
+
+    def write_attribute(self, attr_name, value):
+        self._request("API_WAttrOutsideLimit")
+        super().write_attribute(attr_name, value)
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        self._request()
+        return super().read_attributes_asynch(attr_names)
+
+    def ping(self, *args, **kwargs) -> int:
+        self._request()
+        return 1
+
+
+def wait_closed(device_name: str):
+    breaker = DeviceFactory().get_breaker()
+    start = time.monotonic()
+    while breaker.is_open(device_name) and time.monotonic() - start < 2.0:
+        time.sleep(0.005)
+    assert not breaker.is_open(device_name)
+
+
+def test_attribute_breaker(config_tango_cs):
+    config_tango_cs.breaker_threshold = 2
+    config_tango_cs.breaker_ping_period_s = 0.01
+    MockedDownDeviceProxy.down = {"sys/tg_test/1"}
+    with patch("tango.DeviceProxy", new=MockedDownDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs)
+        attr = Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))
+        for _ in range(2):
+            with pytest.raises(pyaml.PyAMLException):
+                attr.readback()
+        dev = attr._attribute_dev
+        nb_requests = dev.nb_requests
+        with pytest.raises(pyaml.PyAMLException, match="circuit breaker open"):
+            attr.readback()
+        assert dev.nb_requests <= nb_requests + 1  # Only pings
+        assert cs.get_breaker_stats()["open"] == ["sys/tg_test/1"]
+        assert not attr.check_device_availability()
+
+        MockedDownDeviceProxy.down = set()
+        wait_closed("sys/tg_test/1")
+        attr.set_and_wait(2.0)
+        assert attr.readback() == 2.0
+        stats = cs.get_breaker_stats()
+        assert stats["nb_opened"] == 1
+        assert stats["nb_closed"] == 1
+        assert stats["nb_rejected"] >= 1
+
+
+def test_other_errors_do_not_open_breaker():
+    DeviceFactory().get_breaker().configure(threshold=1)
+    MockedDownDeviceProxy.down = {"sys/tg_test/1"}
+    with patch("tango.DeviceProxy", new=MockedDownDeviceProxy):
+        attr = Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))
+        attr._ensure_initialized()
+        with pytest.raises(pyaml.PyAMLException):
+            attr.set_and_wait(100.0)
+        assert not DeviceFactory().get_breaker().is_open("sys/tg_test/1")
+    MockedDownDeviceProxy.down = set()
+
+
+def test_aggregator_breaker():
+    DeviceFactory().get_breaker().configure(threshold=1, ping_period_s=10.0)
+    with patch("tango.DeviceProxy", new=MockedDownDeviceProxy):
+        ma = MultiAttribute(
+            MultiAttrCM(attributes=["sys/ps/1/current", "sys/ps/2/current"])
+        )
+        ma.set([1.0, 2.0])
+        MockedDownDeviceProxy.down = {"sys/ps/2"}
+        # Failed devices are degraded instead of failing the whole read
+        vals = ma.readback()
+        assert vals[0] == 1.0 and np.isnan(vals[1])
+        nb_requests = ma[1]._attribute_dev.nb_requests
+
+        # Unavailable devices are not requested anymore
+        vals = ma.readback()
+        assert vals[0] == 1.0 and np.isnan(vals[1])
+        result = ma.bulk_readback()
+        assert result["quality"][1] == INVALID_QUALITY
+        assert ma[1]._attribute_dev.nb_requests == nb_requests
+    MockedDownDeviceProxy.down = set()
+
+
+def test_attribute_list_breaker(simulator):
+    breaker = DeviceFactory().get_breaker()
+    breaker.configure(threshold=2, ping_period_s=0.01)
+    attributes = ["sys/ps/1/current", "sys/ps/2/current"]
+    group = AttributeList(GrpCM(attributes=attributes, float_values=True))
+    group.set_and_wait(1.0)
+    simulator.set_offline("sys/ps/2")
+    for _ in range(2):
+        vals = group.readback()
+        assert vals[0] == 1.0 and np.isnan(vals[1])
+    assert breaker.is_open("sys/ps/2")
+
+    # Unavailable devices are skipped by the groups
+    with pytest.raises(WriteFailedException) as ex:
+        group.set_and_wait(2.0)
+    assert ex.value.not_applied() == ["sys/ps/2/current"]
+    assert group.readback()[0] == 2.0
+    vals = asyncio.run(group.areadback())
+    assert vals[0] == 2.0 and np.isnan(vals[1])
+    assert breaker.stats()["nb_rejected"] >= 3
+
+    simulator.set_offline("sys/ps/2", False)
+    wait_closed("sys/ps/2")
+    group.set_and_wait(3.0)
+    assert list(group.readback()) == [3.0, 3.0]
+
+
+def test_breaker_reset_stops_pings():
+    def ping(device_name: str):
+        time.sleep(0.005)
+        tango.Except.throw_exception("API_DeviceTimedOut", "mocked timeout", "ping")
+
+    breaker = CircuitBreaker(ping)
+    breaker.configure(threshold=1, ping_period_s=0.001)
+    breaker.record_failure("sys/tg_test/1")
+    thread = breaker._thread
+    assert thread.is_alive()
+    breaker.reset()
+    # The ping thread is over once reset() returns
+    assert not thread.is_alive()
+    assert breaker.stats()["open"] == []
+    breaker.record_failure("sys/tg_test/1")
+    assert breaker._thread is not thread
+    breaker.stop()
+    assert breaker.stats()["open"] == ["sys/tg_test/1"]
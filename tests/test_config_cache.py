@@ -0,0 +1,114 @@
+import json
+import time
+
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_read_only import AttributeReadOnly
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+
+
+class MockedCountingDeviceProxy(MockedDeviceProxy):
+    """Count the configuration requests, devices named 'ro' are read-only"""
+
+    nb_requests = 0
+
+    def attribute_query(self, attr_name):
+        MockedCountingDeviceProxy.nb_requests += 1
+        writable = tango.AttrWriteType.READ_WRITE
+        if self.device_name.endswith("/ro"):
+            writable = tango.AttrWriteType.READ
+        return MockedAttributeInfoEx(attr_name, writable, "-10", "10")
+
+
+def start(path: str, lazy: bool = True, version: str = None, ttl: float = 3600):
+    MockedCountingDeviceProxy.nb_requests = 0
+    TangoControlSystem._instance = None
+    cs = TangoControlSystem(
+        CsCM(
+            name="cache_cs",
+            tango_host="tangodb:10000",
+            lazy_devices=lazy,
+            config_cache=path,
+            config_cache_version=version,
+            config_cache_ttl_s=ttl,
+        )
+    )
+    DeviceFactory().clear()
+    return cs
+
+
+def attributes(nb: int) -> list:
+    return [
+        Attribute(AttrCM(attribute=f"sr/ps/{i % 10}/current{i}")) for i in range(nb)
+    ]
+
+
+def test_config_cache(tmp_path):
+    path = str(tmp_path / "configs.json")
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        start(path, lazy=False).attach(attributes(50))
+        assert MockedCountingDeviceProxy.nb_requests == 50
+        with open(path) as f:
+            entries = json.load(f)["entries"]
+        assert "tangodb:10000/sr/ps/3/current13" in entries
+
+        # Next start needs no configuration request
+        cs = start(path, lazy=False)
+        devices = cs.attach(attributes(50))
+        assert MockedCountingDeviceProxy.nb_requests == 0
+        assert DeviceFactory().get_config_cache().stats()["hits"] == 50
+        devices[7].set(2.0)
+        assert devices[7].get() == 2.0
+        assert devices[7]._attr_config.writable == tango.AttrWriteType.READ_WRITE
+        assert devices[7]._attr_config.min_value == "-10"
+
+        # Lazy attributes use the cache too
+        cs = start(path)
+        attr = cs.attach([Attribute(AttrCM(attribute="sr/ps/1/current1"))])[0]
+        attr.readback()
+        ro = cs.attach([AttributeReadOnly(AttrCM(attribute="sr/ps/ro/current0"))])[0]
+        ro.readback()
+        assert MockedCountingDeviceProxy.nb_requests == 1
+
+        # Writability is checked against the cached configuration
+        cs = start(path)
+        attr = cs.attach([Attribute(AttrCM(attribute="sr/ps/ro/current0"))])[0]
+        with pytest.raises(pyaml.PyAMLException):
+            attr.set(1.0)
+        assert MockedCountingDeviceProxy.nb_requests == 0
+
+
+def test_config_cache_invalidation(tmp_path):
+    path = str(tmp_path / "configs.json")
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        start(path, lazy=False, version="v1").attach(attributes(10))
+        assert MockedCountingDeviceProxy.nb_requests == 10
+
+        # Another version discards the cache
+        start(path, lazy=False, version="v2").attach(attributes(10))
+        assert MockedCountingDeviceProxy.nb_requests == 10
+        start(path, lazy=False, version="v2").attach(attributes(10))
+        assert MockedCountingDeviceProxy.nb_requests == 0
+
+        # Stale entries are served and refreshed in the background
+        start(path, lazy=False, version="v2", ttl=0.0).attach(attributes(10))
+        cache = DeviceFactory().get_config_cache()
+        deadline = time.monotonic() + 5.0
+        while cache.stats()["refreshed"] < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.stats()["refreshed"] == 10
+        assert MockedCountingDeviceProxy.nb_requests == 10
+
+
+def test_config_cache_bad_file(tmp_path):
+    path = tmp_path / "configs.json"
+    path.write_text("not json")
+    with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+        start(str(path), lazy=False).attach(attributes(5))
+        assert MockedCountingDeviceProxy.nb_requests == 5
+    assert len(json.loads(path.read_text())["entries"]) == 5
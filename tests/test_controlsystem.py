@@ -1,11 +1,14 @@
 import logging
 
+import tango
+
 from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
 
 
 from .mocked_device_proxy import MockedDeviceProxy
 from unittest.mock import patch
-from tango.pyaml.attribute import Attribute
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
 from tango.pyaml import __version__
 
 
@@ -32,3 +35,60 @@ def test_laziness_init_cs_attribute(config_tango_cs_lazy_default, config):
         attr.set_and_wait(42.0)
         mock_ctor.assert_called_once()
         assert attr.get() == 42.0
+
+
+class MockedConfigCountingDeviceProxy(MockedDeviceProxy):
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_config_calls = 0
+
+    def get_attribute_config(self, attr_name, wait=True):
+        self.nb_config_calls += 1
+        if "unknown" in attr_name:
+            raise tango.Except.throw_exception(
+                "API_AttrNotFound", "attribute not found", "mocked"
+            )
+        return super().get_attribute_config(attr_name, wait)
+
+
+def test_bulk_initialization(config_tango_cs_lazy_default):
+    names = [
+        "sys/tg_test/1/float_scalar",
+        "sys/tg_test/1/double_scalar",
+        "sys/tg_test/2/float_scalar",
+        "sys/tg_test/2/unknown",
+    ]
+    with patch("tango.DeviceProxy", new=MockedConfigCountingDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs_lazy_default)
+        attrs = cs.attach([Attribute(AttrCM(attribute=name)) for name in names])
+        assert not any([attr.is_initialized() for attr in attrs])
+
+        failures = cs.initialize_devices()
+        assert list(failures.keys()) == ["//tangodb:10000/sys/tg_test/2/unknown"]
+        assert [attr.is_initialized() for attr in attrs] == [True, True, True, False]
+        # One config call for the whole device when all attributes are valid
+        assert attrs[0]._attribute_dev.nb_config_calls == 1
+        assert attrs[0]._attribute_dev is attrs[1]._attribute_dev
+
+
+def test_not_lazy_attach(config_tango_cs, config):
+    with patch("tango.DeviceProxy", side_effect=MockedDeviceProxy) as mock_ctor:
+        cs = TangoControlSystem(config_tango_cs)
+        attr = cs.attach([Attribute(config)])[0]
+        mock_ctor.assert_called_once()
+        assert attr.is_initialized()
+
+
+def test_overridden_settings(caplog, config_tango_cs):
+    TangoControlSystem(config_tango_cs)
+    # The last control system applies the settings shared by the process
+    with caplog.at_level(logging.WARNING):
+        TangoControlSystem(
+            config_tango_cs.model_copy(update={"name": "slow_cs", "timeout_ms": 10000})
+        )
+    assert DeviceFactory().get_timeout_ms() == 10000
+    assert any(
+        "slow_cs overrides the timeout_ms settings of control system test_tango_cs"
+        in record.message
+        for record in caplog.records
+    )
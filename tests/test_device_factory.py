@@ -1,8 +1,172 @@
+import threading
+import time
+
+import tango
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
 from tango.pyaml.device_factory import DeviceFactory
 
 
+class MockedSlowDeviceProxy(MockedDeviceProxy):
+    nb_created = 0
+    lock = threading.Lock()
+
+    def __init__(self, device_name, *args, **kwargs):
+        time.sleep(0.05)
+        with MockedSlowDeviceProxy.lock:
+            MockedSlowDeviceProxy.nb_created += 1
+        super().__init__(device_name, *args, **kwargs)
+
+
+class MockedSlowInfoDeviceProxy(MockedDeviceProxy):
+    nb_info = 0
+    lock = threading.Lock()
+
+    def info(self):
+        time.sleep(0.02)
+        with MockedSlowInfoDeviceProxy.lock:
+            MockedSlowInfoDeviceProxy.nb_info += 1
+        return super().info()
+
+
+class MockedMissingDeviceProxy(MockedDeviceProxy):
+    def __init__(self, device_name, *args, **kwargs):
+        if device_name.endswith("missing"):
+            tango.Except.throw_exception(
+                "API_DeviceNotDefined", f"{device_name} not defined", "mocked"
+            )
+        super().__init__(device_name, *args, **kwargs)
+
+
 def test_factory():
     factory1 = DeviceFactory()
     factory2 = DeviceFactory()
 
     assert factory1 is factory2
+
+
+def test_single_flight_creation():
+    MockedSlowDeviceProxy.nb_created = 0
+    with patch("tango.DeviceProxy", new=MockedSlowDeviceProxy):
+        factory = DeviceFactory()
+        proxies = []
+        threads = [
+            threading.Thread(
+                target=lambda: proxies.append(factory.get_device("sys/tg_test/1"))
+            )
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert MockedSlowDeviceProxy.nb_created == 1
+        assert all(p is proxies[0] for p in proxies)
+        stats = factory.stats()
+        assert stats["created"] == 1
+        assert stats["hits"] + stats["misses"] >= 8
+        assert stats["mean_creation_s"] > 0.0
+
+
+class WindowLock:
+    """
+    Pool lock calling a hook after each release, to run another thread right
+    after the proxy creation releases the pool
+    """
+
+    def __init__(self, hook):
+        self._lock = threading.Lock()
+        self._hook = hook
+
+    def __enter__(self):
+        self._lock.acquire()
+
+    def __exit__(self, *args):
+        self._lock.release()
+        self._hook()
+
+
+def test_server_name_resolved_once():
+    MockedSlowInfoDeviceProxy.nb_info = 0
+    with patch("tango.DeviceProxy", new=MockedSlowInfoDeviceProxy):
+        factory = DeviceFactory()
+        servers = []
+        threads = [
+            threading.Thread(
+                target=lambda: servers.append(factory.get_server_name("sys/tg_test/1"))
+            )
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert servers == ["Mocked/sys/tg_test"] * 8
+        assert factory.get_server_name("sys/tg_test/1") == "Mocked/sys/tg_test"
+        assert MockedSlowInfoDeviceProxy.nb_info == 1
+
+
+def test_single_flight_window():
+    MockedSlowDeviceProxy.nb_created = 0
+    factory = DeviceFactory()
+    key = "sys/tg_test/1"
+    proxies = []
+    armed = [True]
+
+    def get_device_in_window():
+        # Proxy created but neither cached nor protected by its key lock
+        if (
+            armed[0]
+            and MockedSlowDeviceProxy.nb_created > 0
+            and key not in factory._elements
+            and key not in factory._key_locks
+        ):
+            armed[0] = False
+            t = threading.Thread(target=lambda: proxies.append(factory.get_device(key)))
+            t.start()
+            t.join()
+
+    pool_lock = factory._pool_lock
+    factory._pool_lock = WindowLock(get_device_in_window)
+    try:
+        with patch("tango.DeviceProxy", new=MockedSlowDeviceProxy):
+            proxies.append(factory.get_device(key))
+    finally:
+        factory._pool_lock = pool_lock
+    assert MockedSlowDeviceProxy.nb_created == 1
+    assert all(p is proxies[0] for p in proxies)
+
+
+def test_lru_eviction():
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        factory = DeviceFactory()
+        factory.set_eviction_policy(max_devices=2)
+        dev1 = factory.get_device("sys/tg_test/1")
+        factory.get_device("sys/tg_test/2")
+        assert factory.get_device("sys/tg_test/1") is dev1
+        factory.get_device("sys/tg_test/3")
+        # sys/tg_test/2 is the least recently used
+        assert factory.stats()["size"] == 2
+        assert factory.stats()["evicted"] == 1
+        assert factory.get_device("sys/tg_test/1") is dev1
+
+
+def test_idle_eviction():
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        factory = DeviceFactory()
+        dev1 = factory.get_device("sys/tg_test/1")
+        time.sleep(0.02)
+        factory.set_eviction_policy(idle_timeout_s=0.01)
+        assert factory.stats()["size"] == 0
+        assert factory.get_device("sys/tg_test/1") is not dev1
+
+
+def test_warmup():
+    with patch("tango.DeviceProxy", new=MockedMissingDeviceProxy):
+        factory = DeviceFactory()
+        errors = factory.warmup(
+            ["sys/tg_test/1", "sys/tg_test/2", "sys/tg_test/missing"]
+        )
+        assert list(errors.keys()) == ["sys/tg_test/missing"]
+        assert factory.stats()["created"] == 2
@@ -0,0 +1,123 @@
+import time
+
+import numpy as np
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.device_policy import DevicePolicy
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+from tango.pyaml.tango_pyaml_utils import WriteFailedException
+
+
+class MockedFlakyDeviceProxy(MockedDeviceProxy):
+    """The first requests sent to flaky devices fail"""
+
+    nb_failures = 2
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_sent = 0
+
+    def _send(self):
+        self.nb_sent += 1
+        if "flaky" in self.device_name and self.nb_sent <= self.nb_failures:
+            tango.Except.throw_exception("API_CommandTimedOut", "busy", "mocked")
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        self._send()
+        return super().write_attributes_asynch(attr_values)
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        self._send()
+        return super().read_attributes_asynch(attr_names)
+
+
+class MockedHungDeviceProxy(MockedDeviceProxy):
+    """Replies of hung devices never arrive"""
+
+    def read_attributes_reply(self, idx, *args, **kwargs):
+        if "hung" in self.device_name:
+            raise tango.AsynReplyNotArrived()
+        return super().read_attributes_reply(idx)
+
+
+def test_policy_matching():
+    policy = DevicePolicy(pattern="SR/PS-*/*", timeout_ms=200)
+    assert policy.matches("sr/ps-qf1/c01")
+    assert policy.matches("//tango-host:10000/sr/ps-qf1/c01")
+    assert not policy.matches("sr/bpm/c01")
+    policy = DevicePolicy(pattern=r"sr/bpm/c\d+", regex=True)
+    assert policy.matches("sr/bpm/c12")
+    assert not policy.matches("sr/bpm/c12-1")
+    assert policy.retry_delay(1) == 0.0
+
+
+def test_policy_timeout_applied():
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        factory = DeviceFactory()
+        factory.set_policies([DevicePolicy(pattern="sr/bpm/*", timeout_ms=200)])
+        assert factory.get_policy("sr/ps/1").timeout_ms == 3000
+        bpm = factory.get_device("sr/bpm/1")
+        assert bpm.get_timeout_millis() == 200
+        factory.set_policies([DevicePolicy(pattern="sr/bpm/*", timeout_ms=100)])
+        assert bpm.get_timeout_millis() == 100
+
+
+def test_policies_from_control_system(config_tango_cs):
+    config_tango_cs.timeout_ms = 1000
+    config_tango_cs.device_policies = [
+        DevicePolicy(pattern="sr/ps-*/*", timeout_ms=10000, retries=1)
+    ]
+    TangoControlSystem(config_tango_cs)
+    assert DeviceFactory().get_policy("sr/ps-qf/1").timeout_ms == 10000
+    assert DeviceFactory().get_policy("sr/ps-qf/1").retries == 1
+    assert DeviceFactory().get_policy("sr/bpm/1").timeout_ms == 1000
+
+
+def test_retries():
+    DeviceFactory().set_policies(
+        [DevicePolicy(pattern="sys/flaky/*", retries=2, backoff_ms=1)]
+    )
+    with patch("tango.DeviceProxy", new=MockedFlakyDeviceProxy):
+        ma = MultiAttribute(
+            MultiAttrCM(attributes=["sys/flaky/1/current", "sys/ps/1/current"])
+        )
+        ma[0]._ensure_initialized()
+        ma[0]._attribute_dev.write_attribute("current", 1.0)
+        ma[1].set_and_wait(2.0)
+        ma[0]._attribute_dev.nb_sent = 0
+        assert list(ma.readback()) == [1.0, 2.0]
+        assert ma[0]._attribute_dev.nb_sent == 3
+
+        # Writes are never sent again
+        ma[0]._attribute_dev.nb_sent = 0
+        with pytest.raises(WriteFailedException) as exc:
+            ma.set([3.0, 4.0])
+        assert exc.value.not_applied() == ["sys/flaky/1/current"]
+        assert ma[0]._attribute_dev.nb_sent == 1
+
+    DeviceFactory().clear()
+    DeviceFactory().set_policies([DevicePolicy(pattern="sys/flaky/*", retries=1)])
+    with patch("tango.DeviceProxy", new=MockedFlakyDeviceProxy):
+        ma = MultiAttribute(
+            MultiAttrCM(attributes=["sys/flaky/1/current", "sys/ps/1/current"])
+        )
+        assert np.isnan(ma.readback()[0])
+        assert ma[0]._attribute_dev.nb_sent == 2
+
+
+def test_fast_devices_fail_fast():
+    DeviceFactory().set_policies([DevicePolicy(pattern="sys/hung/*", timeout_ms=20)])
+    with patch("tango.DeviceProxy", new=MockedHungDeviceProxy):
+        ma = MultiAttribute(
+            MultiAttrCM(attributes=["sys/ps/1/current", "sys/hung/1/current"])
+        )
+        ma.set([1.0, 2.0])
+        start = time.monotonic()
+        vals = ma.readback()
+        assert time.monotonic() - start < 1.0
+        assert vals[0] == 1.0
+        assert np.isnan(vals[1])
@@ -0,0 +1,91 @@
+import pyaml
+import pytest
+
+from .mocked_group import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList, ConfigModel as GrpCM
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.instrumentation import payload_size
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+
+
+class MockedFailingDeviceProxy(MockedDeviceProxy):
+    def write_attribute(self, attr_name, value):
+        if value < 0:
+            tango.Except.throw_exception("API_WAttrOutsideLimit", "negative", "mocked")
+        super().write_attribute(attr_name, value)
+
+
+def test_disabled_by_default():
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        attr = Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))
+        attr.set_and_wait(1.0)
+        assert attr.readback() == 1.0
+        assert DeviceFactory().get_instrumentation().snapshot() == {}
+
+
+def test_attribute_metrics(config_tango_cs):
+    config_tango_cs.instrumentation = True
+    with patch("tango.DeviceProxy", new=MockedFailingDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs)
+        attr = Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))
+        attr.set_and_wait(1.0)
+        with pytest.raises(pyaml.PyAMLException):
+            attr.set_and_wait(-1.0)
+        for _ in range(3):
+            attr.readback()
+
+        metrics = cs.get_metrics()
+        calls = metrics["calls"]["sys/tg_test/1"]
+        assert calls["write_attribute"]["count"] == 2
+        assert calls["write_attribute"]["errors"] == 1
+        read = calls["read_attribute"]
+        assert read["count"] == 3
+        assert read["errors"] == 0
+        assert read["bytes"] > 0
+        assert read["buckets"][float("inf")] == 3
+        assert list(read["buckets"].values()) == sorted(read["buckets"].values())
+        assert "device_pool" in metrics and "breaker" in metrics
+
+
+def test_aggregator_metrics():
+    DeviceFactory().get_instrumentation().enable()
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        ma = MultiAttribute(
+            MultiAttrCM(attributes=["sys/ps/1/current", "sys/ps/1/voltage"])
+        )
+        ma.set([1.0, 2.0])
+        ma.readback()
+    with patch("tango.Group", new=MockedGroup):
+        attr_list = AttributeList(
+            GrpCM(attributes=["sys/tg_test/1/float_scalar"], name="bpms")
+        )
+        attr_list.readback()
+
+    snapshot = DeviceFactory().get_instrumentation().snapshot()
+    assert snapshot["sys/ps/1"]["write_attributes"]["count"] == 1
+    assert snapshot["sys/ps/1"]["read_attributes"]["bytes"] == 16
+    assert snapshot["bpms"]["read_attribute"]["count"] == 1
+
+
+def test_prometheus_export(config_tango_cs):
+    config_tango_cs.instrumentation = True
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs)
+        attr = Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))
+        attr.set_and_wait(1.0)
+        attr.readback()
+        text = cs.export_prometheus()
+    labels = 'device="sys/tg_test/1",operation="read_attribute"'
+    assert "# TYPE pyaml_tango_call_duration_seconds histogram" in text
+    assert f'pyaml_tango_call_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"pyaml_tango_call_duration_seconds_count{{{labels}}} 1" in text
+    assert f"pyaml_tango_call_errors_total{{{labels}}} 0" in text
+
+
+def test_payload_size():
+    assert payload_size(np.zeros(10)) == 80
+    assert payload_size([("current", 1.0), ("voltage", 2.0)]) == 30
+    assert payload_size(MockedDeviceAttribute("current", np.zeros(4))) == 32
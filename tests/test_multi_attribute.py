@@ -1,9 +1,169 @@
+import asyncio
 import random
+import time
+
+import numpy as np
+
+import pytest
+import tango
+import pyaml
 
 from .mocked_control_system_initialized import MockedControlSystemInitialized
-from .mocked_device_proxy import MockedDeviceProxy
+from .mocked_device_proxy import MockedDeviceProxy, MockedGreenDeviceProxyFactory
 from unittest.mock import patch
-from tango.pyaml.multi_attribute import MultiAttribute
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+from tango.pyaml.attribute_read_only import AttributeReadOnly
+from tango.pyaml.attribute import ConfigModel as AttrCM
+from tango.pyaml.tango_pyaml_utils import WriteFailedException
+
+
+class MockedCountingDeviceProxy(MockedDeviceProxy):
+    nb_asynch_reads = 0
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        MockedCountingDeviceProxy.nb_asynch_reads += 1
+        return super().read_attributes_asynch(attr_names)
+
+
+class MockedSlowWriteDeviceProxy(MockedDeviceProxy):
+    """Write replies arrive after a few polls, bad devices refuse writes"""
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.nb_polls = 0
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        if "bad" in self.device_name:
+            raise tango.Except.throw_exception(
+                "API_DeviceNotExported", "device not exported", "mocked"
+            )
+        return super().write_attributes_asynch(attr_values)
+
+    def write_attributes_reply(self, idx, green_mode=None, wait=True):
+        self.nb_polls += 1
+        if self.nb_polls < 3:
+            raise tango.AsynReplyNotArrived()
+        super().write_attributes_reply(idx)
+
+
+class MockedSettlingDeviceProxy(MockedDeviceProxy):
+    """Readbacks reach the setpoint after a few reads, stuck devices never do"""
+
+    def write_attribute(self, attr_name, value):
+        super().write_attribute(attr_name, value)
+        self.values[attr_name].value = 0.0
+        self.nb_reads = 0
+
+    def read_attributes_asynch(self, attr_names) -> int:
+        self.nb_reads += 1
+        if self.nb_reads >= 3 and "stuck" not in self.device_name:
+            for attr_name in attr_names:
+                self.values[attr_name].value = self.values[attr_name].w_value
+        return super().read_attributes_asynch(attr_names)
+
+
+class MockedHungDeviceProxy(MockedDeviceProxy):
+    """Replies of hung devices never arrive, cancelled requests are recorded"""
+
+    cancelled: list[tuple[str, int]] = []
+
+    def read_attributes_reply(self, idx, *args, **kwargs):
+        if "hung" in self.device_name:
+            raise tango.AsynReplyNotArrived()
+        return super().read_attributes_reply(idx)
+
+    def cancel_asynch_request(self, idx):
+        MockedHungDeviceProxy.cancelled.append((self.device_name, idx))
+        super().cancel_asynch_request(idx)
+
+
+class MockedFailingReadDeviceProxy(MockedDeviceProxy):
+    """Reads of bad devices fail, voltage reads fail on every device"""
+
+    def read_attributes_reply(self, idx, *args, **kwargs):
+        replies = super().read_attributes_reply(idx)
+        if "bad" in self.device_name:
+            tango.Except.throw_exception(
+                "API_DeviceNotExported", "device not exported", "mocked"
+            )
+        for reply in replies:
+            if reply.name == "voltage":
+                err = tango.DevError()
+                err.reason = "API_AttributeFailed"
+                err.desc = "voltage read failed"
+                err.origin = "mocked"
+                reply.has_failed = True
+                reply.err_stack = [err]
+        return replies
+
+
+class MockedUnsetDeviceProxy(MockedDeviceProxy):
+    """Setpoints of fresh devices were never written, INVALID reads have no value"""
+
+    def read_attribute(self, attr_name, *args, **kwargs):
+        attr_value = super().read_attribute(attr_name)
+        if "fresh" in self.device_name:
+            attr_value.w_value = None
+        if "invalid" in self.device_name:
+            attr_value.value = None
+            attr_value.quality = tango.AttrQuality.ATTR_INVALID
+        return attr_value
+
+
+class MockedNamedDevFailed:
+    def __init__(self, name, idx_in_call, err):
+        self.name = name
+        self.idx_in_call = idx_in_call
+        self.err_stack = [err]
+
+
+class MockedNamedDevFailedList(tango.DevFailed):
+    """DevFailed detailing the failed attributes of a write_attributes call"""
+
+    def __init__(self, err_list):
+        super().__init__(*[failed.err_stack[0] for failed in err_list])
+        self.err_list = err_list
+
+
+class MockedPartialWriteDeviceProxy(MockedDeviceProxy):
+    """Negative values are refused, other attributes of the call are written"""
+
+    def __init__(self, device_name, *args, **kwargs):
+        super().__init__(device_name, *args, **kwargs)
+        self.refused = {}
+
+    def _refused(self, attr_values):
+        refused = []
+        for idx, (attr_name, value) in enumerate(attr_values):
+            if value < 0:
+                err = tango.DevError()
+                err.reason = "API_WAttrOutsideLimit"
+                err.desc = f"{attr_name} below the minimum"
+                err.origin = "mocked"
+                refused.append(MockedNamedDevFailed(attr_name, idx, err))
+        return refused
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        idx = super().write_attributes_asynch(
+            [(name, value) for name, value in attr_values if value >= 0]
+        )
+        self.refused[idx] = self._refused(attr_values)
+        return idx
+
+    def write_attributes_reply(self, idx, green_mode=None, wait=True):
+        super().write_attributes_reply(idx)
+        refused = self.refused.pop(idx)
+        if len(refused) > 0:
+            raise MockedNamedDevFailedList(refused)
+
+    def write_attributes(self, attr_values):
+        for attr_name, value in attr_values:
+            if value >= 0:
+                self.write_attribute(attr_name, value)
+        refused = self._refused(attr_values)
+        if len(refused) > 0:
+            raise MockedNamedDevFailedList(refused)
 
 
 class TestMultiAttributes:
@@ -37,3 +197,392 @@ class TestMultiAttributes:
             assert attr_range is not None
             assert len(attr_range) == 8  # (4*2)
             assert attr_range == [-15, 15, -15, 15, -15, 15, -15, 15]
+
+    def test_multiattribute_initialize_all(self, config_multi):
+        with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+            ma = MultiAttribute(config_multi)
+            assert ma.initialize_all() == {}
+            assert all([attr.is_initialized() for attr in ma])
+
+    def test_multi_read_coalesced_per_device(self):
+        attributes = [
+            "sys/bpm/1/x",
+            "sys/bpm/2/x",
+            "sys/bpm/1/y",
+            "sys/bpm/2/y",
+            "sys/bpm/1/sum",
+        ]
+        with patch("tango.DeviceProxy", new=MockedCountingDeviceProxy):
+            MockedCountingDeviceProxy.nb_asynch_reads = 0
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            ma.add_devices(AttributeReadOnly(AttrCM(attribute="sys/bpm/3/x")))
+            values = [float(index) for index in range(len(attributes))]
+            for attr, value in zip(ma[:-1], values):
+                attr.set_and_wait(value)
+            ma[-1]._ensure_initialized()
+            ma[-1]._attribute_dev.write_attribute("x", 42.0)
+
+            MockedCountingDeviceProxy.nb_asynch_reads = 0
+            vals = ma.readback()
+            assert MockedCountingDeviceProxy.nb_asynch_reads == 3
+            assert list(vals) == values + [42.0]
+            assert list(ma.get()) == values + [42.0]
+
+            result = ma.bulk_readback()
+            assert list(result["value"]) == values + [42.0]
+            assert all(result["quality"] == int(tango.AttrQuality.ATTR_VALID))
+            assert all(result["timestamp"] > 0)
+
+    def test_multi_write_batched(self):
+        attributes = ["sys/ps/1/current", "sys/ps/2/current", "sys/ps/1/voltage"]
+        with patch("tango.DeviceProxy", new=MockedSlowWriteDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            ma.set([1.0, 2.0, 3.0])
+            assert list(ma.get()) == [1.0, 2.0, 3.0]
+            assert ma[0]._attribute_dev.nb_polls == 3
+
+    def test_multi_write_failure(self):
+        attributes = ["sys/ps/1/current", "sys/bad/2/current", "sys/bad/2/voltage"]
+        with patch("tango.DeviceProxy", new=MockedSlowWriteDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            with pytest.raises(WriteFailedException) as exc:
+                ma.set([1.0, 2.0, 3.0])
+            assert exc.value.not_applied() == attributes[1:]
+            assert isinstance(exc.value, pyaml.PyAMLException)
+            assert ma[0].get() == 1.0
+
+    def test_multi_write_partial_failure(self):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/ps/1/voltage",
+            "sys/ps/1/power",
+            "sys/ps/2/current",
+        ]
+        with patch("tango.DeviceProxy", new=MockedPartialWriteDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            with pytest.raises(WriteFailedException) as exc:
+                ma.set([1.0, -2.0, 3.0, -4.0])
+            # Only the refused attributes of sys/ps/1 are reported
+            assert exc.value.not_applied() == [
+                "sys/ps/1/voltage",
+                "sys/ps/2/current",
+            ]
+            assert "voltage below the minimum" in str(exc.value)
+            assert ma[0].get() == 1.0 and ma[2].get() == 3.0
+
+        factory = MockedGreenDeviceProxyFactory(MockedPartialWriteDeviceProxy)
+        with patch("tango.DeviceProxy", new=factory):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            with pytest.raises(WriteFailedException) as exc:
+                asyncio.run(ma.aset(np.array([5.0, 6.0, -7.0, 8.0])))
+            assert exc.value.not_applied() == ["sys/ps/1/power"]
+            assert asyncio.run(ma[1].aget()) == 6.0
+
+    def test_multi_read_failure(self):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/bad/2/current",
+            "sys/ps/3/current",
+            "sys/ps/3/voltage",
+        ]
+        with patch("tango.DeviceProxy", new=MockedFailingReadDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            ma.initialize_all()
+            for attr in ma:
+                attr._attribute_dev.write_attribute(attr._attr_name, 1.0)
+
+            # A failed device or attribute does not fail the whole read
+            vals = ma.readback()
+            assert vals[0] == 1.0 and vals[2] == 1.0
+            assert np.isnan(vals[1]) and np.isnan(vals[3])
+            assert np.isnan(ma.get()[1])
+            result = ma.bulk_readback()
+            assert list(result["quality"]) == [
+                int(tango.AttrQuality.ATTR_VALID),
+                int(tango.AttrQuality.ATTR_INVALID),
+                int(tango.AttrQuality.ATTR_VALID),
+                int(tango.AttrQuality.ATTR_INVALID),
+            ]
+
+    def test_multi_read_unset_values(self):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/fresh/2/current",
+            "sys/invalid/3/current",
+        ]
+        with patch("tango.DeviceProxy", new=MockedUnsetDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            ma.initialize_all()
+            for attr in ma:
+                attr._attribute_dev.write_attribute("current", 1.0)
+            vals = ma.get()
+            assert vals[0] == 1.0 and np.isnan(vals[1]) and vals[2] == 1.0
+            vals = ma.readback()
+            assert vals[0] == 1.0 and vals[1] == 1.0 and np.isnan(vals[2])
+            result = ma.bulk_readback()
+            assert list(result["value"][:2]) == [1.0, 1.0]
+            assert np.isnan(result["value"][2])
+            assert result["quality"][2] == int(tango.AttrQuality.ATTR_INVALID)
+
+        factory = MockedGreenDeviceProxyFactory(MockedUnsetDeviceProxy)
+        with patch("tango.DeviceProxy", new=factory):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            for attr in ma:
+                asyncio.run(attr.aset(1.0))
+            vals = asyncio.run(ma.aget())
+            assert vals.dtype == np.float64
+            assert vals[0] == 1.0 and np.isnan(vals[1]) and vals[2] == 1.0
+            vals = asyncio.run(ma.areadback())
+            assert vals.dtype == np.float64 and np.isnan(vals[2])
+
+    def test_multi_set_and_wait(self):
+        attributes = ["sys/ps/1/current", "sys/ps/2/current"]
+        with patch("tango.DeviceProxy", new=MockedSettlingDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            timing = ma.set_and_wait([1.0, 2.0])
+            assert timing.nb_polls == 0
+            assert list(ma.get()) == [1.0, 2.0]
+
+            timing = ma.set_and_wait([3.0, 4.0], tolerance=0.01, poll_period_ms=1)
+            assert timing.nb_polls == 3
+            assert list(ma.readback()) == [3.0, 4.0]
+            assert all(timing.settle_times >= timing.write_time)
+            assert timing.settle_time >= max(timing.settle_times)
+
+    def test_multi_set_and_wait_timeout(self):
+        attributes = ["sys/ps/1/current", "sys/stuck/2/current"]
+        with patch("tango.DeviceProxy", new=MockedSettlingDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            with pytest.raises(pyaml.PyAMLException) as exc:
+                ma.set_and_wait(
+                    [3.0, 4.0], tolerance=[0.01, 0.01], timeout_ms=50, poll_period_ms=1
+                )
+            assert "sys/stuck/2/current" in exc.value.message
+            assert "sys/ps/1/current" not in exc.value.message
+
+    def test_multi_set_and_wait_hung_device(self):
+        attributes = ["sys/ps/1/current", "sys/hung/2/current"]
+        with patch("tango.DeviceProxy", new=MockedHungDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            start = time.monotonic()
+            with pytest.raises(pyaml.PyAMLException) as exc:
+                ma.set_and_wait([1.0, 1.0], tolerance=0.01, timeout_ms=100)
+            # Polls share the deadline, well below the 3 s device timeout
+            assert time.monotonic() - start < 1.0
+            assert "sys/hung/2/current" in exc.value.message
+            assert "sys/ps/1/current" not in exc.value.message
+
+    def test_multi_read_deadline(self):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/hung/2/current",
+            "sys/hung/3/current",
+            "sys/ps/4/current",
+        ]
+        MockedHungDeviceProxy.cancelled = []
+        with patch("tango.DeviceProxy", new=MockedHungDeviceProxy):
+            ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+            ma.initialize_all()
+            for attr in ma:
+                attr._attribute_dev.write_attribute("current", 1.0)
+
+            start = time.monotonic()
+            vals = ma.readback(timeout_ms=100)
+            # The hung devices share the same budget, well below their
+            # 3 s device timeout (generous bound for loaded machines)
+            assert time.monotonic() - start < 1.0
+            assert vals[0] == 1.0 and vals[3] == 1.0
+            assert np.isnan(vals[1]) and np.isnan(vals[2])
+            # Both hung calls expired on the deadline
+            assert sorted(name for name, _ in MockedHungDeviceProxy.cancelled) == [
+                "sys/hung/2",
+                "sys/hung/3",
+            ]
+
+            result = ma.bulk_readback(timeout_ms=10)
+            assert list(result["quality"]) == [
+                int(tango.AttrQuality.ATTR_VALID),
+                int(tango.AttrQuality.ATTR_INVALID),
+                int(tango.AttrQuality.ATTR_INVALID),
+                int(tango.AttrQuality.ATTR_VALID),
+            ]
+            assert np.isnan(ma.get(timeout_ms=10)[1])
+
+            # Abandoned requests are cancelled, no reply is left in the proxies
+            assert sorted(name for name, _ in MockedHungDeviceProxy.cancelled) == [
+                "sys/hung/2",
+                "sys/hung/2",
+                "sys/hung/2",
+                "sys/hung/3",
+                "sys/hung/3",
+                "sys/hung/3",
+            ]
+            assert all(len(attr._attribute_dev.asynch_values) == 0 for attr in ma)
+
+
+def calls(device_name: str, operation: str) -> int:
+    snapshot = DeviceFactory().get_instrumentation().snapshot()
+    return snapshot.get(device_name, {}).get(operation, {}).get("count", 0)
+
+
+class TestSimulatedMultiAttributes:
+    """The same accesses served by the device simulator"""
+
+    def test_simulated_multi_read_write(self, simulator, config_multi):
+        with patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ):
+            attr_list = MultiAttribute(config_multi)
+            rand = random.Random()
+            values = [rand.random() for _ in range(4)]
+            attr_list.set(values)
+            vals = attr_list.readback()
+            assert len(vals) == len(values)
+            for index, val in enumerate(vals):
+                assert val == values[index]
+
+    def test_simulated_multiattribute_range(self, simulator, config_multi_range):
+        with patch(
+            "tango.pyaml.controlsystem.TangoControlSystem",
+            new=MockedControlSystemInitialized,
+        ):
+            ma = MultiAttribute(config_multi_range)
+            attr_range = ma.get_range()
+            assert attr_range is not None
+            assert len(attr_range) == 8  # (4*2)
+            assert attr_range == [-15, 15, -15, 15, -15, 15, -15, 15]
+
+    def test_simulated_multiattribute_initialize_all(self, simulator, config_multi):
+        ma = MultiAttribute(config_multi)
+        assert ma.initialize_all() == {}
+        assert all([attr.is_initialized() for attr in ma])
+
+    def test_simulated_multi_read_coalesced_per_device(self, simulator):
+        attributes = [
+            "sys/bpm/1/x",
+            "sys/bpm/2/x",
+            "sys/bpm/1/y",
+            "sys/bpm/2/y",
+            "sys/bpm/1/sum",
+        ]
+        DeviceFactory().get_instrumentation().enable()
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        ma.add_devices(AttributeReadOnly(AttrCM(attribute="sys/bpm/3/x")))
+        values = [float(index) for index in range(len(attributes))]
+        for attr, value in zip(ma[:-1], values):
+            attr.set_and_wait(value)
+        ma[-1]._ensure_initialized()
+        ma[-1]._attribute_dev.write_attribute("x", 42.0)
+
+        DeviceFactory().get_instrumentation().reset()
+        vals = ma.readback()
+        # One read per device
+        for device_name in ["sys/bpm/1", "sys/bpm/2", "sys/bpm/3"]:
+            assert calls(device_name, "read_attributes") == 1
+        assert list(vals) == values + [42.0]
+        assert list(ma.get()) == values + [42.0]
+
+        result = ma.bulk_readback()
+        assert list(result["value"]) == values + [42.0]
+        assert all(result["quality"] == int(tango.AttrQuality.ATTR_VALID))
+        assert all(result["timestamp"] > 0)
+
+    def test_simulated_multi_write_batched(self, simulator):
+        attributes = ["sys/ps/1/current", "sys/ps/2/current", "sys/ps/1/voltage"]
+        DeviceFactory().get_instrumentation().enable()
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        ma.set([1.0, 2.0, 3.0])
+        assert list(ma.get()) == [1.0, 2.0, 3.0]
+        # One write per device
+        assert calls("sys/ps/1", "write_attributes") == 1
+        assert calls("sys/ps/2", "write_attributes") == 1
+
+    def test_simulated_multi_write_failure(self, simulator):
+        attributes = ["sys/ps/1/current", "sys/bad/2/current", "sys/bad/2/voltage"]
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        ma.initialize_all()
+        simulator.set_offline("sys/bad/2")
+        with pytest.raises(WriteFailedException) as exc:
+            ma.set([1.0, 2.0, 3.0])
+        assert exc.value.not_applied() == attributes[1:]
+        assert isinstance(exc.value, pyaml.PyAMLException)
+        assert ma[0].get() == 1.0
+
+    def test_simulated_multi_write_partial_failure(self, simulator):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/ps/1/voltage",
+            "sys/ps/1/power",
+            "sys/ps/2/current",
+        ]
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        with pytest.raises(WriteFailedException) as exc:
+            ma.set([1.0, -2.0, 3.0, 20.0])
+        # Only the refused attribute of sys/ps/1 is reported
+        assert exc.value.not_applied() == [
+            "sys/ps/1/voltage",
+            "sys/ps/2/current",
+        ]
+        assert "out of range [0.0, 100.0] for voltage" in str(exc.value)
+        assert ma[0].get() == 1.0 and ma[2].get() == 3.0
+
+        with pytest.raises(WriteFailedException) as exc:
+            asyncio.run(ma.aset(np.array([5.0, 6.0, -7.0, 8.0])))
+        assert exc.value.not_applied() == ["sys/ps/1/power"]
+        assert ma[1].get() == 6.0
+
+    def test_simulated_multi_set_and_wait(self, simulator):
+        attributes = ["sys/settling/1/current", "sys/settling/2/current"]
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        timing = ma.set_and_wait([1.0, 2.0])
+        assert timing.nb_polls == 0
+        assert list(ma.get()) == [1.0, 2.0]
+
+        timing = ma.set_and_wait([3.0, 4.0], tolerance=0.01, poll_period_ms=1)
+        assert timing.nb_polls > 0
+        assert ma.readback() == pytest.approx([3.0, 4.0], abs=0.01)
+        assert all(timing.settle_times >= timing.write_time)
+        assert timing.settle_time >= max(timing.settle_times)
+
+    def test_simulated_multi_set_and_wait_timeout(self, simulator):
+        attributes = ["sys/settling/1/current", "sys/stuck/2/current"]
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        with pytest.raises(pyaml.PyAMLException) as exc:
+            ma.set_and_wait(
+                [3.0, 4.0], tolerance=[0.01, 0.01], timeout_ms=100, poll_period_ms=1
+            )
+        assert "sys/stuck/2/current" in exc.value.message
+        assert "sys/settling/1/current" not in exc.value.message
+
+    def test_simulated_multi_read_deadline(self, simulator):
+        attributes = [
+            "sys/ps/1/current",
+            "sys/hung/2/current",
+            "sys/hung/3/current",
+            "sys/ps/4/current",
+        ]
+        ma = MultiAttribute(MultiAttrCM(attributes=attributes))
+        ma.initialize_all()
+        for attr in ma:
+            attr._attribute_dev.write_attribute("current", 1.0)
+
+        start = time.monotonic()
+        vals = ma.readback(timeout_ms=100)
+        # The hung devices share the same budget, well below their
+        # 3 s device timeout (generous bound for loaded machines)
+        assert time.monotonic() - start < 1.0
+        assert vals[0] == 1.0 and vals[3] == 1.0
+        assert np.isnan(vals[1]) and np.isnan(vals[2])
+
+        result = ma.bulk_readback(timeout_ms=10)
+        assert list(result["quality"]) == [
+            int(tango.AttrQuality.ATTR_VALID),
+            int(tango.AttrQuality.ATTR_INVALID),
+            int(tango.AttrQuality.ATTR_INVALID),
+            int(tango.AttrQuality.ATTR_VALID),
+        ]
+        assert np.isnan(ma.get(timeout_ms=10)[1])
+
+        # Expired requests are cancelled, no reply is left in the proxies
+        assert all(len(attr._attribute_dev._pending) == 0 for attr in ma)
@@ -0,0 +1,117 @@
+import time
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.multi_attribute import MultiAttribute
+from tango.pyaml.ramp import ramp_steps
+from tango.pyaml.tango_pyaml_utils import WriteFailedException
+
+
+class MockedRampDeviceProxy(MockedDeviceProxy):
+    """Keep the history of written values, device 4 refuses values above 2"""
+
+    history: dict[str, list[float]] = {}
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        for attr_name, value in attr_values:
+            if self.device_name.endswith("/4") and value > 2.0:
+                tango.Except.throw_exception(
+                    "API_WAttrOutsideLimit", "Value above the limit", "write"
+                )
+            MockedRampDeviceProxy.history.setdefault(self.device_name, []).append(value)
+        return super().write_attributes_asynch(attr_values)
+
+
+@pytest.fixture(autouse=True)
+def ramp_devices():
+    MockedRampDeviceProxy.history = {}
+    with patch("tango.DeviceProxy", new=MockedRampDeviceProxy):
+        yield
+
+
+def test_ramp_steps():
+    steps = ramp_steps([0.0, 1.0], [1.0, 0.5], max_step=0.25)
+    assert steps.tolist() == [[0.25, 0.875], [0.5, 0.75], [0.75, 0.625], [1.0, 0.5]]
+    # 2 units per second, 0.1 s per step
+    steps = ramp_steps([0.0, 0.0], [1.0, -0.2], max_rate=[2.0, 0.1], period_s=0.1)
+    assert len(steps) == 20
+    assert np.abs(np.diff(steps, axis=0)).max(axis=0) == pytest.approx([0.05, 0.01])
+    assert ramp_steps([1.0], [1.0], max_step=0.1).tolist() == [[1.0]]
+    with pytest.raises(pyaml.PyAMLException):
+        ramp_steps([0.0], [1.0])
+    with pytest.raises(pyaml.PyAMLException):
+        ramp_steps([np.nan], [1.0], max_step=0.1)
+
+
+def test_ramp(config_multi):
+    ma = MultiAttribute(config_multi)
+    ma.set(np.zeros(4))
+    MockedRampDeviceProxy.history = {}
+
+    start = time.monotonic()
+    ramp = ma.ramp(np.array([1.0, 2.0, -1.0, 0.5]), max_step=0.5, period_ms=20)
+    assert ramp.wait(5.0)
+    # 4 steps on a 20 ms cadence
+    assert time.monotonic() - start >= 0.06
+    assert MockedRampDeviceProxy.history["sys/tg_test/2"] == [0.5, 1.0, 1.5, 2.0]
+    assert MockedRampDeviceProxy.history["sys/tg_test/3"] == [-0.25, -0.5, -0.75, -1.0]
+    assert list(ma.get()) == [1.0, 2.0, -1.0, 0.5]
+    assert list(ramp.setpoints()) == [1.0, 2.0, -1.0, 0.5]
+    stats = ramp.stats()
+    assert stats["steps"] == stats["sent"] == stats["acknowledged"] == 4
+
+    # Steps are queued behind slow ones
+    ramp = ma.ramp(np.zeros(4), max_rate=20.0, period_ms=10, max_pending=3)
+    assert ramp.wait(5.0)
+    assert list(ma.get()) == [0.0] * 4
+
+
+def test_ramp_order(config_multi):
+    ma = MultiAttribute(config_multi)
+    ma.set(np.zeros(4))
+    MockedRampDeviceProxy.history = {}
+    send_writes = ma._send_writes
+
+    def slow_send_writes(value, *args):
+        # The first steps are slower than the cadence
+        time.sleep(0.02 if value[0] < 0.3 else 0.001)
+        send_writes(value, *args)
+
+    ma._send_writes = slow_send_writes
+    ramp = ma.ramp(np.full(4, 1.0), max_step=0.1, period_ms=2, max_pending=5)
+    assert ramp.wait(5.0)
+    steps = [pytest.approx(0.1 * step) for step in range(1, 11)]
+    for device in ["sys/tg_test/1", "sys/tg_test/4"]:
+        assert MockedRampDeviceProxy.history[device] == steps
+    assert list(ramp.setpoints()) == [1.0] * 4
+
+
+def test_ramp_cancel(config_multi):
+    ma = MultiAttribute(config_multi)
+    ma.set(np.zeros(4))
+    ramp = ma.ramp(np.full(4, 1.0), max_step=0.05, period_ms=20)
+    time.sleep(0.1)
+    ramp.cancel()
+    assert ramp.wait(5.0)
+    assert ramp.cancelled()
+    stats = ramp.stats()
+    assert 0 < stats["sent"] < 20
+    # Attributes stay on the last written step
+    assert list(ma.get()) == list(ramp.setpoints())
+    assert ma.get()[0] == pytest.approx(0.05 * stats["sent"])
+
+
+def test_ramp_failure(config_multi):
+    ma = MultiAttribute(config_multi)
+    ma.set(np.zeros(4))
+    ramp = ma.ramp(np.full(4, 3.0), max_step=0.5, period_ms=5)
+    with pytest.raises(WriteFailedException) as ex:
+        ramp.wait(5.0)
+    assert ex.value.not_applied() == ["sys/tg_test/4/float_scalar"]
+    # The ramp stops at the first failed step
+    assert ramp.stats()["sent"] == 5
+    assert list(ramp.setpoints()) == [2.0] * 4
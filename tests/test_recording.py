@@ -0,0 +1,150 @@
+import time
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_group import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute
+from tango.pyaml.attribute_list import AttributeList
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute
+from tango.pyaml.recording import (
+    FLAG_NOT_SCALAR,
+    FLAG_WRITE,
+    Recorder,
+    Recording,
+    Replay,
+)
+
+
+def test_recording(tmp_path, config, config_multi, config_group):
+    path = str(tmp_path / "traffic.bin")
+    with (
+        patch("tango.DeviceProxy", new=MockedDeviceProxy),
+        patch("tango.Group", new=MockedGroup),
+    ):
+        cs = TangoControlSystem(CsCM(name="rec_cs", recording=path))
+        attr = Attribute(config)
+        attr.set_and_wait(3.0)
+        assert attr.readback().value == 3.0
+
+        ma = MultiAttribute(config_multi)
+        ma.set(np.array([1.0, 2.0, 3.0, 4.0]))
+        ma.readback()
+
+        group = AttributeList(config_group)
+        group.set_and_wait(5.0)
+        group.readback()
+
+        DeviceFactory().get_device("sys/tg_test/1").write_attribute("wave", np.zeros(4))
+        Attribute(
+            config.model_copy(update={"attribute": "sys/tg_test/1/wave"})
+        ).readback()
+        cs.stop_recording()
+
+    recording = Recording(path)
+    assert isinstance(recording.records, np.memmap)
+    assert recording.names[0] == "sys/tg_test/1/float_scalar"
+    assert len(recording.names) == 5
+    assert DeviceFactory().get_recorder().stats()["records"] == len(recording.records)
+
+    writes = recording.attribute("sys/tg_test/1/float_scalar", write=True)
+    assert list(writes["value"]) == [3.0, 1.0, 5.0]
+    reads = recording.attribute("sys/tg_test/1/float_scalar")
+    assert list(reads["value"]) == [3.0, 1.0, 5.0]
+    assert (reads["quality"] == int(tango.AttrQuality.ATTR_VALID)).all()
+    assert (reads["latency"] >= 0).all()
+    assert np.all(np.diff(recording.records["timestamp"]) >= 0)
+    assert list(recording.attribute("sys/tg_test/4/float_scalar")["value"]) == [
+        4.0,
+        5.0,
+    ]
+
+    wave = recording.attribute("sys/tg_test/1/wave")
+    assert wave["flags"][0] & FLAG_NOT_SCALAR
+    assert np.isnan(wave["value"][0])
+
+    # Records are appended to an existing log
+    recorder = Recorder()
+    recorder.start(path)
+    recorder.record_values(["sys/tg_test/1/float_scalar"], [6.0], None, 0.001, True)
+    recorder.stop()
+    recording = Recording(path)
+    assert len(recording.names) == 5
+    assert recording.records["flags"][-1] == FLAG_WRITE
+    assert recording.records["value"][-1] == 6.0
+
+
+def test_recording_bad_file(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"not a recording")
+    with pytest.raises(pyaml.PyAMLException):
+        Recording(str(path))
+    with pytest.raises(pyaml.PyAMLException):
+        Recorder().start(str(path))
+
+
+def test_replay(tmp_path, config):
+    path = str(tmp_path / "traffic.bin")
+    name = "//tangodb:10000/sys/tg_test/1/float_scalar"
+    recorder = Recorder()
+    recorder.start(path)
+    recorder.record_values([name], [1.0], None, 0.002, write=True)
+    recorder.record_values([name], [1.5], None, 0.002)
+    time.sleep(0.1)
+    recorder.record_values([name], [2.0], None, 0.002)
+    recorder.stop()
+
+    replay = Replay(path, speed=10.0)
+    DeviceFactory().set_backend(replay)
+    attr = Attribute(config)
+    assert attr.readback().value == 1.5
+    assert attr.get() == 1.0
+
+    # Replay time runs 10 times faster
+    t0 = replay.replay_time()
+    assert replay.lookup(name, time.time() + 0.011)["value"] == 2.0
+    assert replay.replay_time(time.time() + 1.0) == pytest.approx(t0 + 10.0, abs=0.1)
+
+    # Writes only change the setpoint
+    attr.set_and_wait(7.0)
+    assert attr.get() == 7.0
+    assert attr.readback().value in (1.5, 2.0)
+
+    with pytest.raises(pyaml.PyAMLException):
+        Attribute(
+            config.model_copy(update={"attribute": "sys/tg_test/1/other"})
+        ).readback()
+
+    replay = Replay(path, latencies=True)
+    assert replay.read_latency("sys/tg_test/1") == pytest.approx(0.002)
+
+
+def test_recording_event_reads(tmp_path, config):
+    path = str(tmp_path / "events.bin")
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        recorder = DeviceFactory().get_recorder()
+        recorder.start(path)
+        attr = Attribute(config.model_copy(update={"events": True}))
+        attr.readback()
+        attr._attribute_dev.push_event("float_scalar", 2.5)
+        assert attr.readback().value == 2.5
+        recorder.stop()
+
+    # Reads served from the event cache are recorded like Tango reads
+    reads = Recording(path).attribute("sys/tg_test/1/float_scalar")
+    assert reads["value"][-1] == 2.5
+    assert reads["latency"][-1] == 0.0
+
+
+def test_recorder_queue_full():
+    recorder = Recorder(max_queued=2)
+    # Enabled without the writer thread, nothing is dequeued
+    recorder.enabled = True
+    for value in range(3):
+        recorder.record_values(["sys/tg_test/1/float_scalar"], [value], None, 0.001)
+    assert recorder.stats()["dropped"] == 1
+    assert recorder._queue.qsize() == 2
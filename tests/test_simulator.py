@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+import numpy as np
+import pyaml
+import pytest
+import yaml
+
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList, ConfigModel as GrpCM
+from tango.pyaml.attribute_read_only import AttributeReadOnly
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute, ConfigModel as MultiAttrCM
+from tango.pyaml.simulator import ConfigModel as SimulatorCM, DeviceModel, Simulator
+
+SIMULATED_CS = """
+name: simulated_cs
+tango_host: tangodb:10000
+breaker_threshold: 1
+breaker_ping_period_s: 0.01
+simulator:
+  event_period_ms: 5
+  devices:
+    - pattern: "sr/ps-*/*"
+      read_latency_ms: 1
+      attributes:
+        - name: current
+          range: [-10, 10]
+          write_latency_ms: 5
+          settling_time_ms: 20
+        - name: voltage
+          writable: false
+          value: 1.5
+"""
+
+
+@pytest.fixture
+def simulated_cs() -> TangoControlSystem:
+    cs = TangoControlSystem(CsCM(**yaml.safe_load(SIMULATED_CS)))
+    yield cs
+    DeviceFactory().get_backend().stop()
+
+
+def test_settling_dynamics(simulated_cs):
+    attr = simulated_cs.attach([Attribute(AttrCM(attribute="sr/ps-qf/1/current"))])[0]
+    attr.set(5.0)
+    assert attr.get() == 5.0
+    # Not settled yet (within 0.01 after ~120 ms)
+    assert attr.readback().value < 4.99
+    time.sleep(0.2)
+    assert attr.readback().value == pytest.approx(5.0, abs=0.01)
+
+    with pytest.raises(pyaml.PyAMLException):
+        attr.set_and_wait(20.0)
+
+
+def test_read_only_attribute(simulated_cs):
+    attr = simulated_cs.attach(
+        [AttributeReadOnly(AttrCM(attribute="sr/ps-qf/1/voltage"))]
+    )[0]
+    assert attr.readback().value == 1.5
+    with pytest.raises(pyaml.PyAMLException):
+        simulated_cs.attach([Attribute(AttrCM(attribute="sr/ps-qf/1/voltage"))])[0].set(
+            1.0
+        )
+
+
+def test_multi_attribute_convergence(simulated_cs):
+    names = [f"sr/ps-qf/{index}/current" for index in range(20)]
+    ma = MultiAttribute(MultiAttrCM(attributes=names))
+    values = np.linspace(-5.0, 5.0, len(names))
+    timing = ma.set_and_wait(values, tolerance=0.01, timeout_ms=2000, poll_period_ms=5)
+    assert timing.settle_time > 0.0
+    assert np.allclose(ma.readback(), values, atol=0.01)
+
+
+def test_attribute_list(simulated_cs):
+    names = [f"sr/ps-qd/{index}/current" for index in range(5)]
+    attr_list = AttributeList(GrpCM(attributes=names, name="qd"))
+    attr_list.set_and_wait(2.0)
+    assert list(attr_list.get()) == [2.0] * 5
+    time.sleep(0.2)
+    assert np.allclose(attr_list.readback(), 2.0, atol=0.01)
+
+
+def test_events(simulated_cs):
+    attr = simulated_cs.attach(
+        [Attribute(AttrCM(attribute="sr/ps-sf/1/current", events=True))]
+    )[0]
+    attr.set_and_wait(3.0)
+    time.sleep(0.2)
+    instrumentation = DeviceFactory().get_instrumentation()
+    instrumentation.enable()
+    # Served from the event cache, no read request
+    assert attr.readback().value == pytest.approx(3.0, abs=0.01)
+    assert instrumentation.snapshot() == {}
+
+
+def test_configuration_events(simulated_cs):
+    attr = simulated_cs.attach(
+        [Attribute(AttrCM(attribute="sr/ps-sf/2/current", events=True))]
+    )[0]
+    assert list(attr.get_range_array()) == [-10.0, 10.0]
+    attr_range = attr._range
+    # Value changes do not invalidate the range
+    attr.set(5.0)
+    time.sleep(0.1)
+    assert attr._range is attr_range
+
+    DeviceFactory().get_backend().set_range("sr/ps-sf/2", "current", (-5.0, 5.0))
+    assert list(attr.get_range_array()) == [-5.0, 5.0]
+    # The other devices of the model keep their range
+    other = simulated_cs.attach([Attribute(AttrCM(attribute="sr/ps-sf/3/current"))])[0]
+    assert list(other.get_range_array()) == [-10.0, 10.0]
+
+
+def test_failure_injection(simulated_cs):
+    attr = simulated_cs.attach([Attribute(AttrCM(attribute="sr/ps-sd/1/current"))])[0]
+    attr.readback()
+    simulator = DeviceFactory().get_backend()
+    simulator.set_offline(attr._attribute_dev_name)
+    with pytest.raises(pyaml.PyAMLException):
+        attr.readback()
+    assert simulated_cs.get_breaker_stats()["open"] == [attr._attribute_dev_name]
+
+    simulator.set_offline(attr._attribute_dev_name, False)
+    start = time.monotonic()
+    while DeviceFactory().get_breaker().is_open(attr._attribute_dev_name):
+        assert time.monotonic() - start < 2.0
+        time.sleep(0.005)
+    attr.readback()
+
+
+def test_asyncio(simulated_cs):
+    attr = simulated_cs.attach([Attribute(AttrCM(attribute="sr/ps-qf/9/current"))])[0]
+
+    async def run():
+        await attr.aset(1.0)
+        await asyncio.sleep(0.2)
+        return await attr.areadback()
+
+    assert asyncio.run(run()).value == pytest.approx(1.0, abs=0.01)
+
+
+def test_latency_jitter():
+    simulator = Simulator(
+        SimulatorCM(
+            devices=[DeviceModel(pattern="*", read_latency_ms=10, latency_jitter_ms=5)]
+        )
+    )
+    latencies = [simulator.device("sr/ps-qf/1").read_latency for _ in range(100)]
+    assert 0.005 <= min(latencies) < max(latencies) <= 0.015
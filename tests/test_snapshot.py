@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_read_only import AttributeReadOnly
+from tango.pyaml.controlsystem import TangoControlSystem
+from tango.pyaml.snapshot import Snapshot
+
+
+class MockedStuckDeviceProxy(MockedDeviceProxy):
+    """Stuck devices ignore writes"""
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        if "stuck" in self.device_name:
+            attr_values = []
+        return super().write_attributes_asynch(attr_values)
+
+
+def magnets(cs: TangoControlSystem, nb_devices: int, nb_attributes: int) -> list:
+    names = [
+        f"sr/ps-{device}/{'stuck' if device == 1 else 'ok'}/current{attribute}"
+        for device in range(nb_devices)
+        for attribute in range(nb_attributes)
+    ]
+    attributes = cs.attach([Attribute(AttrCM(attribute=name)) for name in names])
+    for index, attribute in enumerate(attributes):
+        attribute.set_and_wait(float(index))
+    return attributes
+
+
+def test_snapshot_restore(tmp_path, config_tango_cs_lazy_default):
+    config_tango_cs_lazy_default.tango_host = None
+    with patch("tango.DeviceProxy", new=MockedStuckDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs_lazy_default)
+        attributes = magnets(cs, 3, 4)
+        cs.attach([AttributeReadOnly(AttrCM(attribute="sr/ps-0/ok/voltage"))])
+
+        path = str(tmp_path / "setpoints.npz")
+        snapshot = cs.snapshot(path)
+        # Read-only attributes are not part of snapshots
+        assert len(snapshot.names) == 12
+        assert list(snapshot.setpoints) == [float(index) for index in range(12)]
+        assert (snapshot.qualities == int(tango.AttrQuality.ATTR_VALID)).all()
+
+        saved = Snapshot.load(path)
+        assert list(saved.names) == list(snapshot.names)
+        assert np.array_equal(saved.setpoints, snapshot.setpoints)
+        assert saved.time == snapshot.time
+
+        for attribute in attributes:
+            attribute.set_and_wait(-1.0)
+        result = cs.restore(path, batch_size=5)
+        assert result.written == 12
+        assert result.errors == {}
+        # Writes of the stuck device are acknowledged but not applied
+        assert result.mismatches == [f"sr/ps-1/stuck/current{i}" for i in range(4)]
+        assert not result.ok()
+        assert [a.get() for a in attributes[:4]] == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_restore_rate_limit(config_tango_cs_lazy_default):
+    config_tango_cs_lazy_default.tango_host = None
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs_lazy_default)
+        magnets(cs, 2, 5)
+        snapshot = cs.snapshot()
+        snapshot.names = np.append(snapshot.names, "sr/ps-9/ok/current0")
+        snapshot.setpoints = np.append(snapshot.setpoints, 1.0)
+
+        start = time.monotonic()
+        result = cs.restore(snapshot, batch_size=2, max_writes_per_s=100)
+        # 5 batches of 2 writes at 100 writes per second
+        assert time.monotonic() - start >= 0.08
+        assert result.written == 10
+        assert list(result.errors.keys()) == ["sr/ps-9/ok/current0"]
+        assert result.mismatches == []
+
+
+def test_restore_write_guard(config_tango_cs_lazy_default):
+    config_tango_cs_lazy_default.tango_host = None
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        cs = TangoControlSystem(config_tango_cs_lazy_default)
+        names = [f"sr/ps-{device}/ok/current" for device in range(3)]
+        attributes = cs.attach(
+            [
+                Attribute(AttrCM(attribute=name, range=(0, 5), write_guard="reject"))
+                for name in names
+            ]
+        )
+        for attribute in attributes:
+            attribute.set(3.0)
+        snapshot = cs.snapshot()
+        snapshot.setpoints = np.array([1.0, 9.0, 2.0])
+
+        result = cs.restore(snapshot)
+        # Rejected setpoints do not prevent the others from being restored
+        assert list(result.errors.keys()) == ["sr/ps-1/ok/current"]
+        assert result.written == 2
+        assert result.mismatches == []
+        assert [attribute.get() for attribute in attributes] == [1.0, 3.0, 2.0]
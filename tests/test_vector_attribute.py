@@ -0,0 +1,118 @@
+import asyncio
+
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_device_proxy import *
+from unittest.mock import patch
+from tango.pyaml.attribute import ConfigModel as AttrCM
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.multi_attribute import ConfigModel as MultiAttrCM
+from tango.pyaml.multi_vector_attribute import MultiVectorAttribute
+from tango.pyaml.vector_attribute import VectorAttribute
+from tango.pyaml.vector_attribute_read_only import VectorAttributeReadOnly
+
+
+class MockedExtractDeviceProxy(MockedDeviceProxy):
+    """Records the extraction mode of reads"""
+
+    extract_as = []
+
+    def read_attribute(self, attr_name: str, extract_as=None):
+        MockedExtractDeviceProxy.extract_as.append(extract_as)
+        return super().read_attribute(attr_name, extract_as)
+
+
+@pytest.fixture
+def config_vectors():
+    return MultiAttrCM(
+        attributes=[
+            "sr/bpm/c01-1/tbt_x",
+            "sr/bpm/c01-2/tbt_x",
+            "sr/bpm/c02-1/tbt_x",
+        ],
+        unit="mm",
+    )
+
+
+def test_vector_attribute_numpy():
+    with patch("tango.DeviceProxy", new=MockedExtractDeviceProxy):
+        attr = VectorAttribute(
+            AttrCM(attribute="sr/bpm/c01-1/tbt_x", unit="mm", range=(None, None))
+        )
+        waveform = np.linspace(-1.0, 1.0, 1000)
+        attr.set_and_wait(waveform)
+
+        readback = attr.readback()
+        assert isinstance(readback.value, np.ndarray)
+        assert np.array_equal(readback.value, waveform)
+        assert np.array_equal(attr.get(), waveform)
+        assert set(MockedExtractDeviceProxy.extract_as) == {tango.ExtractAs.Numpy}
+
+        # Preallocated buffers are filled in place
+        out = np.zeros(1000)
+        assert attr.readback(out=out).value is out
+        assert attr.get(out=out) is out
+        assert np.array_equal(out, waveform)
+        with pytest.raises(ValueError):
+            attr.get(out=np.zeros(10))
+
+
+def test_vector_attribute_image():
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        attr = VectorAttributeReadOnly(AttrCM(attribute="sr/cam/1/image"))
+        image = np.arange(12, dtype=np.uint16).reshape(3, 4)
+        attr._ensure_initialized()
+        attr._attribute_dev.write_attribute("image", image)
+
+        out = np.empty((3, 4), dtype=np.uint16)
+        assert attr.get(out=out) is out
+        assert np.array_equal(out, image)
+        with pytest.raises(pyaml.PyAMLException):
+            attr.set(image)
+
+
+def test_vector_attribute_asyncio():
+    with patch("tango.DeviceProxy", new=MockedGreenDeviceProxyFactory()):
+        attr = VectorAttribute(AttrCM(attribute="sr/bpm/c01-1/tbt_x"))
+        out = np.empty(100)
+
+        async def run():
+            await attr.aset(np.ones(100))
+            return await attr.aget(), await attr.areadback(out=out)
+
+        setpoint, readback = asyncio.run(run())
+        assert np.array_equal(setpoint, np.ones(100))
+        assert readback.value is out
+        assert np.array_equal(out, np.ones(100))
+
+
+def test_multi_vector_attribute(config_vectors):
+    with patch("tango.DeviceProxy", new=MockedDeviceProxy):
+        agg = MultiVectorAttribute(config_vectors)
+        values = np.arange(3 * 50, dtype=np.float64).reshape(3, 50)
+        agg.set(values)
+
+        assert np.array_equal(agg.get(), values)
+        out = np.empty((3, 50))
+        assert agg.readback(out=out) is out
+        assert np.array_equal(out, values)
+
+        timing = agg.set_and_wait(values + 1.0, tolerance=0.1)
+        assert timing.nb_polls == 1
+        assert np.array_equal(agg.readback(), values + 1.0)
+
+        bulk = agg.bulk_readback()
+        assert bulk["value"].shape == (3, 50)
+        assert np.array_equal(bulk["value"], values + 1.0)
+        assert (bulk["quality"] == int(tango.AttrQuality.ATTR_VALID)).all()
+
+        with pytest.raises(pyaml.PyAMLException):
+            agg.add_devices(MockedDeviceProxy("sr/bpm/c01-1"))
+
+
+def test_vector_aggregator():
+    cs = TangoControlSystem(CsCM(name="test_cs"))
+    assert cs.vector_aggregator() == "tango.pyaml.multi_vector_attribute"
+    assert cs.vector_aggregator() != cs.scalar_aggregator()
@@ -0,0 +1,192 @@
+import numpy as np
+import pyaml
+import pytest
+
+from .mocked_group import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.device_factory import DeviceFactory
+from tango.pyaml.multi_attribute import MultiAttribute
+from tango.pyaml.tango_pyaml_utils import WriteFailedException
+
+
+class MockedCountingDeviceProxy(MockedDeviceProxy):
+    """Count the written values per device, writes fail while failing is set"""
+
+    writes: dict[str, int] = {}
+    failing: set[str] = set()
+    failing_replies: set[str] = set()
+
+    def _count(self, nb: int):
+        if self.device_name in MockedCountingDeviceProxy.failing:
+            tango.Except.throw_exception("API_DeviceTimedOut", "Timeout", "write")
+        writes = MockedCountingDeviceProxy.writes
+        writes[self.device_name] = writes.get(self.device_name, 0) + nb
+
+    def write_attribute_asynch(self, attr_name, value) -> int:
+        self._count(1)
+        return super().write_attribute_asynch(attr_name, value)
+
+    def write_attribute_reply(self, idx, green_mode=None, wait=True):
+        super().write_attribute_reply(idx, green_mode, wait)
+        if self.device_name in MockedCountingDeviceProxy.failing_replies:
+            tango.Except.throw_exception("API_DeviceTimedOut", "Timeout", "reply")
+
+    def write_attributes_asynch(self, attr_values) -> int:
+        self._count(len(attr_values))
+        return super().write_attributes_asynch(attr_values)
+
+
+@pytest.fixture(autouse=True)
+def counting_devices():
+    MockedCountingDeviceProxy.writes = {}
+    MockedCountingDeviceProxy.failing = set()
+    MockedCountingDeviceProxy.failing_replies = set()
+    with (
+        patch("tango.DeviceProxy", new=MockedCountingDeviceProxy),
+        patch("tango.Group", new=MockedGroup),
+    ):
+        yield
+
+
+def nb_writes() -> int:
+    return sum(MockedCountingDeviceProxy.writes.values())
+
+
+def test_attribute_deadband(config):
+    attr = Attribute(config.model_copy(update={"write_deadband": 0.1}))
+    attr.set(1.0)
+    attr.set(1.05)
+    assert nb_writes() == 1
+    assert attr.get() == 1.0
+    attr.set(1.2)
+    assert nb_writes() == 2
+
+    # A failed write is sent again
+    MockedCountingDeviceProxy.failing.add("sys/tg_test/1")
+    with pytest.raises(pyaml.PyAMLException):
+        attr.set(1.5)
+    MockedCountingDeviceProxy.failing.clear()
+    attr.set(1.2)
+    assert nb_writes() == 3
+
+    # External change detected by a read
+    attr._attribute_dev.write_attribute("float_scalar", 3.0)
+    attr.readback()
+    attr.set(1.2)
+    assert nb_writes() == 4
+    assert attr.get() == 1.2
+    assert DeviceFactory().get_setpoint_cache().stats()["skipped"] == 1
+
+
+def test_attribute_deadband_failed_reply(config):
+    attr = Attribute(config.model_copy(update={"write_deadband": 0.1}))
+    MockedCountingDeviceProxy.failing_replies.add("sys/tg_test/1")
+    attr.set(1.0)
+    # The write is sent again as its reply failed
+    attr.set(1.0)
+    assert nb_writes() == 2
+    MockedCountingDeviceProxy.failing_replies.clear()
+    attr.set(1.0)
+    attr.set(1.0)
+    assert nb_writes() == 2
+
+
+def test_attribute_deadband_events(config):
+    attr = Attribute(config.model_copy(update={"write_deadband": 0.1, "events": True}))
+    attr.set(1.0)
+    attr.set(1.0)
+    assert nb_writes() == 1
+    # External change detected by an event
+    attr._attribute_dev.push_event("float_scalar", 2.0)
+    attr.set(1.0)
+    assert nb_writes() == 2
+
+
+def test_multi_attribute_deadband(config_multi):
+    ma = MultiAttribute(config_multi.model_copy(update={"write_deadband": 0.01}))
+    ma.set(np.array([1.0, 2.0, 3.0, 4.0]))
+    assert nb_writes() == 4
+    # Only the changed values are sent
+    ma.set(np.array([1.0, 2.005, 3.5, 4.0]))
+    assert MockedCountingDeviceProxy.writes == {
+        "sys/tg_test/1": 1,
+        "sys/tg_test/2": 1,
+        "sys/tg_test/3": 2,
+        "sys/tg_test/4": 1,
+    }
+    ma.set_and_wait(np.array([1.0, 2.0, 3.5, 4.0]))
+    assert nb_writes() == 5
+    assert list(ma.get()) == [1.0, 2.0, 3.5, 4.0]
+
+    # Setpoints are shared with the attributes writing them
+    attr = Attribute(
+        AttrCM(attribute="sys/tg_test/4/float_scalar", write_deadband=0.01)
+    )
+    attr.set(4.0)
+    assert nb_writes() == 5
+    attr.set(0.0)
+    ma.set(np.array([1.0, 2.0, 3.5, 4.0]))
+    assert MockedCountingDeviceProxy.writes["sys/tg_test/4"] == 3
+
+    # Failed writes are sent again
+    MockedCountingDeviceProxy.failing.add("sys/tg_test/2")
+    with pytest.raises(WriteFailedException):
+        ma.set(np.array([1.0, 0.0, 3.5, 4.0]))
+    MockedCountingDeviceProxy.failing.clear()
+    ma.set(np.array([1.0, 2.0, 3.5, 4.0]))
+    assert MockedCountingDeviceProxy.writes["sys/tg_test/2"] == 2
+
+    # External changes detected by reads
+    DeviceFactory().get_device("sys/tg_test/1").write_attribute("float_scalar", 9.0)
+    ma.readback()
+    ma.set(np.array([1.0, 2.0, 3.5, 4.0]))
+    assert MockedCountingDeviceProxy.writes["sys/tg_test/1"] == 2
+    assert nb_writes() == 9
+
+
+def test_deadband_after_group_write(config_multi, config_group):
+    ma = MultiAttribute(config_multi.model_copy(update={"write_deadband": 0.01}))
+    ma.set(np.zeros(4))
+    AttributeList(config_group).set(1.0)
+    ma.set(np.zeros(4))
+    assert list(ma.get()) == [0.0] * 4
+
+
+def test_control_system_deadband():
+    cs = TangoControlSystem(CsCM(name="deadband_cs", write_deadband=0.5))
+    [attr] = cs.attach([Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))])
+    attr.set(1.0)
+    attr.set(1.4)
+    assert nb_writes() == 1
+
+
+def test_group_write_without_deadband(config, config_group):
+    group = AttributeList(config_group)
+    Attribute(config).set(1.0)
+    group.set(2.0)
+    # Setpoints are only forgotten once a dead-band is used
+    assert group._setpoint_slots is None
+
+    # Setpoints written before are not trusted by the first dead-band check
+    attr = Attribute(config.model_copy(update={"write_deadband": 0.1}))
+    nb = nb_writes()
+    attr.set(1.0)
+    assert nb_writes() == nb + 1
+    assert attr.get() == 1.0
+    group.set(2.0)
+    assert group._setpoint_slots is not None
+
+
+def test_restore_without_deadband():
+    cs = TangoControlSystem(CsCM(name="restore_cs", write_deadband=0.5))
+    [attr] = cs.attach([Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar"))])
+    attr.set_and_wait(1.0)
+    snapshot = cs.snapshot()
+    # Setpoints of the snapshot are always sent
+    nb = nb_writes()
+    result = cs.restore(snapshot, verify=False)
+    assert result.written == 1
+    assert nb_writes() == nb + 1
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+import numpy as np
+import pytest
+
+from .mocked_group import *
+from unittest.mock import patch
+from tango.pyaml.attribute import Attribute, ConfigModel as AttrCM
+from tango.pyaml.attribute_list import AttributeList
+from tango.pyaml.controlsystem import ConfigModel as CsCM, TangoControlSystem
+from tango.pyaml.multi_attribute import MultiAttribute
+from tango.pyaml.multi_vector_attribute import MultiVectorAttribute
+from tango.pyaml.tango_pyaml_utils import OutOfRangeException
+from tango.pyaml.vector_attribute import VectorAttribute
+
+
+class MockedGuardedDeviceProxy(MockedDeviceProxy):
+    """Range [-n, n] for device n, writes are counted"""
+
+    nb_writes = 0
+
+    def attribute_query(self, name):
+        limit = self.device_name.rsplit("/", 1)[1]
+        return MockedAttributeInfoEx(
+            name, tango.AttrWriteType.READ_WRITE, f"-{limit}", limit
+        )
+
+    def write_attribute(self, attr_name, value):
+        MockedGuardedDeviceProxy.nb_writes += 1
+        super().write_attribute(attr_name, value)
+
+
+@pytest.fixture(autouse=True)
+def guarded_devices():
+    MockedGuardedDeviceProxy.nb_writes = 0
+    with (
+        patch("tango.DeviceProxy", new=MockedGuardedDeviceProxy),
+        patch("tango.Group", new=MockedGroup),
+    ):
+        yield
+
+
+def test_attribute_guard(config, caplog):
+    attr = Attribute(config.model_copy(update={"write_guard": "reject"}))
+    with pytest.raises(OutOfRangeException) as ex:
+        attr.set(1.5)
+    assert ex.value.names == ["sys/tg_test/1/float_scalar"]
+    assert MockedGuardedDeviceProxy.nb_writes == 0
+    attr.set_and_wait(-0.5)
+    assert attr.get() == -0.5
+
+    attr = Attribute(config.model_copy(update={"write_guard": "clip"}))
+    attr.set_and_wait(7.0)
+    assert attr.get() == 1.0
+
+    attr = Attribute(config.model_copy(update={"write_guard": "warn"}))
+    with caplog.at_level(logging.WARNING):
+        attr.set(7.0)
+    assert "out of range" in caplog.text
+    assert attr.get() == 7.0
+
+    # The configured range has priority over the Tango one
+    attr = Attribute(
+        config.model_copy(update={"write_guard": "clip", "range": (None, 0.0)})
+    )
+    attr.set(-7.0)
+    assert attr.get() == -7.0
+    attr.set(7.0)
+    assert attr.get() == 0.0
+
+
+def test_multi_attribute_guard(config_multi):
+    ma = MultiAttribute(config_multi.model_copy(update={"write_guard": "reject"}))
+    with pytest.raises(OutOfRangeException) as ex:
+        ma.set(np.array([0.0, 2.5, 3.0, -9.0]))
+    # Nothing is written, the vector is never partially applied
+    assert ex.value.names == [
+        "sys/tg_test/2/float_scalar",
+        "sys/tg_test/4/float_scalar",
+    ]
+    assert MockedGuardedDeviceProxy.nb_writes == 0
+
+    ma = MultiAttribute(config_multi.model_copy(update={"write_guard": "clip"}))
+    ma.set_and_wait(np.array([0.5, 2.5, -4.0, -9.0]), tolerance=0.01)
+    assert list(ma.get()) == [0.5, 2.0, -3.0, -4.0]
+    with pytest.raises(OutOfRangeException):
+        asyncio.run(
+            MultiAttribute(
+                config_multi.model_copy(update={"write_guard": "reject"})
+            ).aset(np.array([0.0, 0.0, 0.0, 5.0]))
+        )
+
+    # Aggregators built from attributes apply the guard of each attribute
+    attrs = [
+        Attribute(AttrCM(attribute=f"sys/tg_test/{i}/float_scalar", write_guard=mode))
+        for i, mode in ((1, None), (2, "clip"), (3, "reject"))
+    ]
+    ma = MultiAttribute()
+    ma.add_devices(attrs)
+    ma.set(np.array([5.0, 5.0, 0.0]))
+    assert list(ma.get()) == [5.0, 2.0, 0.0]
+    with pytest.raises(OutOfRangeException):
+        ma.set(np.array([5.0, 5.0, 5.0]))
+
+
+def test_attribute_list_guard(config_group):
+    group = AttributeList(config_group.model_copy(update={"write_guard": "reject"}))
+    with pytest.raises(OutOfRangeException) as ex:
+        group.set(2.5)
+    assert ex.value.names == [
+        "sys/tg_test/1/float_scalar",
+        "sys/tg_test/2/float_scalar",
+    ]
+    assert MockedGuardedDeviceProxy.nb_writes == 0
+
+    # Clipped to the range common to all attributes
+    group = AttributeList(config_group.model_copy(update={"write_guard": "clip"}))
+    group.set_and_wait(-2.5)
+    assert list(group.get()) == [-1.0] * 4
+
+
+def test_vector_guard():
+    attrs = [
+        VectorAttribute(
+            AttrCM(attribute=f"sys/tg_test/{i}/wave", range=(0, i), write_guard="clip")
+        )
+        for i in (1, 2)
+    ]
+    attrs[0].set(np.array([-1.0, 0.5, 3.0]))
+    assert list(attrs[0].get()) == [0.0, 0.5, 1.0]
+
+    mva = MultiVectorAttribute()
+    mva.add_devices(attrs)
+    mva.set(np.array([[3.0, 3.0, 3.0], [1.5, -1.0, 3.0]]))
+    assert mva.get().tolist() == [[1.0, 1.0, 1.0], [1.5, 0.0, 2.0]]
+
+
+def test_control_system_guard():
+    cs = TangoControlSystem(CsCM(name="guard_cs", write_guard="reject"))
+    [attr] = cs.attach([Attribute(AttrCM(attribute="sys/tg_test/3/float_scalar"))])
+    with pytest.raises(OutOfRangeException):
+        attr.set(4.0)
+    [attr] = cs.attach(
+        [Attribute(AttrCM(attribute="sys/tg_test/1/float_scalar", write_guard="warn"))]
+    )
+    attr.set(4.0)
+    assert attr.get() == 4.0